@@ -0,0 +1,83 @@
+"""
+Benchmark of decoding Binance payloads with the json libraries installed.
+
+    python -m benchmarks.json_decoding
+
+str: frame decoded into str first, then json.loads as before the codec.
+bytes: frame passed to loads of each library directly.
+"""
+
+import json
+import timeit
+from typing import Callable, List, Tuple
+
+from gridtrader.api.codec import JSON_LIBRARY
+
+
+PAYLOADS = {
+    "depth5": {
+        "stream": "btcusdt@depth5",
+        "data": {
+            "e": "depthUpdate", "E": 1729300000123, "T": 1729300000120, "s": "BTCUSDT",
+            "U": 5400000001, "u": 5400000010, "pu": 5400000000,
+            "b": [[f"{96000 - i * 0.1:.1f}", f"{i + 1}.123"] for i in range(5)],
+            "a": [[f"{96000.1 + i * 0.1:.1f}", f"{i + 1}.456"] for i in range(5)],
+        }
+    },
+    "bookTicker": {
+        "stream": "btcusdt@bookTicker",
+        "data": {
+            "e": "bookTicker", "u": 5400000011, "E": 1729300000124, "T": 1729300000121,
+            "s": "BTCUSDT", "b": "96000.0", "B": "1.123", "a": "96000.1", "A": "0.456"
+        }
+    },
+    "order": {
+        "e": "ORDER_TRADE_UPDATE", "E": 1729300000125, "T": 1729300000122,
+        "o": {
+            "s": "BTCUSDT", "c": "x-1000001", "S": "BUY", "o": "LIMIT", "f": "GTC",
+            "q": "0.002", "p": "96000.0", "ap": "96000.0", "sp": "0", "x": "TRADE",
+            "X": "FILLED", "i": 4000000001, "l": "0.002", "z": "0.002", "L": "96000.0",
+            "n": "0.0384", "N": "USDT", "T": 1729300000122, "t": 500000001, "b": "0",
+            "a": "0", "m": True, "R": False, "wt": "CONTRACT_PRICE", "ot": "LIMIT",
+            "ps": "BOTH", "cp": False, "rp": "0", "pP": False, "si": 0, "ss": 0
+        }
+    },
+}
+
+
+def get_decoders() -> List[Tuple[str, Callable]]:
+    """"""
+    decoders = [
+        ("json str", lambda data: json.loads(data.decode("utf-8"))),
+        ("json bytes", json.loads),
+    ]
+
+    try:
+        import ujson
+        decoders.append(("ujson bytes", ujson.loads))
+    except ImportError:
+        pass
+
+    try:
+        import orjson
+        decoders.append(("orjson bytes", orjson.loads))
+    except ImportError:
+        pass
+
+    return decoders
+
+
+def run(number: int = 100000) -> None:
+    """"""
+    print(f"codec: {JSON_LIBRARY}")
+
+    for name, payload in PAYLOADS.items():
+        data = json.dumps(payload).encode("utf-8")
+
+        for decoder_name, decoder in get_decoders():
+            seconds = min(timeit.repeat(lambda: decoder(data), number=number, repeat=5))
+            print(f"{name:>10} {decoder_name:>12}: {seconds / number * 1e6:.2f} us/message")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,68 @@
+"""
+Benchmark of creating and copying order data objects.
+
+    python -m benchmarks.object_memory
+
+Plain: OrderData as dataclass with instance __dict__, as before slotted.
+Slotted: OrderData with __slots__ and interned vt_symbol.
+"""
+
+import timeit
+import tracemalloc
+from copy import copy
+from dataclasses import field, fields, make_dataclass
+from decimal import Decimal
+
+from gridtrader.trader.constant import Direction, Exchange
+from gridtrader.trader.object import OrderData
+
+
+PlainOrderData = make_dataclass(
+    "PlainOrderData",
+    [(f.name, f.type, field(default=f.default)) for f in fields(OrderData)],
+    namespace={"__post_init__": OrderData.__post_init__}
+)
+
+
+def create(cls: type, n: int) -> object:
+    """"""
+    return cls(
+        gateway_name="Futures",
+        symbol="BTCUSDT",
+        exchange=Exchange.BINANCE,
+        orderid=str(n),
+        direction=Direction.LONG,
+        price=Decimal("96000.1"),
+        volume=Decimal("0.001"),
+    )
+
+
+def measure_bytes(cls: type, number: int = 10000) -> float:
+    """"""
+    tracemalloc.start()
+    start, _ = tracemalloc.get_traced_memory()
+    objects = [create(cls, n) for n in range(number)]
+    end, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    del objects
+    return (end - start) / number
+
+
+def run(number: int = 100000) -> None:
+    """"""
+    for name, cls in [("plain", PlainOrderData), ("slotted", OrderData)]:
+        obj = create(cls, 0)
+
+        seconds = min(timeit.repeat(lambda: create(cls, 0), number=number, repeat=5))
+        copy_seconds = min(timeit.repeat(lambda: copy(obj), number=number, repeat=5))
+
+        print(
+            f"{name:>8}: {number / seconds:,.0f} objects/s, "
+            f"{number / copy_seconds:,.0f} copies/s, "
+            f"{measure_bytes(cls):.0f} bytes/object"
+        )
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,64 @@
+"""
+Benchmark of decoding depth websocket message into tick data.
+
+    python -m benchmarks.tick_decoding
+
+Eager: 20 Decimal fields are set and the tick is copied, as before LazyTickData.
+Lazy: LazyTickData keeps raw levels and strategies only read bid_price_1.
+"""
+
+import timeit
+from copy import copy
+from datetime import datetime
+from decimal import Decimal
+
+from gridtrader.trader.constant import Exchange
+from gridtrader.trader.object import TickData, LazyTickData
+
+
+DATA = {
+    "b": [[f"{96000 - i * 0.1:.1f}", f"{i + 1}.123"] for i in range(5)],
+    "a": [[f"{96000.1 + i * 0.1:.1f}", f"{i + 1}.456"] for i in range(5)],
+}
+
+TICK = TickData(
+    symbol="btcusdt",
+    exchange=Exchange.BINANCE,
+    datetime=datetime.now(),
+    gateway_name="Futures"
+)
+
+
+def decode_eager() -> Decimal:
+    """"""
+    tick = TICK
+
+    bids = DATA["b"]
+    for n in range(min(5, len(bids))):
+        price, volume = bids[n]
+        tick.__setattr__("bid_price_" + str(n + 1), Decimal(price))
+        tick.__setattr__("bid_volume_" + str(n + 1), Decimal(volume))
+
+    asks = DATA["a"]
+    for n in range(min(5, len(asks))):
+        price, volume = asks[n]
+        tick.__setattr__("ask_price_" + str(n + 1), Decimal(price))
+        tick.__setattr__("ask_volume_" + str(n + 1), Decimal(volume))
+
+    return copy(tick).bid_price_1
+
+
+def decode_lazy() -> Decimal:
+    """"""
+    return LazyTickData(TICK, DATA["b"], DATA["a"]).bid_price_1
+
+
+def run(number: int = 100000) -> None:
+    """"""
+    for name, func in [("eager", decode_eager), ("lazy", decode_lazy)]:
+        seconds = min(timeit.repeat(func, number=number, repeat=5))
+        print(f"{name:>6}: {seconds / number * 1e6:.2f} us/message")
+
+
+if __name__ == "__main__":
+    run()
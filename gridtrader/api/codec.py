@@ -0,0 +1,43 @@
+"""
+JSON codec of rest and websocket payloads.
+
+orjson or ujson is used if installed, otherwise the json module of standard
+library. orjson and ujson decode bytes directly, so response body and websocket
+frame do not need to be decoded into str first.
+"""
+
+import json
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+
+    JSON_LIBRARY: str = "orjson"
+
+    loads: Callable[[Union[str, bytes]], Any] = orjson.loads
+
+    def dumps(obj: Any) -> str:
+        """"""
+        return orjson.dumps(obj).decode()
+
+except ImportError:
+    try:
+        import ujson
+
+        JSON_LIBRARY: str = "ujson"
+
+        loads: Callable[[Union[str, bytes]], Any] = ujson.loads
+        dumps: Callable[[Any], str] = ujson.dumps
+
+    except ImportError:
+        JSON_LIBRARY: str = "json"
+
+        def loads(data: Union[str, bytes]) -> Any:
+            """
+            json.loads detects encoding of bytes, which is slower than decoding utf-8 first.
+            """
+            if isinstance(data, bytes):
+                data = data.decode("utf-8")
+            return json.loads(data)
+
+        dumps: Callable[[Any], str] = json.dumps
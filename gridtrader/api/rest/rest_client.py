@@ -9,6 +9,8 @@ from types import TracebackType
 
 import requests
 
+from gridtrader.api.codec import loads
+
 
 CALLBACK_TYPE = Callable[[dict, "Request"], Any]
 ON_FAILED_TYPE = Callable[[int, "Request"], Any]
@@ -267,7 +269,7 @@ class RestClient(object):
                 if status_code == 204:
                     json_body = None
                 else:
-                    json_body = response.json()
+                    json_body = loads(response.content)
 
                 request.callback(json_body, request)
                 request.status = RequestStatus.success
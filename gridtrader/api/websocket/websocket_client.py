@@ -1,16 +1,20 @@
-import json
 import logging
+import random
 import socket
 import ssl
 import sys
+import time
 import traceback
+from collections import defaultdict
 from datetime import datetime
+from queue import Empty, Full, Queue
 from threading import Lock, Thread
 from time import sleep
-from typing import Optional
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 import websocket
 
+from gridtrader.api.codec import dumps, loads
 from gridtrader.trader.utility import get_file_logger
 
 
@@ -24,9 +28,11 @@ class WebsocketClient:
     Use stop to stop threads and disconnect websocket before destroying the client
     object (especially when exiting the programme).
 
-    Default serialization format is json.
+    Default serialization format is json, decoded by orjson or ujson if installed.
+    Set receive_bytes to pass frames to unpack_data as bytes without decoding into str.
 
     Callbacks to overrides:
+    * filter_frame
     * unpack_data
     * on_connected
     * on_disconnected
@@ -35,9 +41,28 @@ class WebsocketClient:
 
     After start() is called, the ping thread will ping server every 60 seconds.
 
+    If decode_workers is set, the worker thread only receives and filters frames,
+    which are put into bounded queues and decoded by decode worker threads. Frames
+    with the same key of filter_frame are always handled by the same decode worker
+    in order. The oldest frame is dropped if a queue is full, so it should only be
+    used for market data.
+
+    The worker thread reconnects with exponential backoff and random jitter, the
+    delay is doubled after each failure from reconnect_delay up to max_reconnect_delay.
+
+    If standby is set, a second connection of the same host is kept connected and
+    its frames are dropped before decoding. Frames of the standby connection are
+    processed instead when the primary connection is lost, and the two connections
+    swap their roles. Receive lags of both connections are read from raw frames by
+    peek_event_time. The connections also swap when the lag of the active one is
+    max_lag more than the lowest lag seen and switch_margin more than the other one.
+    Packets already processed are dropped by get_update_id of each key.
+
     If you want to send anything other than JSON, override send_packet.
     """
 
+    is_standby: bool = False  # whether this is the standby connection of another client
+
     def __init__(self):
         """Constructor"""
         self.host = None
@@ -53,6 +78,44 @@ class WebsocketClient:
         self.proxy_port = None
         self.ping_interval = 60  # seconds
         self.header = {}
+        self.receive_bytes = False
+
+        # Frames counted by the key returned from filter_frame
+        self.processed_counts: Dict[str, int] = defaultdict(int)
+        self.dropped_counts: Dict[str, int] = defaultdict(int)
+
+        # Decode pipeline, frames are decoded in worker thread if not set
+        self.decode_workers = 0
+        self.queue_size = 10000
+        self._decode_queues: List[Queue] = []
+        self._decode_threads: List[Thread] = []
+        self.overflow_count = 0  # frames dropped since queue is full
+
+        # key: lags in milliseconds, see get_event_time
+        self.lag_stats: Dict[str, Dict[str, float]] = {}
+
+        # Reconnect backoff in seconds
+        self.reconnect_delay = 0.5
+        self.max_reconnect_delay = 60
+        self._reconnect_count = 0  # failures since last frame received
+
+        # Warm standby connection, see get_update_id
+        self.standby: Optional[StandbyWebsocketClient] = None
+        self.use_standby = False
+        self.max_lag = 0  # milliseconds, lag switching disabled if 0
+        self.switch_interval = 5  # seconds, min interval of lag switching
+        self.switch_margin = 100  # milliseconds, lag of the other connection must be lower by
+        self.switch_count = 0
+        self.duplicate_count = 0  # packets dropped by update id
+        self.last_update_ids: Dict[str, int] = {}
+        self._switch_lock = Lock()
+        self._switch_time = 0
+        self._frame_lock = Lock()
+        self._min_lag: Optional[float] = None  # lowest lag of both connections, includes clock offset
+
+        # Smoothed receive lag in milliseconds of this connection, see peek_event_time
+        self.lag = 0
+        self.lag_time = 0
 
         self.logger: Optional[logging.Logger] = None
 
@@ -67,6 +130,10 @@ class WebsocketClient:
              ping_interval: int = 60,
              header: dict = None,
              log_path: Optional[str] = None,
+             decode_workers: int = 0,
+             queue_size: int = 10000,
+             standby: bool = False,
+             max_lag: float = 0,
              ):
         """
         :param host:
@@ -75,9 +142,21 @@ class WebsocketClient:
         :param header:
         :param ping_interval: unit: seconds, type: int
         :param log_path: optional. file to save log.
+        :param decode_workers: optional. number of decode threads, frames are decoded in worker thread if 0.
+        :param queue_size: optional. max number of frames waiting for each decode thread.
+        :param standby: optional. keep a standby connection of the same host, for market data only.
+        :param max_lag: optional. unit: milliseconds, switch connection if lag exceeds, disabled if 0.
         """
         self.host = host
         self.ping_interval = ping_interval  # seconds
+        self.decode_workers = decode_workers
+        self.queue_size = queue_size
+        self.max_lag = max_lag
+
+        if not standby:
+            self.standby = None
+        elif not self.standby:
+            self.standby = StandbyWebsocketClient(self)
         if log_path is not None:
             self.logger = get_file_logger(log_path)
             self.logger.setLevel(logging.DEBUG)
@@ -98,12 +177,28 @@ class WebsocketClient:
         """
 
         self._active = True
+        self._reconnect_count = 0
+        self.use_standby = False
+        self.last_update_ids.clear()
+        self._min_lag = None
+
+        self._decode_queues = [Queue(maxsize=self.queue_size) for _ in range(self.decode_workers)]
+        self._decode_threads = [Thread(target=self._run_decode, args=(q,)) for q in self._decode_queues]
+        for thread in self._decode_threads:
+            thread.start()
+
         self._worker_thread = Thread(target=self._run)
         self._worker_thread.start()
 
         self._ping_thread = Thread(target=self._run_ping)
         self._ping_thread.start()
 
+        if self.standby:
+            self.standby.init(self.host, self.proxy_host, self.proxy_port, self.ping_interval, self.header)
+            self.standby.receive_bytes = self.receive_bytes
+            self.standby.logger = self.logger
+            self.standby.start()
+
     def stop(self):
         """
         Stop the client.
@@ -111,6 +206,9 @@ class WebsocketClient:
         self._active = False
         self._disconnect()
 
+        if self.standby:
+            self.standby.stop()
+
     def join(self):
         """
         Wait till all threads finish.
@@ -120,13 +218,19 @@ class WebsocketClient:
         self._ping_thread.join()
         self._worker_thread.join()
 
+        for thread in self._decode_threads:
+            thread.join()
+
+        if self.standby:
+            self.standby.join()
+
     def send_packet(self, packet: dict):
         """
         Send a packet (dict data) to server
 
         override this if you want to send non-json packet
         """
-        text = json.dumps(packet)
+        text = dumps(packet)
         self._record_last_sent_text(text)
         return self._send_text(text)
 
@@ -171,7 +275,9 @@ class WebsocketClient:
                 )
                 triggered = True
         if triggered:
+            self.lag = 0
             self.on_connected()
+            self._on_connection_made()
 
     def _disconnect(self):
         """
@@ -187,6 +293,13 @@ class WebsocketClient:
             ws.close()
             self.on_disconnected()
 
+            if self._active:
+                self._on_connection_lost()
+
+    def is_connected(self) -> bool:
+        """"""
+        return self._ws is not None
+
     def _run(self):
         """
         Keep running till stop is called.
@@ -197,23 +310,21 @@ class WebsocketClient:
                     self._ensure_connection()
                     ws = self._ws
                     if ws:
-                        text = ws.recv()
+                        text = self._recv(ws)
+                        recv_time = time.time()
 
                         # ws object is closed when recv function is blocking
                         if not text:
                             self._disconnect()
+                            self._wait_reconnect()
                             continue
 
+                        self._reconnect_count = 0
                         self._record_last_received_text(text)
-
-                        try:
-                            data = self.unpack_data(text)
-                        except ValueError as e:
-                            print("websocket unable to parse data: " + text)
-                            raise e
-
-                        self._log('recv data: %s', data)
-                        self.on_packet(data)
+                        # Lag is only compared between connections in standby mode.
+                        if self.standby or self.is_standby:
+                            self._update_lag(text, recv_time)
+                        self._on_frame(text, recv_time)
                 # ws is closed before recv function is called
                 # For socket.error, see Issue #1608
                 except (
@@ -222,25 +333,297 @@ class WebsocketClient:
                     socket.error
                 ):
                     self._disconnect()
+                    self._wait_reconnect()
 
                 # other internal exception raised in on_packet
                 except:  # noqa
                     et, ev, tb = sys.exc_info()
                     self.on_error(et, ev, tb)
                     self._disconnect()
+                    self._wait_reconnect()
         except:  # noqa
             et, ev, tb = sys.exc_info()
             self.on_error(et, ev, tb)
         self._disconnect()
 
+    def _wait_reconnect(self) -> None:
+        """
+        Sleep before reconnecting, a random delay up to the backoff limit is used so
+        that clients disconnected at the same time do not reconnect at once.
+        """
+        if not self._active:
+            return
+
+        count = min(self._reconnect_count, 16)
+        delay = min(self.max_reconnect_delay, self.reconnect_delay * 2 ** count)
+        self._reconnect_count += 1
+
+        end = time.time() + random.uniform(0, delay)
+        while self._active:
+            remaining = end - time.time()
+            if remaining <= 0:
+                break
+            sleep(min(remaining, 0.1))
+
+    def _update_lag(self, text: Union[str, bytes], recv_time: float) -> None:
+        """
+        Update smoothed receive lag of this connection, frames are not decoded.
+        """
+        event_time = self.peek_event_time(text)
+        if not event_time:
+            return
+
+        lag = recv_time * 1000 - event_time
+        if self.lag:
+            self.lag = self.lag * 0.9 + lag * 0.1
+        else:
+            self.lag = lag
+        self.lag_time = recv_time
+
+    def _on_frame(self, text: Union[str, bytes], recv_time: float) -> None:
+        """
+        Frames of primary connection are dropped while the standby connection is used.
+        """
+        if not self.use_standby:
+            self._handle_frame(text, recv_time)
+
+    def _handle_frame(self, text: Union[str, bytes], recv_time: float) -> None:
+        """
+        Filter frame, then decode it in worker thread or put it into decode queue.
+        """
+        key, keep = self.filter_frame(text)
+        if not keep:
+            self.dropped_counts[key] += 1
+            return
+        self.processed_counts[key] += 1
+
+        if self.max_lag and self.standby:
+            self._check_lag(recv_time)
+
+        if self._decode_queues:
+            self._put_frame(key, recv_time, text)
+        elif self.standby:
+            # Frames of both connections may be processed around switching
+            with self._frame_lock:
+                self._process_frame(key, recv_time, text)
+        else:
+            self._process_frame(key, recv_time, text)
+
+    def _check_lag(self, recv_time: float) -> None:
+        """
+        Switch to the other connection if lag of the active one is too high, and the
+        other one is much faster. Both are slow if the exchange is lagging, so that
+        connections are not switched back and forth.
+        """
+        if self.use_standby:
+            active, other = self.standby, self
+        else:
+            active, other = self, self.standby
+
+        # Lag of the other connection is unknown if no frame received recently
+        if not active.lag or not other.lag or recv_time - other.lag_time > 1:
+            return
+
+        min_lag = min(active.lag, other.lag)
+        if self._min_lag is None or min_lag < self._min_lag:
+            self._min_lag = min_lag
+
+        if (
+            active.lag - self._min_lag > self.max_lag
+            and active.lag - other.lag > self.switch_margin
+            and recv_time - self._switch_time > self.switch_interval
+        ):
+            self._switch_connection(not self.use_standby)
+
+    def _on_connection_made(self) -> None:
+        """"""
+        if self.use_standby and not self.standby.is_connected():
+            self._switch_connection(False)
+
+    def _on_connection_lost(self) -> None:
+        """"""
+        if self.standby and not self.use_standby:
+            self._switch_connection(True)
+
+    def _switch_connection(self, use_standby: bool) -> bool:
+        """
+        Process frames of the standby or primary connection, only if it is connected.
+        """
+        with self._switch_lock:
+            if not self.standby or use_standby == self.use_standby:
+                return False
+
+            if use_standby:
+                connected = self.standby.is_connected()
+            else:
+                connected = self.is_connected()
+            if not connected:
+                return False
+
+            self.use_standby = use_standby
+            self.switch_count += 1
+            self._switch_time = time.time()
+
+        self.on_switched(use_standby)
+        return True
+
+    def _process_frame(self, key: str, recv_time: float, text: Union[str, bytes]) -> None:
+        """
+        Decode frame and call on_packet.
+        """
+        try:
+            data = self.unpack_data(text)
+        except ValueError as e:
+            print(f"websocket unable to parse data: {text}")
+            raise e
+
+        if self.standby:
+            update_id = self.get_update_id(data)
+            if update_id:
+                if update_id <= self.last_update_ids.get(key, 0):
+                    self.duplicate_count += 1
+                    return
+                self.last_update_ids[key] = update_id
+
+        self._log('recv data: %s', data)
+        self._record_lag(key, recv_time, data)
+        self.on_packet(data)
+
+    def _put_frame(self, key: str, recv_time: float, text: Union[str, bytes]) -> None:
+        """
+        Put frame into the queue of its decode worker, the oldest frame is dropped if full.
+        """
+        queue = self._decode_queues[hash(key) % len(self._decode_queues)]
+        item = (key, recv_time, text)
+
+        try:
+            queue.put_nowait(item)
+        except Full:
+            try:
+                queue.get_nowait()
+            except Empty:
+                pass
+            self.overflow_count += 1
+            queue.put_nowait(item)
+
+    def _run_decode(self, queue: Queue) -> None:
+        """
+        Decode frames of a queue till stop is called.
+        """
+        while self._active:
+            try:
+                key, recv_time, text = queue.get(timeout=1)
+            except Empty:
+                continue
+
+            try:
+                self._process_frame(key, recv_time, text)
+            except:  # noqa
+                et, ev, tb = sys.exc_info()
+                self.on_error(et, ev, tb)
+
+    def _record_lag(self, key: str, recv_time: float, packet: Any) -> None:
+        """
+        Record receive lag from exchange event time and queue delay before decoding.
+        """
+        event_time = self.get_event_time(packet)
+        if not event_time:
+            return
+
+        now = time.time()
+        receive_lag = recv_time * 1000 - event_time
+        queue_delay = (now - recv_time) * 1000
+
+        stats = self.lag_stats.get(key, None)
+        if stats is None:
+            stats = self.lag_stats[key] = {"max_receive_lag": 0, "max_queue_delay": 0}
+
+        stats["receive_lag"] = receive_lag
+        stats["queue_delay"] = queue_delay
+        stats["max_receive_lag"] = max(stats["max_receive_lag"], receive_lag)
+        stats["max_queue_delay"] = max(stats["max_queue_delay"], queue_delay)
+
+    def get_event_time(self, packet: Any) -> float:
+        """
+        Get event time in milliseconds of packet from server, 0 if unknown.
+
+        override this method to record receive lags in lag_stats.
+        """
+        return 0
+
+    def peek_event_time(self, frame: Union[str, bytes]) -> float:
+        """
+        Read event time in milliseconds from raw frame without decoding it, 0 if unknown.
+
+        override this method to measure lags of connections in standby mode.
+        """
+        return 0
+
+    def get_update_id(self, packet: Any) -> int:
+        """
+        Get increasing update id of packet from server, 0 if unknown.
+
+        override this method to drop packets received from both connections in standby mode.
+        """
+        return 0
+
+    def _recv(self, ws: websocket.WebSocket) -> Union[str, bytes]:
+        """
+        Receive a text or binary frame, empty if websocket is closed.
+        """
+        if not self.receive_bytes:
+            return ws.recv()
+
+        opcode, data = ws.recv_data()
+        if opcode in (websocket.ABNF.OPCODE_TEXT, websocket.ABNF.OPCODE_BINARY):
+            return data
+        return b""
+
+    def filter_frame(self, frame: Union[str, bytes]) -> Tuple[str, bool]:
+        """
+        Inspect raw frame before it is decoded.
+        Return the key for counting, like stream name or event type, and whether to process the frame.
+
+        override this method to drop unused messages without decoding them.
+        """
+        return "", True
+
+    @staticmethod
+    def read_prefix(frame: Union[str, bytes], prefix: Union[str, bytes]) -> Optional[Union[str, bytes]]:
+        """
+        Read the string value right after prefix at the start of frame, e.g. event type
+        of '{"e":"ORDER_TRADE_UPDATE",...' with prefix '{"e":"'. Return None if not found.
+        """
+        if not frame.startswith(prefix):
+            return None
+
+        start = len(prefix)
+        end = frame.find(prefix[-1:], start)  # prefix ends with the opening quote
+        if end < 0:
+            return None
+        return frame[start:end]
+
+    def get_frame_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Get numbers of processed and dropped frames of each key.
+        """
+        keys = set(self.processed_counts) | set(self.dropped_counts)
+        return {
+            key: {
+                "processed": self.processed_counts.get(key, 0),
+                "dropped": self.dropped_counts.get(key, 0)
+            }
+            for key in keys
+        }
+
     @staticmethod
-    def unpack_data(data: str):
+    def unpack_data(data: Union[str, bytes]):
         """
         Default serialization format is json.
 
         override this method if you want to use other serialization format.
         """
-        return json.loads(data)
+        return loads(data)
 
     def _run_ping(self):
         """"""
@@ -279,6 +662,12 @@ class WebsocketClient:
         """
         pass
 
+    def on_switched(self, use_standby: bool):
+        """
+        Callback when frames of the other connection are processed.
+        """
+        pass
+
     @staticmethod
     def on_packet(packet: dict):
         """
@@ -323,3 +712,43 @@ class WebsocketClient:
         Record last received text for debug purpose.
         """
         self._last_received_text = text[:1000]
+
+
+class StandbyWebsocketClient(WebsocketClient):
+    """
+    Standby connection of a websocket client, frames are passed to the owner client.
+    """
+
+    is_standby: bool = True
+
+    def __init__(self, owner: WebsocketClient):
+        """"""
+        super().__init__()
+
+        self.owner: WebsocketClient = owner
+
+    def _on_frame(self, text: Union[str, bytes], recv_time: float) -> None:
+        """"""
+        owner = self.owner
+        if owner.use_standby:
+            owner._handle_frame(text, recv_time)
+
+    def peek_event_time(self, frame: Union[str, bytes]) -> float:
+        """"""
+        return self.owner.peek_event_time(frame)
+
+    def _on_connection_made(self) -> None:
+        """"""
+        owner = self.owner
+        if not owner.use_standby and not owner.is_connected():
+            owner._switch_connection(True)
+
+    def _on_connection_lost(self) -> None:
+        """"""
+        owner = self.owner
+        if owner.use_standby:
+            owner._switch_connection(False)
+
+    def on_error(self, exception_type: type, exception_value: Exception, tb):
+        """"""
+        return self.owner.on_error(exception_type, exception_value, tb)
@@ -1,2 +1,3 @@
 from .engine import Event, EventEngine, EVENT_TIMER, EVENT_TICK, EVENT_TRADE, EVENT_ORDER, EVENT_POSITION, \
-    EVENT_ACCOUNT, EVENT_CONTRACT, EVENT_LOG, EVENT_CTA_LOG, EVENT_CTA_STRATEGY
+    EVENT_ACCOUNT, EVENT_CONTRACT, EVENT_MODIFY_FAILED, EVENT_LOG, EVENT_CTA_LOG, EVENT_CTA_STRATEGY, \
+    EVENT_CTA_TRADES
@@ -16,10 +16,12 @@ EVENT_ORDER = "eOrder."
 EVENT_POSITION = "ePosition."
 EVENT_ACCOUNT = "eAccount."
 EVENT_CONTRACT = "eContract."
+EVENT_MODIFY_FAILED = "eModifyFailed"
 
 EVENT_LOG = "eLog"
 EVENT_CTA_LOG = "eCtaLog"
 EVENT_CTA_STRATEGY = "eCtaStrategy"
+EVENT_CTA_TRADES = "eCtaTrades"
 
 class Event:
     """
@@ -1,7 +1,7 @@
 """
 Gateway for Binance Crypto Exchange.
 """
-from typing import Dict
+from typing import Callable, Dict, List, Tuple
 import urllib
 import hashlib
 import hmac
@@ -23,8 +23,10 @@ from gridtrader.trader.constant import (
     Interval
 )
 from gridtrader.trader.gateway import BaseGateway
+from gridtrader.trader.setting import SETTINGS
 from gridtrader.trader.object import (
     TickData,
+    LazyTickData,
     OrderData,
     TradeData,
     AccountData,
@@ -32,7 +34,8 @@ from gridtrader.trader.object import (
     OrderRequest,
     CancelRequest,
     QueryRequest,
-    SubscribeRequest
+    SubscribeRequest,
+    TradeHistoryRequest
 )
 from gridtrader.event import EVENT_TIMER, Event
 
@@ -40,6 +43,9 @@ REST_HOST = "https://www.binance.com"
 WEBSOCKET_TRADE_HOST = "wss://stream.binance.com:9443/ws/"
 WEBSOCKET_DATA_HOST = "wss://stream.binance.com:9443/stream?streams="
 
+# User data events processed by trade websocket, others are dropped before decoding.
+TRADE_EVENTS = {b"outboundAccountPosition", b"executionReport"}
+
 STATUS_BINANCE2VT = {
     "NEW": Status.NOTTRADED,
     "PARTIALLY_FILLED": Status.PARTTRADED,
@@ -126,9 +132,22 @@ class BinanceGateway(BaseGateway):
         """"""
         self.rest_api.cancel_order(req)
 
+    def replace_order(self, cancel_req: CancelRequest, order_req: OrderRequest):
+        """"""
+        return self.rest_api.replace_order(cancel_req, order_req)
+
     def query_order(self, req: QueryRequest):
         self.rest_api.query_order(req)
 
+    def query_open_orders(self, callback: Callable[[List[OrderData]], None]) -> bool:
+        """"""
+        self.rest_api.query_orders(callback)
+        return True
+
+    def query_trades(self, req: TradeHistoryRequest, callback: Callable[[List[TradeData]], None]):
+        """"""
+        self.rest_api.query_trades(req, callback)
+
     def query_account(self):
         """"""
         self.rest_api.query_account()
@@ -174,6 +193,9 @@ class BinanceRestApi(RestClient):
         self.order_count_lock = Lock()
         self.connect_time = 0
 
+        # Self trade prevention mode of new orders: EXPIRE_TAKER, EXPIRE_MAKER, EXPIRE_BOTH or NONE
+        self.self_trade_prevention: str = SETTINGS.get("order.self_trade_prevention", "EXPIRE_BOTH")
+
     def sign(self, request):
         """
         Generate BINANCE signature.
@@ -278,15 +300,18 @@ class BinanceRestApi(RestClient):
             data=data
         )
 
-    def query_orders(self):
-        """"""
+    def query_orders(self, callback: Callable[[List[OrderData]], None] = None):
+        """
+        Query all open orders, orders are pushed if no callback given.
+        """
         data = {"security": Security.SIGNED}
 
         self.add_request(
             method="GET",
             path="/api/v3/openOrders",
             callback=self.on_query_orders,
-            data=data
+            data=data,
+            extra=callback
         )
 
     def query_order(self, req: QueryRequest):
@@ -313,6 +338,26 @@ class BinanceRestApi(RestClient):
             extra=req
         )
 
+    def query_trades(self, req: TradeHistoryRequest, callback: Callable[[List[TradeData]], None]):
+        """"""
+        data = {
+            "security": Security.SIGNED
+        }
+
+        params = {
+            "symbol": req.symbol.upper(),
+            "limit": req.limit
+        }
+
+        self.add_request(
+            method="GET",
+            path="/api/v3/myTrades",
+            callback=self.on_query_trades,
+            params=params,
+            data=data,
+            extra=callback
+        )
+
     def query_contract(self):
         """"""
         data = {
@@ -353,7 +398,7 @@ class BinanceRestApi(RestClient):
             "quantity": str(req.volume),
             "newClientOrderId": orderid,
             "newOrderRespType": "ACK",
-            "selfTradePreventionMode": "EXPIRE_BOTH" # selfTradePreventionMode:  EXPIRE_TAKER, EXPIRE_MAKER, EXPIRE_BOTH, NONE, default is None
+            "selfTradePreventionMode": self.self_trade_prevention
         }
 
         self.add_request(
@@ -389,6 +434,48 @@ class BinanceRestApi(RestClient):
             extra=req
         )
 
+    def replace_order(self, cancel_req: CancelRequest, order_req: OrderRequest):
+        """
+        Cancel an existing order and send a new order in one request.
+        """
+        orderid = "x-A6SIDXVS" + str(self.connect_time + self._new_order_id())
+        order = order_req.create_order_data(
+            orderid,
+            self.gateway_name
+        )
+        self.gateway.on_order(order)
+
+        data = {
+            "security": Security.SIGNED
+        }
+
+        params = {
+            "symbol": order_req.symbol.upper(),
+            "timeInForce": "GTC",
+            "side": DIRECTION_VT2BINANCE[order_req.direction],
+            "type": ORDERTYPE_VT2BINANCE[order_req.type],
+            "price": str(order_req.price),
+            "quantity": str(order_req.volume),
+            "cancelReplaceMode": "STOP_ON_FAILURE",
+            "cancelOrigClientOrderId": cancel_req.orderid,
+            "newClientOrderId": orderid,
+            "newOrderRespType": "ACK",
+            "selfTradePreventionMode": self.self_trade_prevention
+        }
+
+        self.add_request(
+            method="POST",
+            path="/api/v3/order/cancelReplace",
+            callback=self.on_replace_order,
+            data=data,
+            params=params,
+            extra=(cancel_req, order),
+            on_error=self.on_replace_order_error,
+            on_failed=self.on_replace_order_failed
+        )
+
+        return order.vt_orderid
+
     def start_user_stream(self):
         """"""
         data = {
@@ -447,6 +534,7 @@ class BinanceRestApi(RestClient):
 
     def on_query_orders(self, data, request):
         """"""
+        orders = []
         for d in data:
             order = OrderData(
                 orderid=d["clientOrderId"],
@@ -459,8 +547,17 @@ class BinanceRestApi(RestClient):
                 traded=Decimal(d["executedQty"]),
                 status=STATUS_BINANCE2VT.get(d["status"], None),
                 datetime=generate_datetime(d["time"]),
+                update_time=generate_datetime(d["updateTime"]),
                 gateway_name=self.gateway_name,
             )
+            orders.append(order)
+
+        callback = request.extra
+        if callback:
+            callback(orders)
+            return
+
+        for order in orders:
             self.gateway.on_order(order)
 
         self.gateway.write_log("Query Spot Orders Successfully.")
@@ -478,10 +575,36 @@ class BinanceRestApi(RestClient):
             traded=Decimal(data["executedQty"]),
             status=STATUS_BINANCE2VT.get(data["status"], None),
             datetime=generate_datetime(data["time"]),
+            update_time=generate_datetime(data["updateTime"]),
             gateway_name=self.gateway_name,
         )
         self.gateway.on_order(order)
 
+    def on_query_trades(self, data, request):
+        """"""
+        trades = []
+        for d in data:
+            if d["isBuyer"]:
+                direction = Direction.LONG
+            else:
+                direction = Direction.SHORT
+
+            trade = TradeData(
+                symbol=d["symbol"].lower(),
+                exchange=Exchange.BINANCE,
+                orderid=str(d["orderId"]),
+                tradeid=str(d["id"]),
+                direction=direction,
+                price=Decimal(d["price"]),
+                volume=Decimal(d["qty"]),
+                datetime=generate_datetime(d["time"]),
+                gateway_name=self.gateway_name,
+            )
+            trades.append(trade)
+
+        callback = request.extra
+        callback(trades)
+
     def on_query_contract(self, data, request):
         """"""
         for d in data["symbols"]:
@@ -491,12 +614,15 @@ class BinanceRestApi(RestClient):
 
             price_tick = 1
             min_volume = 1
+            min_notional = Decimal("0")
 
             for f in d["filters"]:
                 if f["filterType"] == "PRICE_FILTER":
                     price_tick = Decimal(f["tickSize"])
                 elif f["filterType"] == "LOT_SIZE":
                     min_volume = Decimal(f["stepSize"])
+                elif f["filterType"] in ("MIN_NOTIONAL", "NOTIONAL"):
+                    min_notional = Decimal(f.get("notional", f.get("minNotional", "0")))
 
             contract = ContractData(
                 symbol=d["symbol"].lower(),
@@ -504,6 +630,7 @@ class BinanceRestApi(RestClient):
                 name=name,
                 price_tick=price_tick,
                 min_volume=min_volume,
+                min_notional=min_notional,
                 product=Product.SPOT,
                 gateway_name=self.gateway_name,
             )
@@ -536,12 +663,76 @@ class BinanceRestApi(RestClient):
         """
         order = request.extra
         order.status = Status.REJECTED
-        self.gateway.on_order(order)
+        self.gateway.on_order(order, local=True)
 
         # Record exception if not ConnectionError
         if not issubclass(exception_type, ConnectionError):
             self.on_error(exception_type, exception_value, tb, request)
 
+    def on_replace_order(self, data, request):
+        """"""
+        cancel_req, order = request.extra
+        self.process_replace_result(cancel_req, order, data)
+
+    def on_replace_order_failed(self, status_code: str, request: Request) -> None:
+        """
+        Callback when cancel-replace failed on server, which may still have cancelled the original order.
+        """
+        cancel_req, order = request.extra
+
+        try:
+            data = request.response.json().get("data", {})
+        except ValueError:
+            data = {}
+        self.process_replace_result(cancel_req, order, data)
+
+        msg = f"Replace Order Failed，Code: {status_code}，Msg: {request.response.text}"
+        self.gateway.write_log(msg)
+
+    def on_replace_order_error(
+        self, exception_type: type, exception_value: Exception, tb, request: Request
+    ):
+        """
+        Callback when cancel-replace caused exception, the original order is queried to sync status.
+        """
+        cancel_req, order = request.extra
+        self.process_replace_result(cancel_req, order, {})
+
+        if not issubclass(exception_type, ConnectionError):
+            self.on_error(exception_type, exception_value, tb, request)
+
+    def process_replace_result(self, cancel_req: CancelRequest, order: OrderData, data: dict) -> None:
+        """
+        Push the result of both legs of a cancel-replace request together,
+        so the original order and the new order are never both missing or both active.
+        """
+        cancel_result = data.get("cancelResult", "")
+        new_order_result = data.get("newOrderResult", "")
+
+        if cancel_result == "SUCCESS":
+            vt_orderid = f"{self.gateway_name}.{cancel_req.orderid}"
+            pre_order = self.gateway.active_orders.get(vt_orderid, None)
+            if pre_order:
+                cancelled_order = copy(pre_order)
+                cancelled_order.status = Status.CANCELLED
+                cancelled_order.trade_data = None
+                self.gateway.on_order(cancelled_order)
+        else:
+            # The cancel leg failed or the result is unknown, sync the original order from server.
+            query_req = QueryRequest(
+                orderid=cancel_req.orderid,
+                symbol=cancel_req.symbol,
+                exchange=cancel_req.exchange
+            )
+            self.query_order(query_req)
+
+        if new_order_result == "SUCCESS":
+            order.status = Status.NOTTRADED
+        else:
+            order.status = Status.REJECTED
+        # The new order may still be placed when the result is unknown.
+        self.gateway.on_order(copy(order), local=not new_order_result)
+
     def on_cancel_order(self, data, request):
         """"""
         pass
@@ -568,6 +759,10 @@ class BinanceTradeWebsocketApi(WebsocketClient):
 
         self.gateway = gateway
         self.gateway_name = gateway.gateway_name
+        self.receive_bytes = True  # decode frames from bytes directly
+
+        self.connect_count = 0
+        self.last_event_time = 0  # timestamp in ms of last packet
 
     def connect(self, url, proxy_host, proxy_port):
         """"""
@@ -578,8 +773,34 @@ class BinanceTradeWebsocketApi(WebsocketClient):
         """"""
         self.gateway.write_log("Connect Spot Trade Websocket API")
 
+        # Updates pushed while disconnected are lost, sync them from rest api.
+        if self.connect_count:
+            if self.last_event_time:
+                self.gateway.write_log(
+                    f"Spot Trade Websocket Reconnected, Last Event: {generate_datetime(self.last_event_time)}"
+                )
+            self.gateway.resync_orders()
+            self.gateway.query_account()
+
+        self.connect_count += 1
+
+    def filter_frame(self, frame: bytes) -> Tuple[str, bool]:
+        """
+        Drop user data events other than account and order updates before decoding.
+        """
+        event = self.read_prefix(frame, b'{"e":"')
+        if event is None:
+            return "", True
+        return event.decode(), event in TRADE_EVENTS
+
+    def get_event_time(self, packet: dict) -> float:
+        """"""
+        return packet.get("E", 0)
+
     def on_packet(self, packet: dict):  # type: (dict)->None
         """"""
+        self.last_event_time = packet.get("E", self.last_event_time)
+
         if packet["e"] == "outboundAccountPosition":
             self.on_account(packet)
         elif packet["e"] == "executionReport":
@@ -616,6 +837,7 @@ class BinanceTradeWebsocketApi(WebsocketClient):
             traded=Decimal(packet["z"]),
             status=STATUS_BINANCE2VT[packet["X"]],
             datetime=generate_datetime(packet["O"]),
+            update_time=generate_datetime(packet["T"]),
             gateway_name=self.gateway_name
         )
 
@@ -650,8 +872,10 @@ class BinanceDataWebsocketApi(WebsocketClient):
 
         self.gateway = gateway
         self.gateway_name = gateway.gateway_name
+        self.receive_bytes = True  # decode frames from bytes directly
 
         self.ticks: Dict[str, TickData] = {}
+        self.depths: Dict[str, int] = {}  # depth levels needed of each symbol
 
     def connect(self, proxy_host: str, proxy_port: int):
         """"""
@@ -678,21 +902,63 @@ class BinanceDataWebsocketApi(WebsocketClient):
         )
 
         self.ticks[req.symbol] = tick
+        self.depths[req.symbol] = max(self.depths.get(req.symbol, 0), req.depth)
 
         # Close previous connection
         if self._active:
             self.stop()
             self.join()
 
-        # Create new connection
+        # Create new connection, book ticker is much smaller than depth if only level 1 is needed
         channels = []
         for ws_symbol in self.ticks.keys():
-            channels.append(ws_symbol + "@depth5")
+            if self.depths[ws_symbol] == 1:
+                channels.append(ws_symbol + "@bookTicker")
+            else:
+                channels.append(ws_symbol + "@depth5")
 
         url = WEBSOCKET_DATA_HOST + "/".join(channels)
-        self.init(url, self.proxy_host, self.proxy_port)
+        self.init(
+            url,
+            self.proxy_host,
+            self.proxy_port,
+            decode_workers=SETTINGS.get("websocket.decode_workers", 0),
+            queue_size=SETTINGS.get("websocket.queue_size", 10000),
+            standby=SETTINGS.get("websocket.standby", False),
+            max_lag=SETTINGS.get("websocket.max_lag", 1000)
+        )
         self.start()
 
+    def filter_frame(self, frame: bytes) -> Tuple[str, bool]:
+        """
+        Count frames by stream, and drop frames of symbols not subscribed.
+        """
+        stream = self.read_prefix(frame, b'{"stream":"')
+        if stream is None:
+            return "", True
+
+        stream = stream.decode()
+        return stream, stream.split("@", 1)[0] in self.ticks
+
+    def get_event_time(self, packet: dict) -> float:
+        """
+        Spot bookTicker and partial depth streams have no event time, so lag_stats
+        is not recorded and lag switching of standby mode is not used.
+        """
+        return 0
+
+    def get_update_id(self, packet: dict) -> int:
+        """
+        Book ticker has update id u, partial depth has lastUpdateId.
+        """
+        data = packet["data"]
+        return data.get("u", 0) or data.get("lastUpdateId", 0)
+
+    def on_switched(self, use_standby: bool) -> None:
+        """"""
+        name = "Standby" if use_standby else "Primary"
+        self.gateway.write_log(f"Switch Spot Market Websocket API to {name} Connection")
+
     def on_packet(self, packet):
         """"""
         stream = packet["stream"]
@@ -704,19 +970,11 @@ class BinanceDataWebsocketApi(WebsocketClient):
         if not tick:
             return
 
-        bids = data["bids"]
-        for n in range(5):
-            price, volume = bids[n]
-            tick.__setattr__("bid_price_" + str(n + 1), Decimal(price))
-            tick.__setattr__("bid_volume_" + str(n + 1), Decimal(volume))
-
-        asks = data["asks"]
-        for n in range(5):
-            price, volume = asks[n]
-            tick.__setattr__("ask_price_" + str(n + 1), Decimal(price))
-            tick.__setattr__("ask_volume_" + str(n + 1), Decimal(volume))
-
-        self.gateway.on_tick(copy(tick))
+        # Depth levels are decoded only when read by strategies.
+        if channel == "bookTicker":
+            self.gateway.on_tick(LazyTickData(tick, [[data["b"], data["B"]]], [[data["a"], data["A"]]]))
+        else:
+            self.gateway.on_tick(LazyTickData(tick, data["bids"], data["asks"]))
 
 
 def generate_datetime(timestamp: float) -> datetime:
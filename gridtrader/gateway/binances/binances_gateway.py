@@ -5,12 +5,13 @@ Gateway for Binance Crypto Exchange.
 import urllib
 import hashlib
 import hmac
+import re
 import time
-from copy import copy
 from datetime import datetime
 from enum import Enum
+from functools import partial
 from threading import Lock
-from typing import Dict, Tuple
+from typing import Callable, Dict, List, Optional, Set, Tuple
 from decimal import Decimal
 
 from gridtrader.api.rest import RestClient, Request
@@ -24,8 +25,11 @@ from gridtrader.trader.constant import (
     Offset
 )
 from gridtrader.trader.gateway import BaseGateway
+from gridtrader.trader.orderbook import OrderBook
+from gridtrader.trader.setting import SETTINGS
 from gridtrader.trader.object import (
     TickData,
+    LazyTickData,
     OrderData,
     TradeData,
     AccountData,
@@ -34,7 +38,9 @@ from gridtrader.trader.object import (
     OrderRequest,
     QueryRequest,
     CancelRequest,
+    ModifyRequest,
     SubscribeRequest,
+    TradeHistoryRequest,
 )
 from gridtrader.event import EVENT_TIMER, Event, EventEngine
 
@@ -46,6 +52,14 @@ D_REST_HOST: str = "https://dapi.binance.com"
 D_WEBSOCKET_TRADE_HOST: str = "wss://dstream.binance.com/ws/"
 D_WEBSOCKET_DATA_HOST: str = "wss://dstream.binance.com/stream?streams="
 
+DEPTH_SNAPSHOT_LIMIT: int = 1000
+
+# User data events processed by trade websocket, others are dropped before decoding.
+TRADE_EVENTS: Set[bytes] = {b"ACCOUNT_UPDATE", b"ORDER_TRADE_UPDATE"}
+
+# Event time of market data frames, read before decoding
+EVENT_TIME_PATTERN: re.Pattern = re.compile(rb'"E":(\d+)')
+
 STATUS_BINANCES2VT: Dict[str, Status] = {
     "NEW": Status.NOTTRADED,
     "PARTIALLY_FILLED": Status.PARTTRADED,
@@ -60,7 +74,8 @@ ORDERTYPE_VT2BINANCES: Dict[OrderType, Tuple[str, str]] = {
     OrderType.MARKET: ("MARKET", "GTC"),
     OrderType.FAK: ("LIMIT", "IOC"),
     OrderType.FOK: ("LIMIT", "FOK"),
-    OrderType.LIMIT_MAKER: ("LIMIT", "GTX")
+    OrderType.LIMIT_MAKER: ("LIMIT", "GTX"),
+    OrderType.STOP_MARKET: ("STOP_MARKET", "GTC")
 }
 ORDERTYPE_BINANCES2VT: Dict[Tuple[str, str], OrderType] = {v: k for k, v in ORDERTYPE_VT2BINANCES.items()}
 
@@ -125,6 +140,12 @@ class BinancesGateway(BaseGateway):
         """"""
         self.market_ws_api.subscribe(req)
 
+    def get_order_book(self, symbol: str) -> Optional[OrderBook]:
+        """
+        Get local order book of symbol subscribed with depth more than 5 levels.
+        """
+        return self.market_ws_api.books.get(symbol.lower(), None)
+
     def send_order(self, req: OrderRequest) -> str:
         """"""
         return self.rest_api.send_order(req)
@@ -133,9 +154,26 @@ class BinancesGateway(BaseGateway):
         """"""
         self.rest_api.cancel_order(req)
 
+    def modify_order(self, req: ModifyRequest) -> bool:
+        """"""
+        return self.rest_api.modify_order(req)
+
     def query_order(self, req: QueryRequest):
         self.rest_api.query_order(req)
 
+    def query_open_orders(self, callback: Callable[[List[OrderData]], None]) -> bool:
+        """"""
+        self.rest_api.query_orders(callback)
+        return True
+
+    def query_trades(
+            self,
+            req: TradeHistoryRequest,
+            callback: Callable[[List[TradeData]], None]
+    ) -> None:
+        """"""
+        self.rest_api.query_trades(req, callback)
+
     def query_account(self) -> None:
         """"""
         self.rest_api.query_account()
@@ -341,8 +379,10 @@ class BinancesRestApi(RestClient):
             data=data
         )
 
-    def query_orders(self) -> None:
-        """"""
+    def query_orders(self, callback: Callable[[List[OrderData]], None] = None) -> None:
+        """
+        Query all open orders, orders are pushed if no callback given.
+        """
         data = {"security": Security.SIGNED}
 
         if self.usdt_base:
@@ -354,7 +394,8 @@ class BinancesRestApi(RestClient):
             method="GET",
             path=path,
             callback=self.on_query_orders,
-            data=data
+            data=data,
+            extra=callback
         )
 
     def query_order(self, req: QueryRequest) -> None:
@@ -382,6 +423,35 @@ class BinancesRestApi(RestClient):
             extra=req
         )
 
+    def query_trades(
+            self,
+            req: TradeHistoryRequest,
+            callback: Callable[[List[TradeData]], None]
+    ) -> None:
+        """"""
+        data = {
+            "security": Security.SIGNED
+        }
+
+        params = {
+            "symbol": req.symbol,
+            "limit": req.limit
+        }
+
+        if self.usdt_base:
+            path = "/fapi/v1/userTrades"
+        else:
+            path = "/dapi/v1/userTrades"
+
+        self.add_request(
+            method="GET",
+            path=path,
+            callback=self.on_query_trades,
+            params=params,
+            data=data,
+            extra=callback
+        )
+
     def query_contract(self) -> Request:
         """"""
         data = {
@@ -400,6 +470,35 @@ class BinancesRestApi(RestClient):
             data=data
         )
 
+    def query_depth(self, symbol: str, limit: int, callback: Callable[[dict], None]) -> None:
+        """
+        Query depth snapshot, callback is called with None if query failed.
+        """
+        data = {
+            "security": Security.NONE
+        }
+
+        params = {
+            "symbol": symbol.upper(),
+            "limit": limit
+        }
+
+        if self.usdt_base:
+            path = "/fapi/v1/depth"
+        else:
+            path = "/dapi/v1/depth"
+
+        self.add_request(
+            method="GET",
+            path=path,
+            callback=self.on_query_depth,
+            params=params,
+            data=data,
+            on_failed=self.on_query_depth_failed,
+            on_error=self.on_query_depth_error,
+            extra=callback
+        )
+
     def _new_order_id(self) -> int:
         """"""
         with self.order_count_lock:
@@ -425,12 +524,18 @@ class BinancesRestApi(RestClient):
             "symbol": req.symbol,
             "side": DIRECTION_VT2BINANCES[req.direction],
             "type": order_type,
-            "timeInForce": time_condition,
-            "price": req.price,
             "quantity": req.volume,
             "newClientOrderId": orderid,
         }
 
+        # Market and stop market orders are rejected if price/timeInForce is sent,
+        # the price of a stop market order is used as the trigger price.
+        if req.type == OrderType.STOP_MARKET:
+            params["stopPrice"] = req.price
+        elif req.type != OrderType.MARKET:
+            params["timeInForce"] = time_condition
+            params["price"] = req.price
+
         if req.offset == Offset.CLOSE:
             params["reduceOnly"] = True
 
@@ -477,6 +582,37 @@ class BinancesRestApi(RestClient):
             extra=req
         )
 
+    def modify_order(self, req: ModifyRequest) -> bool:
+        """"""
+        data = {
+            "security": Security.SIGNED
+        }
+
+        params = {
+            "symbol": req.symbol,
+            "origClientOrderId": req.orderid,
+            "side": DIRECTION_VT2BINANCES[req.direction],
+            "price": req.price,
+            "quantity": req.volume
+        }
+
+        if self.usdt_base:
+            path = "/fapi/v1/order"
+        else:
+            path = "/dapi/v1/order"
+
+        self.add_request(
+            method="PUT",
+            path=path,
+            callback=self.on_modify_order,
+            params=params,
+            data=data,
+            extra=req,
+            on_failed=self.on_modify_order_failed,
+            on_error=self.on_modify_order_error
+        )
+        return True
+
     def start_user_stream(self) -> None:
         """"""
         data = {
@@ -566,25 +702,40 @@ class BinancesRestApi(RestClient):
 
     def on_query_orders(self, data: dict, request: Request) -> None:
         """"""
+        orders = []
         for d in data:
             key = (d["type"], d["timeInForce"])
             order_type = ORDERTYPE_BINANCES2VT.get(key, None)
             if not order_type:
                 continue
 
+            if order_type == OrderType.STOP_MARKET:
+                price = Decimal(d["stopPrice"])
+            else:
+                price = Decimal(d["price"])
+
             order = OrderData(
                 orderid=d["clientOrderId"],
                 symbol=d["symbol"],
                 exchange=Exchange.BINANCE,
-                price=Decimal(d["price"]),
+                price=price,
                 volume=Decimal(d["origQty"]),
                 type=order_type,
                 direction=DIRECTION_BINANCES2VT[d["side"]],
                 traded=Decimal(d["executedQty"]),
                 status=STATUS_BINANCES2VT.get(d["status"], None),
                 datetime=generate_datetime(d["time"]),
+                update_time=generate_datetime(d["updateTime"]),
                 gateway_name=self.gateway_name,
             )
+            orders.append(order)
+
+        callback = request.extra
+        if callback:
+            callback(orders)
+            return
+
+        for order in orders:
             self.gateway.on_order(order)
 
         self.gateway.write_log("Query Futures Orders Successfully.")
@@ -597,21 +748,47 @@ class BinancesRestApi(RestClient):
         if not order_type:
             return
 
+        if order_type == OrderType.STOP_MARKET:
+            price = Decimal(data["stopPrice"])
+        else:
+            price = Decimal(data["price"])
+
         order = OrderData(
             orderid=data["clientOrderId"],
             symbol=data["symbol"],
             exchange=Exchange.BINANCE,
-            price=Decimal(data["price"]),
+            price=price,
             volume=Decimal(data["origQty"]),
             type=order_type,
             direction=DIRECTION_BINANCES2VT[data["side"]],
             traded=Decimal(data["executedQty"]),
             status=STATUS_BINANCES2VT.get(data["status"], None),
             datetime=generate_datetime(data["time"]),
+            update_time=generate_datetime(data["updateTime"]),
             gateway_name=self.gateway_name,
         )
         self.gateway.on_order(order)
 
+    def on_query_trades(self, data: list, request: Request) -> None:
+        """"""
+        trades = []
+        for d in data:
+            trade = TradeData(
+                symbol=d["symbol"],
+                exchange=Exchange.BINANCE,
+                orderid=str(d["orderId"]),
+                tradeid=str(d["id"]),
+                direction=DIRECTION_BINANCES2VT[d["side"]],
+                price=Decimal(d["price"]),
+                volume=Decimal(d["qty"]),
+                datetime=generate_datetime(d["time"]),
+                gateway_name=self.gateway_name,
+            )
+            trades.append(trade)
+
+        callback = request.extra
+        callback(trades)
+
     def on_query_contract(self, data: dict, request: Request) -> None:
         """"""
         for d in data["symbols"]:
@@ -621,12 +798,15 @@ class BinancesRestApi(RestClient):
 
             price_tick = Decimal("1")
             min_volume = Decimal("1")
+            min_notional = Decimal("0")
 
             for f in d["filters"]:
                 if f["filterType"] == "PRICE_FILTER":
                     price_tick = Decimal(f["tickSize"])
                 elif f["filterType"] == "LOT_SIZE":
                     min_volume = Decimal(f["stepSize"])
+                elif f["filterType"] in ("MIN_NOTIONAL", "NOTIONAL"):
+                    min_notional = Decimal(f.get("notional", f.get("minNotional", "0")))
 
             contract = ContractData(
                 symbol=d["symbol"],
@@ -634,6 +814,7 @@ class BinancesRestApi(RestClient):
                 name=name,
                 price_tick=price_tick,
                 min_volume=min_volume,
+                min_notional=min_notional,
                 product=Product.FUTURES,
                 gateway_name=self.gateway_name,
             )
@@ -643,6 +824,26 @@ class BinancesRestApi(RestClient):
 
         self.gateway.write_log("Query Futures Info Successfully.")
 
+    def on_query_depth(self, data: dict, request: Request) -> None:
+        """"""
+        request.extra(data)
+
+    def on_query_depth_failed(self, status_code: str, request: Request) -> None:
+        """"""
+        request.extra(None)
+
+        msg = f"Query Depth Failed，Code: {status_code}, Msg：{request.response.text}"
+        self.gateway.write_log(msg)
+
+    def on_query_depth_error(
+            self, exception_type: type, exception_value: Exception, tb, request: Request
+    ) -> None:
+        """"""
+        request.extra(None)
+
+        if not issubclass(exception_type, ConnectionError):
+            self.on_error(exception_type, exception_value, tb, request)
+
     def on_send_order(self, data: dict, request: Request) -> None:
         """"""
         pass
@@ -666,7 +867,7 @@ class BinancesRestApi(RestClient):
         """
         order = request.extra
         order.status = Status.REJECTED
-        self.gateway.on_order(order)
+        self.gateway.on_order(order, local=True)
 
         # Record exception if not ConnectionError
         if not issubclass(exception_type, ConnectionError):
@@ -676,6 +877,54 @@ class BinancesRestApi(RestClient):
         """"""
         pass
 
+    def on_modify_order(self, data: dict, request: Request) -> None:
+        """"""
+        key = (data["type"], data["timeInForce"])
+        order_type = ORDERTYPE_BINANCES2VT.get(key, None)
+        if not order_type:
+            return
+
+        order = OrderData(
+            orderid=data["clientOrderId"],
+            symbol=data["symbol"],
+            exchange=Exchange.BINANCE,
+            price=Decimal(data["price"]),
+            volume=Decimal(data["origQty"]),
+            type=order_type,
+            direction=DIRECTION_BINANCES2VT[data["side"]],
+            traded=Decimal(data["executedQty"]),
+            status=STATUS_BINANCES2VT.get(data["status"], None),
+            datetime=generate_datetime(data["updateTime"]),
+            update_time=generate_datetime(data["updateTime"]),
+            gateway_name=self.gateway_name,
+        )
+        self.gateway.on_order(order)
+
+    def on_modify_order_failed(self, status_code: str, request: Request) -> None:
+        """
+        Callback when amending order failed on server, query the order to sync the latest status.
+        """
+        msg = f"Modify Order Failed，Code: {status_code}, Msg：{request.response.text}"
+        self.gateway.write_log(msg)
+
+        req: ModifyRequest = request.extra
+        self.gateway.on_modify_failed(req)
+        self.query_order(QueryRequest(orderid=req.orderid, symbol=req.symbol, exchange=req.exchange))
+
+    def on_modify_order_error(
+            self, exception_type: type, exception_value: Exception, tb, request: Request
+    ) -> None:
+        """
+        Callback when amending order caused exception, query the order to sync the latest status.
+        """
+        req: ModifyRequest = request.extra
+        self.gateway.on_modify_failed(req)
+        self.query_order(QueryRequest(orderid=req.orderid, symbol=req.symbol, exchange=req.exchange))
+
+        # Record exception if not ConnectionError
+        if not issubclass(exception_type, ConnectionError):
+            self.on_error(exception_type, exception_value, tb, request)
+
     def on_start_user_stream(self, data: dict, request: Request) -> None:
         """"""
         self.user_stream_key = data["listenKey"]
@@ -701,6 +950,10 @@ class BinancesTradeWebsocketApi(WebsocketClient):
 
         self.gateway: BinancesGateway = gateway
         self.gateway_name: str = gateway.gateway_name
+        self.receive_bytes = True  # decode frames from bytes directly
+
+        self.connect_count: int = 0
+        self.last_event_time: int = 0  # timestamp in ms of last packet
 
     def connect(self, url: str, proxy_host: str, proxy_port: int) -> None:
         """"""
@@ -711,8 +964,35 @@ class BinancesTradeWebsocketApi(WebsocketClient):
         """"""
         self.gateway.write_log("Connect Futures Trade Websocket API")
 
+        # Updates pushed while disconnected are lost, sync them from rest api.
+        if self.connect_count:
+            if self.last_event_time:
+                self.gateway.write_log(
+                    f"Futures Trade Websocket Reconnected, Last Event: {generate_datetime(self.last_event_time)}"
+                )
+            self.gateway.resync_orders()
+            self.gateway.query_account()
+            self.gateway.query_position()
+
+        self.connect_count += 1
+
+    def filter_frame(self, frame: bytes) -> Tuple[str, bool]:
+        """
+        Drop user data events other than account and order updates before decoding.
+        """
+        event = self.read_prefix(frame, b'{"e":"')
+        if event is None:
+            return "", True
+        return event.decode(), event in TRADE_EVENTS
+
+    def get_event_time(self, packet: dict) -> float:
+        """"""
+        return packet.get("E", 0)
+
     def on_packet(self, packet: dict) -> None:  # type: (dict)->None
         """"""
+        self.last_event_time = packet.get("E", self.last_event_time)
+
         if packet["e"] == "ACCOUNT_UPDATE":
             self.on_account(packet)
         elif packet["e"] == "ORDER_TRADE_UPDATE":
@@ -753,17 +1033,23 @@ class BinancesTradeWebsocketApi(WebsocketClient):
         if not order_type:
             return
 
+        if order_type == OrderType.STOP_MARKET:
+            price = Decimal(ord_data["sp"])
+        else:
+            price = Decimal(ord_data["p"])
+
         order = OrderData(
             symbol=ord_data["s"],
             exchange=Exchange.BINANCE,
             orderid=str(ord_data["c"]),
             type=order_type,
             direction=DIRECTION_BINANCES2VT[ord_data["S"]],
-            price=Decimal(ord_data["p"]),
+            price=price,
             volume=Decimal(ord_data["q"]),
             traded=Decimal(ord_data["z"]),
             status=STATUS_BINANCES2VT[ord_data["X"]],
             datetime=generate_datetime(packet["E"]),
+            update_time=generate_datetime(ord_data["T"]),
             gateway_name=self.gateway_name
         )
 
@@ -798,10 +1084,17 @@ class BinancesDataWebsocketApi(WebsocketClient):
 
         self.gateway: BinancesGateway = gateway
         self.gateway_name: str = gateway.gateway_name
+        self.receive_bytes = True  # decode frames from bytes directly
 
         self.ticks: Dict[str, TickData] = {}
+        self.depths: Dict[str, int] = {}  # depth levels needed of each symbol
         self.usdt_base = False
 
+        # Local order books of symbols need more than 5 levels
+        self.books: Dict[str, OrderBook] = {}
+        self.book_views: Dict[str, tuple] = {}  # last published levels
+        self.syncing: Set[str] = set()
+
     def connect(
             self,
             usdt_base: bool,
@@ -817,6 +1110,13 @@ class BinancesDataWebsocketApi(WebsocketClient):
         """"""
         self.gateway.write_log("Connect Futures Market Websocket API")
 
+        # Diff events pushed while disconnected are lost, order books are synced again.
+        # Not reset if the standby connection is used, events dropped around switching
+        # are found by the sequence check of each order book.
+        if not self.use_standby:
+            for book in self.books.values():
+                book.reset()
+
     def subscribe(self, req: SubscribeRequest) -> None:
         """"""
         if req.symbol not in symbol_name_map:
@@ -831,46 +1131,132 @@ class BinancesDataWebsocketApi(WebsocketClient):
             datetime=datetime.now(),
             gateway_name=self.gateway_name,
         )
-        self.ticks[req.symbol.lower()] = tick
+        ws_symbol = req.symbol.lower()
+        self.ticks[ws_symbol] = tick
+        self.depths[ws_symbol] = max(self.depths.get(ws_symbol, 0), req.depth)
+
+        if self.depths[ws_symbol] > 5 and ws_symbol not in self.books:
+            self.books[ws_symbol] = OrderBook(ws_symbol)
 
         # Close previous connection
         if self._active:
             self.stop()
             self.join()
 
-        # Create new connection
+        # Create new connection, book ticker is much smaller than depth if only level 1 is needed
         channels = []
         for ws_symbol in self.ticks.keys():
-            channels.append(ws_symbol + "@depth5")
+            if self.depths[ws_symbol] == 1:
+                channels.append(ws_symbol + "@bookTicker")
+            elif self.depths[ws_symbol] > 5:
+                channels.append(ws_symbol + "@depth@100ms")
+            else:
+                channels.append(ws_symbol + "@depth5")
 
         url = F_WEBSOCKET_DATA_HOST + "/".join(channels)
         if not self.usdt_base:
             url = D_WEBSOCKET_DATA_HOST + "/".join(channels)
 
-        self.init(url, self.proxy_host, self.proxy_port)
+        self.init(
+            url,
+            self.proxy_host,
+            self.proxy_port,
+            decode_workers=SETTINGS.get("websocket.decode_workers", 0),
+            queue_size=SETTINGS.get("websocket.queue_size", 10000),
+            standby=SETTINGS.get("websocket.standby", False),
+            max_lag=SETTINGS.get("websocket.max_lag", 1000)
+        )
         self.start()
 
+    def filter_frame(self, frame: bytes) -> Tuple[str, bool]:
+        """
+        Count frames by stream, and drop frames of symbols not subscribed.
+        """
+        stream = self.read_prefix(frame, b'{"stream":"')
+        if stream is None:
+            return "", True
+
+        stream = stream.decode()
+        return stream, stream.split("@", 1)[0] in self.ticks
+
+    def get_event_time(self, packet: dict) -> float:
+        """"""
+        return packet["data"].get("E", 0)
+
+    def peek_event_time(self, frame: bytes) -> float:
+        """"""
+        match = EVENT_TIME_PATTERN.search(frame)
+        if not match:
+            return 0
+        return int(match.group(1))
+
+    def get_update_id(self, packet: dict) -> int:
+        """"""
+        return packet["data"].get("u", 0)
+
+    def on_switched(self, use_standby: bool) -> None:
+        """"""
+        name = "Standby" if use_standby else "Primary"
+        self.gateway.write_log(f"Switch Futures Market Websocket API to {name} Connection")
+
     def on_packet(self, packet: dict) -> None:
         """"""
         stream = packet["stream"]
         data = packet["data"]
 
-        symbol, channel = stream.split("@")
+        symbol, channel = stream.split("@", 1)
         tick: TickData = self.ticks[symbol]
 
-        bids = data["b"]
-        for n in range(min(5, len(bids))):
-            price, volume = bids[n]
-            tick.__setattr__("bid_price_" + str(n + 1), Decimal(price))
-            tick.__setattr__("bid_volume_" + str(n + 1), Decimal(volume))
+        # Depth levels are decoded only when read by strategies.
+        if channel == "bookTicker":
+            self.gateway.on_tick(LazyTickData(tick, [[data["b"], data["B"]]], [[data["a"], data["A"]]]))
+        elif channel == "depth@100ms":
+            self.on_depth_update(symbol, data)
+        else:
+            self.gateway.on_tick(LazyTickData(tick, data["b"], data["a"]))
+
+    def on_depth_update(self, ws_symbol: str, data: dict) -> None:
+        """
+        Apply diff depth event to local order book, sync the book from snapshot if needed.
+        """
+        book = self.books[ws_symbol]
+
+        if book.apply_diff(data):
+            self.publish_book(ws_symbol)
+        elif ws_symbol not in self.syncing:
+            self.syncing.add(ws_symbol)
+            self.gateway.rest_api.query_depth(
+                ws_symbol,
+                DEPTH_SNAPSHOT_LIMIT,
+                partial(self.on_depth_snapshot, ws_symbol)
+            )
+
+    def on_depth_snapshot(self, ws_symbol: str, data: Optional[dict]) -> None:
+        """"""
+        book = self.books[ws_symbol]
+
+        if data:
+            if book.apply_snapshot(data):
+                self.publish_book(ws_symbol)
+            else:
+                self.gateway.write_log(f"Order Book Out of Sync: {ws_symbol}")
+
+        # Next diff event will sync again if failed.
+        self.syncing.discard(ws_symbol)
+
+    def publish_book(self, ws_symbol: str) -> None:
+        """
+        Push top levels of order book, skipped if the levels are not changed.
+        """
+        bids, asks = self.books[ws_symbol].get_depth(self.depths[ws_symbol])
 
-        asks = data["a"]
-        for n in range(min(5, len(asks))):
-            price, volume = asks[n]
-            tick.__setattr__("ask_price_" + str(n + 1), Decimal(price))
-            tick.__setattr__("ask_volume_" + str(n + 1), Decimal(volume))
+        view = (bids, asks)
+        if view == self.book_views.get(ws_symbol, None):
+            return
+        self.book_views[ws_symbol] = view
 
-        self.gateway.on_tick(copy(tick))
+        tick: TickData = self.ticks[ws_symbol]
+        self.gateway.on_tick(LazyTickData(tick, bids, asks))
 
 
 def generate_datetime(timestamp: float) -> datetime:
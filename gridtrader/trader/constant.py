@@ -51,6 +51,7 @@ class OrderType(Enum):
     MARKET = "MARKET"
     LIMIT_MAKER = "MAKER"
     STOP = "STOP"
+    STOP_MARKET = "STOP_MARKET"
     FAK = "FAK"
     FOK = "FOK"
 
@@ -0,0 +1,268 @@
+"""
+Optional SQLite storage of strategy settings, variables and trades.
+"""
+
+import json
+import sqlite3
+import sys
+from copy import copy
+from datetime import datetime
+from decimal import Decimal
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional, Tuple
+
+from .constant import Direction, Exchange, Offset
+from .object import TradeData
+
+
+CREATE_TABLES = """
+CREATE TABLE IF NOT EXISTS strategy_setting (
+    name TEXT PRIMARY KEY,
+    setting TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS strategy_data (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS trades (
+    vt_tradeid TEXT PRIMARY KEY,
+    strategy_name TEXT NOT NULL,
+    gateway_name TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    exchange TEXT NOT NULL,
+    orderid TEXT NOT NULL,
+    tradeid TEXT NOT NULL,
+    direction TEXT,
+    offset TEXT,
+    price TEXT,
+    volume TEXT,
+    timestamp REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS trades_strategy_time ON trades (strategy_name, timestamp);
+"""
+
+REPLACE_SETTING = "INSERT OR REPLACE INTO strategy_setting (name, setting) VALUES (?, ?)"
+DELETE_SETTING = "DELETE FROM strategy_setting WHERE name = ?"
+REPLACE_DATA = "INSERT OR REPLACE INTO strategy_data (name, data) VALUES (?, ?)"
+DELETE_DATA = "DELETE FROM strategy_data WHERE name = ?"
+INSERT_TRADE = "INSERT OR IGNORE INTO trades VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)"
+
+
+class SqliteStore:
+    """
+    Stores strategy settings, variables and trades in a sqlite database.
+
+    The database is opened in wal mode. Writes are only queued by the caller
+    and executed on a background thread, all writes queued within an interval
+    are committed in a single transaction. Like StrategyDataWriter, only the
+    latest variables of a strategy within an interval are written.
+    """
+
+    def __init__(self, filename: str, interval: float = 1):
+        """"""
+        self.filename: str = filename
+        self.interval: float = interval
+
+        self.pending_data: Dict[str, Optional[dict]] = {}  # None means removed
+        self.statements: List[Tuple[str, tuple]] = []
+        self.write_count: int = 0  # committed transactions
+
+        self._lock: Lock = Lock()
+        self._db_lock: Lock = Lock()
+        self._stop_event: Event = Event()
+        self._thread: Thread = None
+
+        self.connection: sqlite3.Connection = sqlite3.connect(
+            filename, check_same_thread=False
+        )
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.executescript(CREATE_TABLES)
+
+    def load_settings(self) -> Dict[str, dict]:
+        """
+        Load settings of all strategies.
+        """
+        rows = self._query("SELECT name, setting FROM strategy_setting")
+        return {name: json.loads(setting) for name, setting in rows}
+
+    def save_setting(self, strategy_name: str, setting: dict) -> None:
+        """"""
+        self._execute(REPLACE_SETTING, (strategy_name, json.dumps(setting)))
+
+    def remove_setting(self, strategy_name: str) -> None:
+        """"""
+        self._execute(DELETE_SETTING, (strategy_name,))
+
+    def load(self) -> Dict[str, dict]:
+        """
+        Load variables of strategies which still have a setting.
+        """
+        rows = self._query(
+            "SELECT d.name, d.data FROM strategy_data d "
+            "JOIN strategy_setting s ON d.name = s.name"
+        )
+        return {name: json.loads(data) for name, data in rows}
+
+    def start(self) -> None:
+        """
+        Start the background writer thread.
+        """
+        if self._thread:
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def update(self, strategy_name: str, data: Dict[str, Any]) -> None:
+        """
+        Update the variables of a strategy.
+        """
+        data = {
+            k: copy(v) if isinstance(v, (dict, list)) else v
+            for k, v in data.items()
+        }
+
+        with self._lock:
+            self.pending_data[strategy_name] = data
+
+    def remove(self, strategy_name: str) -> None:
+        """
+        Remove variables of a strategy.
+        """
+        with self._lock:
+            self.pending_data[strategy_name] = None
+
+    def save_trade(self, strategy_name: str, trade: TradeData) -> None:
+        """
+        Save a trade of strategy, duplicate trades are ignored.
+        """
+        dt = trade.datetime or datetime.now()
+        params = (
+            trade.vt_tradeid,
+            strategy_name,
+            trade.gateway_name,
+            trade.symbol,
+            trade.exchange.value,
+            trade.orderid,
+            trade.tradeid,
+            trade.direction.value if trade.direction else None,
+            trade.offset.value,
+            str(trade.price),
+            str(trade.volume),
+            dt.timestamp()
+        )
+        self._execute(INSERT_TRADE, params)
+
+    def load_trades(
+        self,
+        strategy_name: str,
+        start: datetime = None,
+        end: datetime = None
+    ) -> List[TradeData]:
+        """
+        Load trades of strategy within [start, end], ordered by time.
+        """
+        start_ts = start.timestamp() if start else 0
+        end_ts = end.timestamp() if end else sys.float_info.max
+
+        self.flush()
+        rows = self._query(
+            "SELECT gateway_name, symbol, exchange, orderid, tradeid, direction, "
+            "offset, price, volume, timestamp FROM trades "
+            "WHERE strategy_name = ? AND timestamp >= ? AND timestamp <= ? "
+            "ORDER BY timestamp",
+            (strategy_name, start_ts, end_ts)
+        )
+
+        trades = []
+        for row in rows:
+            trade = TradeData(
+                gateway_name=row[0],
+                symbol=row[1],
+                exchange=Exchange(row[2]),
+                orderid=row[3],
+                tradeid=row[4],
+                direction=Direction(row[5]) if row[5] else None,
+                offset=Offset(row[6]),
+                price=Decimal(row[7]),
+                volume=Decimal(row[8]),
+                datetime=datetime.fromtimestamp(row[9])
+            )
+            trades.append(trade)
+        return trades
+
+    def flush(self) -> None:
+        """
+        Write all queued changes in a single transaction.
+        """
+        with self._lock:
+            pending_data = self.pending_data
+            statements = self.statements
+            self.pending_data = {}
+            self.statements = []
+
+        if not pending_data and not statements:
+            return
+
+        try:
+            with self._db_lock:
+                with self.connection:
+                    for sql, params in statements:
+                        self.connection.execute(sql, params)
+
+                    for strategy_name, data in pending_data.items():
+                        if data is None:
+                            self.connection.execute(DELETE_DATA, (strategy_name,))
+                        else:
+                            self.connection.execute(
+                                REPLACE_DATA,
+                                (strategy_name, json.dumps(data, ensure_ascii=False))
+                            )
+
+                self.write_count += 1
+        except Exception:
+            # The transaction is rolled back, queue the batch again before the changes
+            # made since, so it is written by the next flush.
+            with self._lock:
+                self.statements = statements + self.statements
+                pending_data.update(self.pending_data)
+                self.pending_data = pending_data
+            raise
+
+    def close(self) -> None:
+        """
+        Stop the writer thread, flush the remaining changes and close database.
+        """
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+        try:
+            self.flush()
+        finally:
+            with self._db_lock:
+                self.connection.close()
+
+    def _run(self) -> None:
+        """"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                et, ev, tb = sys.exc_info()
+                sys.excepthook(et, ev, tb)
+
+    def _execute(self, sql: str, params: tuple) -> None:
+        """
+        Queue a write statement for the writer thread.
+        """
+        with self._lock:
+            self.statements.append((sql, params))
+
+    def _query(self, sql: str, params: tuple = ()) -> list:
+        """"""
+        with self._db_lock:
+            return self.connection.execute(sql, params).fetchall()
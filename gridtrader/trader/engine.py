@@ -18,13 +18,16 @@ from gridtrader.event import (
     EVENT_POSITION,
     EVENT_ACCOUNT,
     EVENT_CONTRACT,
+    EVENT_MODIFY_FAILED,
     EVENT_LOG,
     EVENT_CTA_LOG,
-    EVENT_CTA_STRATEGY
+    EVENT_CTA_STRATEGY,
+    EVENT_CTA_TRADES
 )
 from .gateway import BaseGateway
 from .object import (
     CancelRequest,
+    ModifyRequest,
     QueryRequest,
     LogData,
     OrderRequest,
@@ -34,19 +37,24 @@ from .object import (
     TradeData,
     PositionData,
     AccountData,
-    ContractData
+    ContractData,
+    TradeHistoryRequest
 )
 from .setting import SETTINGS
-from .utility import get_folder_path, TRADER_DIR
+from .utility import get_folder_path, get_file_path, TRADER_DIR
 from gridtrader.gateway.binance.binance_gateway import BinanceGateway
 from gridtrader.gateway.binances.binances_gateway import BinancesGateway
 from .strategies.template import CtaTemplate
+from .persistence import StrategyDataWriter
+from .registry import OrderRegistry
+from .database import SqliteStore
+from .normalizer import ContractNormalizer
 
 from collections import defaultdict
 from typing import Any, Callable
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
-from copy import copy
+from functools import partial
 
 from gridtrader.trader.constant import (
     Direction,
@@ -54,7 +62,7 @@ from gridtrader.trader.constant import (
     Offset
 )
 
-from gridtrader.trader.utility import load_json, save_json, extract_vt_symbol, round_to, floor_to
+from gridtrader.trader.utility import load_json, save_json, extract_vt_symbol, round_to, floor_to, TradeIdFilter
 
 
 class MainEngine:
@@ -75,12 +83,21 @@ class MainEngine:
 
         os.chdir(TRADER_DIR)  # Change working directory
 
+        # Orders of all gateways are tracked in one registry.
+        self.order_registry: OrderRegistry = OrderRegistry(
+            SETTINGS.get("order_registry.grace_period", 300),
+            SETTINGS.get("order_registry.tombstone_period", 86400)
+        )
+
         self.spot_gateway = BinanceGateway(self.event_engine)
         self.future_gateway = BinancesGateway(self.event_engine)
 
         self.gateways[self.spot_gateway.gateway_name] = self.spot_gateway
         self.gateways[self.future_gateway.gateway_name] = self.future_gateway
 
+        for gateway in self.gateways.values():
+            gateway.set_order_registry(self.order_registry)
+
         self.init_engines()  # Initialize function engines
 
     def init_engines(self) -> None:
@@ -173,6 +190,27 @@ class MainEngine:
         if gateway:
             gateway.cancel_order(req)
 
+    def replace_order(self, cancel_req: CancelRequest, order_req: OrderRequest, gateway_name: str) -> str:
+        """
+        Send cancel-replace request to a specific gateway.
+        """
+        gateway = self.get_gateway(gateway_name)
+        if gateway:
+            return gateway.replace_order(cancel_req, order_req)
+        else:
+            return ""
+
+    def modify_order(self, req: ModifyRequest, gateway_name: str) -> bool:
+        """
+        Send modify order request to a specific gateway.
+        Return False if the gateway does not support amending orders.
+        """
+        gateway = self.get_gateway(gateway_name)
+        if gateway:
+            return gateway.modify_order(req)
+        else:
+            return False
+
     def query_order(self, req: QueryRequest, gateway_name: str) -> None:
         """
         Send query order request to a specific gateway.
@@ -181,6 +219,19 @@ class MainEngine:
         if gateway and hasattr(gateway, 'query_order'):
             gateway.query_order(req)
 
+    def query_trades(
+            self,
+            req: TradeHistoryRequest,
+            gateway_name: str,
+            callback: Callable[[List[TradeData]], None]
+    ) -> None:
+        """
+        Send query trades request to a specific gateway, callback is called with the trades.
+        """
+        gateway = self.get_gateway(gateway_name)
+        if gateway:
+            gateway.query_trades(req, callback)
+
     def send_orders(self, reqs: Sequence[OrderRequest], gateway_name: str) -> List[str]:
         """
         """
@@ -335,8 +386,12 @@ class OmsEngine(BaseEngine):
         self.positions: Dict[str, PositionData] = {}
         self.accounts: Dict[str, AccountData] = {}
         self.contracts: Dict[str, ContractData] = {}
+        self.normalizers: Dict[str, ContractNormalizer] = {}  # built once for each contract
+
+        self.order_registry: OrderRegistry = main_engine.order_registry
 
-        self.active_orders: Dict[str, OrderData] = {}
+        # Counts of differences found by open orders reconciliation.
+        self.order_drift: Dict[str, int] = defaultdict(int)
 
         self.add_function()
         self.register_event()
@@ -351,16 +406,21 @@ class OmsEngine(BaseEngine):
         self.main_engine.get_position = self.get_position
         self.main_engine.get_account = self.get_account
         self.main_engine.get_contract = self.get_contract
+        self.main_engine.get_normalizer = self.get_normalizer
         self.main_engine.get_all_positions = self.get_all_positions
         self.main_engine.get_all_accounts = self.get_all_accounts
         self.main_engine.get_all_contracts = self.get_all_contracts
         self.main_engine.get_all_active_orders = self.get_all_active_orders
         self.main_engine.get_active_order = self.get_active_order
+        self.main_engine.get_order_counts = self.get_order_counts
+        self.main_engine.get_active_orders_by_reference = self.get_active_orders_by_reference
+        self.main_engine.get_active_orders_by_strategy = self.get_active_orders_by_strategy
+        self.main_engine.get_active_orders_by_price = self.get_active_orders_by_price
+        self.main_engine.get_order_drift = self.get_order_drift
 
     def register_event(self) -> None:
         """"""
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
-        self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_POSITION, self.process_position_event)
         self.event_engine.register(EVENT_ACCOUNT, self.process_account_event)
         self.event_engine.register(EVENT_CONTRACT, self.process_contract_event)
@@ -371,17 +431,6 @@ class OmsEngine(BaseEngine):
         tick = event.data
         self.ticks[tick.vt_symbol] = tick
 
-    def process_order_event(self, event: Event) -> None:
-        """"""
-        order = event.data
-
-        # If order is active, then update data in dict.
-        if order.is_active():
-            self.active_orders[order.vt_orderid] = order
-        # Otherwise, pop inactive order from in dict
-        elif order.vt_orderid in self.active_orders:
-            self.active_orders.pop(order.vt_orderid)
-
     def process_position_event(self, event: Event) -> None:
         """"""
         position = event.data
@@ -396,24 +445,23 @@ class OmsEngine(BaseEngine):
         """"""
         contract = event.data
         self.contracts[contract.vt_symbol] = contract
+        self.normalizers[contract.vt_symbol] = ContractNormalizer(contract)
 
     def process_timer(self, event: Event) -> None:
         """
         update the orders, positions by timer, for we may be disconnected from server update push.
         """
 
+        # Orders are updated into registry by gateways, only evicting finished orders here.
+        self.order_registry.evict()
+
         self.order_update_interval += 1
         self.position_update_interval += 1
         self.account_update_interval += 1
 
         if self.order_update_interval >= SETTINGS.get('order_update_interval', 120):
             self.order_update_interval = 0
-            orders = self.get_all_active_orders()
-            for order in orders:
-                if order.datetime and (datetime.now() - order.datetime).seconds > SETTINGS.get(
-                        'order_update_timer', 120):
-                    req = order.create_query_request()
-                    self.main_engine.query_order(req, order.gateway_name)
+            self.reconcile_orders()
 
         if self.position_update_interval >= SETTINGS.get('position_update_interval', 120):
             self.main_engine.query_position()
@@ -423,6 +471,59 @@ class OmsEngine(BaseEngine):
             self.account_update_interval = 0
             self.main_engine.query_account()
 
+    def reconcile_orders(self) -> None:
+        """
+        Query open orders of each gateway in one request and compare with local active orders.
+        Orders are queried one by one only if missing from open orders,
+        or if the gateway does not support querying open orders.
+        """
+        gateway_orderids: Dict[str, set] = defaultdict(set)
+        for order in self.order_registry.get_active_orders():
+            gateway_orderids[order.gateway_name].add(order.vt_orderid)
+
+        for gateway_name, vt_orderids in gateway_orderids.items():
+            gateway = self.main_engine.get_gateway(gateway_name)
+            if not gateway:
+                continue
+
+            callback = partial(self.process_open_orders, gateway, vt_orderids)
+            if gateway.query_open_orders(callback):
+                continue
+
+            for vt_orderid in vt_orderids:
+                order = self.order_registry.get_active_order(vt_orderid)
+                if order and order.datetime and (datetime.now() - order.datetime).seconds > SETTINGS.get(
+                        'order_update_timer', 120):
+                    req = order.create_query_request()
+                    self.main_engine.query_order(req, order.gateway_name)
+
+    def process_open_orders(
+        self,
+        gateway: BaseGateway,
+        vt_orderids: set,
+        orders: List[OrderData]
+    ) -> None:
+        """
+        Diff open orders from server with local active orders when querying.
+        """
+        counts = gateway.sync_open_orders(vt_orderids, orders)
+
+        self.order_drift["reconcile"] += 1
+        for key, count in counts.items():
+            self.order_drift[key] += count
+
+        if any(counts.values()):
+            self.main_engine.write_log(
+                f"Orders Reconciled: {gateway.gateway_name}, "
+                f"Unknown: {counts['unknown']}, Changed: {counts['changed']}, Missing: {counts['missing']}"
+            )
+
+    def get_order_drift(self) -> Dict[str, int]:
+        """
+        Get counts of differences found by open orders reconciliation.
+        """
+        return dict(self.order_drift)
+
     def get_tick(self, vt_symbol: str) -> Optional[TickData]:
         """
         Get latest market tick data by vt_symbol.
@@ -447,6 +548,12 @@ class OmsEngine(BaseEngine):
         """
         return self.contracts.get(vt_symbol, None)
 
+    def get_normalizer(self, vt_symbol: str) -> Optional[ContractNormalizer]:
+        """
+        Get price and volume normalizer of contract by vt_symbol.
+        """
+        return self.normalizers.get(vt_symbol, None)
+
     def get_all_positions(self) -> List[PositionData]:
         """
         Get all position data.
@@ -472,17 +579,36 @@ class OmsEngine(BaseEngine):
         If vt_symbol is empty, return all active orders.
         """
         if not vt_symbol:
-            return list(self.active_orders.values())
+            return self.order_registry.get_active_orders()
         else:
-            active_orders = [
-                order
-                for order in self.active_orders.values()
-                if order.vt_symbol == vt_symbol
-            ]
-            return active_orders
+            return self.order_registry.get_active_orders_by_symbol(vt_symbol)
 
     def get_active_order(self, vt_orderid) -> Optional[OrderData]:
-        return self.active_orders.get(vt_orderid, None)
+        return self.order_registry.get_active_order(vt_orderid)
+
+    def get_active_orders_by_reference(self, reference: str) -> List[OrderData]:
+        """
+        Get all active orders sent with reference.
+        """
+        return self.order_registry.get_active_orders_by_reference(reference)
+
+    def get_active_orders_by_strategy(self, strategy_name: str) -> List[OrderData]:
+        """
+        Get all active orders sent by a strategy.
+        """
+        return self.order_registry.get_active_orders_by_owner(strategy_name)
+
+    def get_active_orders_by_price(self, vt_symbol: str, price: float) -> List[OrderData]:
+        """
+        Get all active orders of vt_symbol at price.
+        """
+        return self.order_registry.get_active_orders_by_price(vt_symbol, price)
+
+    def get_order_counts(self) -> Dict[str, int]:
+        """
+        Get number of orders in registry by status.
+        """
+        return self.order_registry.get_counts()
 
 
 class CtaEngine(BaseEngine):
@@ -490,6 +616,7 @@ class CtaEngine(BaseEngine):
 
     setting_filename = "grid_strategy_setting.json"
     data_filename = "grid_strategy_data.json"
+    database_filename = "grid_strategy.db"
 
     def __init__(self, main_engine: MainEngine, event_engine: EventEngine):
         """"""
@@ -505,13 +632,35 @@ class CtaEngine(BaseEngine):
         self.symbol_strategy_map = defaultdict(
             list)  # vt_symbol: strategy list
 
-        self.orderid_strategy_map = {}  # vt_orderid: strategy
-
-        self.strategy_orderid_map = defaultdict(set)  # strategy_name: orderid list
+        # Strategy of each order is saved as the owner in order registry.
+        self.order_registry: OrderRegistry = main_engine.order_registry
 
         self.init_executor = ThreadPoolExecutor(max_workers=1)
 
-        self.vt_tradeids = set()  # for filtering duplicate trade
+        self.trade_filter = TradeIdFilter(  # for filtering duplicate trade
+            SETTINGS.get("trade_filter.size", 100000),
+            SETTINGS.get("trade_filter.ttl", 86400)
+        )
+
+        # Round order price and volume with cached Decimal tick and lot sizes of the
+        # contract if set, so the results are exact multiples of price tick and min volume.
+        self.exact_rounding: bool = SETTINGS.get("order.exact_rounding", False)
+
+        # Strategy data is stored in json files by default, or in sqlite database if set.
+        self.database: Optional[SqliteStore] = None
+
+        if SETTINGS.get("data.store", "json") == "sqlite":
+            self.database = SqliteStore(
+                str(get_file_path(self.database_filename)),
+                SETTINGS.get("data.sync_interval", 1)
+            )
+            self.data_writer = self.database
+        else:
+            self.data_writer = StrategyDataWriter(
+                self.data_filename,
+                SETTINGS.get("data.sync_interval", 1),
+                SETTINGS.get("data.compact_records", 1000)
+            )
 
     def init_engine(self):
         """
@@ -535,7 +684,17 @@ class CtaEngine(BaseEngine):
         """
         Load setting file.
         """
-        self.strategy_setting = load_json(self.setting_filename)
+        if self.database:
+            self.strategy_setting = self.database.load_settings()
+
+            # Import settings from json file when database is first used.
+            if not self.strategy_setting:
+                self.strategy_setting = load_json(self.setting_filename)
+                for strategy_name, strategy_config in self.strategy_setting.items():
+                    self.database.save_setting(strategy_name, strategy_config)
+                self.database.flush()
+        else:
+            self.strategy_setting = load_json(self.setting_filename)
 
         for strategy_name, strategy_config in self.strategy_setting.items():
             self.add_strategy(
@@ -547,19 +706,30 @@ class CtaEngine(BaseEngine):
 
     def load_strategy_data(self):
         """
-        Load strategy data from json file.
+        Load strategy data from json file or database.
         """
-        self.strategy_data = load_json(self.data_filename)
+        self.strategy_data = self.data_writer.load()
+
+        # Import data from json file when database is first used.
+        if self.database and not self.strategy_data:
+            self.strategy_data = StrategyDataWriter(self.data_filename).load()
+            for strategy_name, data in self.strategy_data.items():
+                self.database.update(strategy_name, data)
+
+        self.data_writer.start()
 
     def register_event(self):
         """"""
         self.event_engine.register(EVENT_TICK, self.process_tick_event)
         self.event_engine.register(EVENT_ORDER, self.process_order_event)
         self.event_engine.register(EVENT_TRADE, self.process_trade_event)
+        self.event_engine.register(EVENT_MODIFY_FAILED, self.process_modify_failed_event)
+        self.event_engine.register(EVENT_CTA_TRADES, self.process_trades_event)
 
     def close(self):
         """"""
         self.stop_all_strategies()
+        self.data_writer.close()
 
     def process_tick_event(self, event: Event):
         """"""
@@ -577,29 +747,39 @@ class CtaEngine(BaseEngine):
         """"""
         order = event.data
 
-        strategy = self.orderid_strategy_map.get(order.vt_orderid, None)
+        strategy = self.order_registry.get_owner(order.vt_orderid)
         if not strategy:
             return
 
-        # Remove vt_orderid if order is no longer active.
-        vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
-        if order.vt_orderid in vt_orderids and not order.is_active():
-            vt_orderids.remove(order.vt_orderid)
-
         # Call strategy on_order function
         self.call_strategy_func(strategy, strategy.on_order, order)
 
+    def process_modify_failed_event(self, event: Event):
+        """"""
+        vt_orderid = event.data
+
+        strategy = self.order_registry.get_owner(vt_orderid)
+        if not strategy:
+            return
+
+        self.call_strategy_func(strategy, strategy.on_modify_failed, vt_orderid)
+
+    def process_trades_event(self, event: Event):
+        """
+        Call back strategy with the queried trades on event thread.
+        """
+        strategy, callback, trades = event.data
+        self.call_strategy_func(strategy, partial(callback, trades))
+
     def process_trade_event(self, event: Event):
         """"""
         trade = event.data
 
         # Filter duplicate trade push
-        if trade.vt_tradeid in self.vt_tradeids:
+        if self.trade_filter.is_duplicate(trade.vt_tradeid):
             return
 
-        self.vt_tradeids.add(trade.vt_tradeid)
-
-        strategy = self.orderid_strategy_map.get(trade.vt_orderid, None)
+        strategy = self.order_registry.get_owner(trade.vt_orderid)
         if not strategy:
             return
 
@@ -611,12 +791,41 @@ class CtaEngine(BaseEngine):
 
         self.call_strategy_func(strategy, strategy.on_trade, trade)
 
+        # Save trade into database
+        if self.database:
+            self.database.save_trade(strategy.strategy_name, trade)
+
         # Sync strategy variables to data file
         self.sync_strategy_data(strategy)
 
         # Update GUI
         self.put_strategy_event(strategy)
 
+    def get_normalizer(self, contract: ContractData) -> ContractNormalizer:
+        """"""
+        normalizer = self.main_engine.get_normalizer(contract.vt_symbol)
+        if not normalizer:
+            normalizer = ContractNormalizer(contract)
+        return normalizer
+
+    def round_price(self, contract: ContractData, price: float) -> Decimal:
+        """
+        Round order price to price tick of contract.
+        The result is an exact multiple of price tick if exact rounding is set.
+        """
+        if self.exact_rounding:
+            return self.get_normalizer(contract).round_price(price)
+        return round_to(price, contract.price_tick)
+
+    def floor_volume(self, contract: ContractData, volume: float) -> Decimal:
+        """
+        Floor order volume to min volume of contract.
+        The result is an exact multiple of min volume if exact rounding is set.
+        """
+        if self.exact_rounding:
+            return self.get_normalizer(contract).floor_volume(volume)
+        return floor_to(volume, contract.min_volume)
+
     def send_order(
             self,
             strategy: CtaTemplate,
@@ -633,8 +842,8 @@ class CtaEngine(BaseEngine):
             return ""
 
         # Round order price and volume to nearest incremental value
-        price = round_to(price, contract.price_tick)
-        volume = floor_to(volume, contract.min_volume)
+        price = self.round_price(contract, price)
+        volume = self.floor_volume(contract, volume)
 
         return self.send_limit_order(strategy, contract, direction, offset, price, volume)
 
@@ -660,6 +869,61 @@ class CtaEngine(BaseEngine):
             OrderType.LIMIT
         )
 
+    def send_stop_order(
+            self,
+            strategy: CtaTemplate,
+            direction: Direction,
+            price: float,
+            volume: float
+    ):
+        """
+        Send a reduce only stop market order, triggered on server side at price.
+        """
+        contract = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(f"Symbol Not Found: {strategy.vt_symbol}", strategy)
+            return []
+
+        price = self.round_price(contract, price)
+        volume = self.floor_volume(contract, volume)
+
+        return self.send_server_order(
+            strategy,
+            contract,
+            direction,
+            Offset.CLOSE,
+            price,
+            volume,
+            OrderType.STOP_MARKET
+        )
+
+    def send_market_order(
+            self,
+            strategy: CtaTemplate,
+            direction: Direction,
+            offset: Offset,
+            volume: float
+    ):
+        """
+        Send a market order to server.
+        """
+        contract = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(f"Symbol Not Found: {strategy.vt_symbol}", strategy)
+            return []
+
+        volume = self.floor_volume(contract, volume)
+
+        return self.send_server_order(
+            strategy,
+            contract,
+            direction,
+            offset,
+            Decimal("0"),
+            volume,
+            OrderType.MARKET
+        )
+
     def send_server_order(
             self,
             strategy: CtaTemplate,
@@ -697,8 +961,7 @@ class CtaEngine(BaseEngine):
             return []
 
         # Save relationship between orderid and strategy.
-        self.orderid_strategy_map[vt_orderid] = strategy
-        self.strategy_orderid_map[strategy.strategy_name].add(vt_orderid)
+        self.order_registry.set_owner(vt_orderid, strategy, strategy.strategy_name)
 
         return [vt_orderid]
 
@@ -720,17 +983,122 @@ class CtaEngine(BaseEngine):
         req = order.create_cancel_request()
         self.main_engine.cancel_order(req, order.gateway_name)
 
+    def replace_order(self, strategy: CtaTemplate, vt_orderid: str, price: float, volume: float):
+        """
+        Cancel an existing order and send a new limit order with the same direction
+        and offset in one request.
+        """
+        order = self.main_engine.get_active_order(vt_orderid)
+        if not order:
+            self.write_log(f"Replace Order Failed，Order Id Not Found: {vt_orderid}", strategy)
+            return []
+
+        contract = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(f"Symbol Not Found: {strategy.vt_symbol}", strategy)
+            return []
+
+        price = self.round_price(contract, price)
+        volume = self.floor_volume(contract, volume)
+
+        order_req = OrderRequest(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            direction=order.direction,
+            offset=order.offset,
+            type=OrderType.LIMIT,
+            price=price,
+            volume=volume,
+            reference=f"{strategy.strategy_name}"
+        )
+        cancel_req = order.create_cancel_request()
+
+        new_vt_orderid = self.main_engine.replace_order(cancel_req, order_req, order.gateway_name)
+        if not new_vt_orderid:
+            return []
+
+        self.order_registry.set_owner(new_vt_orderid, strategy, strategy.strategy_name)
+
+        return [new_vt_orderid]
+
+    def modify_order(self, strategy: CtaTemplate, vt_orderid: str, price: float, volume: float) -> bool:
+        """
+        Amend price and volume of an existing order instead of cancel and replace.
+        Return False if the order is not found or the gateway does not support it.
+        """
+        order = self.main_engine.get_active_order(vt_orderid)
+        if not order:
+            self.write_log(f"Modify Order Failed，Order Id Not Found: {vt_orderid}", strategy)
+            return False
+
+        contract = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(f"Symbol Not Found: {strategy.vt_symbol}", strategy)
+            return False
+
+        price = self.round_price(contract, price)
+        volume = self.floor_volume(contract, volume)
+
+        req = order.create_modify_request(price, volume)
+        return self.main_engine.modify_order(req, order.gateway_name)
+
     def cancel_all(self, strategy: CtaTemplate):
         """
         Cancel all active orders of a strategy.
         """
-        vt_orderids = self.strategy_orderid_map[strategy.strategy_name]
+        vt_orderids = self.order_registry.get_owner_orderids(strategy.strategy_name)
         if not vt_orderids:
             return
 
-        for vt_orderid in copy(vt_orderids):
+        for vt_orderid in vt_orderids:
             self.cancel_order(strategy, vt_orderid)
 
+    def query_trades(
+            self,
+            strategy: CtaTemplate,
+            limit: int,
+            callback: Callable[[List[TradeData]], None]
+    ):
+        """
+        Query recent trades of strategy symbol without blocking the caller.
+        The callback is called on event thread like other strategy callbacks.
+        """
+        contract = self.main_engine.get_contract(strategy.vt_symbol)
+        if not contract:
+            self.write_log(f"Symbol Not Found: {strategy.vt_symbol}", strategy)
+            return
+
+        req = TradeHistoryRequest(
+            symbol=contract.symbol,
+            exchange=contract.exchange,
+            limit=limit
+        )
+        self.main_engine.query_trades(req, contract.gateway_name, partial(self.put_trades_event, strategy, callback))
+
+    def put_trades_event(
+            self,
+            strategy: CtaTemplate,
+            callback: Callable[[List[TradeData]], None],
+            trades: List[TradeData]
+    ):
+        """
+        Pass trades queried on gateway thread to event thread.
+        """
+        event = Event(EVENT_CTA_TRADES, (strategy, callback, trades))
+        self.event_engine.put(event)
+
+    def get_net_position(self, strategy: CtaTemplate) -> float:
+        """
+        Return the net position volume of strategy symbol cached in OMS.
+        """
+        vt_positionid = f"{strategy.vt_symbol}.{Direction.NET.value}"
+        position: PositionData = self.main_engine.get_position(vt_positionid)
+
+        if position:
+            return float(position.volume)
+        else:
+            return 0.0
+
     def get_price_tick(self, strategy: CtaTemplate):
         """
         Return contract price tick data.
@@ -811,16 +1179,13 @@ class CtaEngine(BaseEngine):
         # Restore strategy data(variables)
         data = self.strategy_data.get(strategy_name, None)
         if data:
-            for name in strategy.variables:
-                value = data.get(name, None)
-                if value:
-                    setattr(strategy, name, value)
+            self.call_strategy_func(strategy, strategy.load_variables, data)
 
         # Subscribe market data
         contract = self.main_engine.get_contract(strategy.vt_symbol)
         if contract:
             req = SubscribeRequest(
-                symbol=contract.symbol, exchange=contract.exchange)
+                symbol=contract.symbol, exchange=contract.exchange, depth=strategy.depth)
             self.main_engine.subscribe(req, contract.gateway_name)
         else:
             self.write_log(f"Subscribe Market Data Failed，Symbol Not Found {strategy.vt_symbol}", strategy)
@@ -897,14 +1262,8 @@ class CtaEngine(BaseEngine):
         strategies = self.symbol_strategy_map[strategy.vt_symbol]
         strategies.remove(strategy)
 
-        # Remove from active orderid map
-        if strategy_name in self.strategy_orderid_map:
-            vt_orderids = self.strategy_orderid_map.pop(strategy_name)
-
-            # Remove vt_orderid strategy map
-            for vt_orderid in vt_orderids:
-                if vt_orderid in self.orderid_strategy_map:
-                    self.orderid_strategy_map.pop(vt_orderid)
+        # Remove strategy from owners of its orders
+        self.order_registry.remove_owner(strategy_name)
 
         # Remove from strategies
         self.strategies.pop(strategy_name)
@@ -914,13 +1273,29 @@ class CtaEngine(BaseEngine):
     def sync_strategy_data(self, strategy: CtaTemplate):
         """
         Sync strategy data into json file.
+        The file is written by the data writer thread, see StrategyDataWriter.
         """
         data = strategy.get_variables()
         data.pop("inited")  # Strategy status (inited, trading) should not be synced.
         data.pop("trading")
 
         self.strategy_data[strategy.strategy_name] = data
-        save_json(self.data_filename, self.strategy_data)
+        self.data_writer.update(strategy.strategy_name, data)
+
+    def get_strategy_trades(
+        self,
+        strategy_name: str,
+        start: datetime = None,
+        end: datetime = None
+    ) -> List[TradeData]:
+        """
+        Get trades of a strategy within time range, only supported by sqlite store.
+        """
+        if not self.database:
+            self.write_log("Query Strategy Trades Requires data.store: sqlite")
+            return []
+
+        return self.database.load_trades(strategy_name, start, end)
 
     def get_all_strategy_class_names(self):
         """
@@ -976,7 +1351,11 @@ class CtaEngine(BaseEngine):
             "vt_symbol": strategy.vt_symbol,
             "setting": setting,
         }
-        save_json(self.setting_filename, self.strategy_setting)
+
+        if self.database:
+            self.database.save_setting(strategy_name, self.strategy_setting[strategy_name])
+        else:
+            save_json(self.setting_filename, self.strategy_setting)
 
     def remove_strategy_setting(self, strategy_name: str):
         """
@@ -986,7 +1365,11 @@ class CtaEngine(BaseEngine):
             return
 
         self.strategy_setting.pop(strategy_name)
-        save_json(self.setting_filename, self.strategy_setting)
+
+        if self.database:
+            self.database.remove_setting(strategy_name)
+        else:
+            save_json(self.setting_filename, self.strategy_setting)
 
     def put_strategy_event(self, strategy: CtaTemplate):
         """
@@ -3,8 +3,9 @@
 """
 
 from abc import ABC, abstractmethod
-from typing import Any, Sequence, Dict, List
-import uuid
+from functools import partial
+from decimal import Decimal
+from typing import Any, Callable, Sequence, Dict, List, Set
 
 from gridtrader.event import Event, EventEngine
 from gridtrader.event import (
@@ -14,6 +15,7 @@ from gridtrader.event import (
     EVENT_POSITION,
     EVENT_ACCOUNT,
     EVENT_CONTRACT,
+    EVENT_MODIFY_FAILED,
     EVENT_LOG,
 )
 from .object import (
@@ -26,10 +28,13 @@ from .object import (
     LogData,
     OrderRequest,
     CancelRequest,
+    ModifyRequest,
     QueryRequest,
     SubscribeRequest,
+    TradeHistoryRequest,
     Exchange
 )
+from .registry import OrderRegistry
 
 
 class BaseGateway(ABC):
@@ -81,7 +86,20 @@ class BaseGateway(ABC):
         """"""
         self.event_engine: EventEngine = event_engine
         self.gateway_name: str = gateway_name
-        self.active_orders: Dict[str, OrderData] = {}  # {order_id: OrderData} for updating the trade event
+        self.order_registry: OrderRegistry = OrderRegistry()  # replaced by the registry shared in main engine
+
+    @property
+    def active_orders(self) -> Dict[str, OrderData]:
+        """
+        Active orders in order registry, {vt_orderid: OrderData}.
+        """
+        return self.order_registry.active_orders
+
+    def set_order_registry(self, order_registry: OrderRegistry) -> None:
+        """
+        Use order registry shared with other gateways and engines.
+        """
+        self.order_registry = order_registry
 
     def on_event(self, type: str, data: Any = None) -> None:
         """
@@ -106,39 +124,51 @@ class BaseGateway(ABC):
         self.on_event(EVENT_TRADE, trade)
         self.on_event(EVENT_TRADE + trade.vt_symbol, trade)
 
-    def on_order(self, order: OrderData) -> None:
+    def on_order(self, order: OrderData, local: bool = False) -> None:
         """
         Order event push.
         Order event of a specific vt_orderid is also pushed.
+        Stale or duplicate updates of an order are dropped.
+        Set local if the status is not confirmed by the exchange, so later
+        updates from the exchange still apply.
         """
+        accepted, pre_sequence = self.order_registry.update_order(order, local)
+        if not accepted:
+            return
+
         self.on_event(EVENT_ORDER, order)
         self.on_event(EVENT_ORDER + order.vt_orderid, order)
 
-        # for updating the trade event
-        pre_order = self.active_orders.get(order.vt_orderid, None)
-
-        if order.is_active():
-            self.active_orders[order.vt_orderid] = order
-        elif order.vt_orderid in self.active_orders:
-            self.active_orders.pop(order.vt_orderid)
+        # for updating the trade event, only when traded volume grew so the
+        # same fill pushed again with a newer status is not counted twice.
+        pre_traded = pre_sequence.traded if pre_sequence else Decimal("0")
+        trade_volume = order.traded - pre_traded
+        if trade_volume <= 0:
+            return
 
         if order.trade_data:
             self.on_trade(order.trade_data)
-        elif pre_order:
-            trade_volume = order.traded - pre_order.traded
-            if trade_volume > 0:
-                trade = TradeData(
-                    symbol=order.symbol,
-                    exchange=order.exchange,
-                    orderid=order.orderid,
-                    tradeid=str(uuid.uuid1()),
-                    direction=order.direction,
-                    price=order.price,
-                    volume=trade_volume,
-                    datetime=order.datetime,
-                    gateway_name=self.gateway_name,
-                )
-                self.on_trade(trade)
+        elif pre_sequence:
+            # Trade id is generated from traded volume, so the same fill
+            # pushed again is filtered as duplicate.
+            trade = TradeData(
+                symbol=order.symbol,
+                exchange=order.exchange,
+                orderid=order.orderid,
+                tradeid=f"{order.orderid}-{order.traded}",
+                direction=order.direction,
+                price=order.price,
+                volume=trade_volume,
+                datetime=order.datetime,
+                gateway_name=self.gateway_name,
+            )
+            self.on_trade(trade)
+
+    def on_modify_failed(self, req: ModifyRequest) -> None:
+        """
+        Modify failed event push, data is vt_orderid of the order not amended.
+        """
+        self.on_event(EVENT_MODIFY_FAILED, f"{self.gateway_name}.{req.orderid}")
 
     def on_position(self, position: PositionData) -> None:
         """
@@ -238,6 +268,26 @@ class BaseGateway(ABC):
         """
         pass
 
+    def replace_order(self, cancel_req: CancelRequest, order_req: OrderRequest) -> str:
+        """
+        Cancel an existing order and send a new one in its place.
+        Use cancel_order and send_order by default.
+        Reimplement this function if cancel-replace supported on server.
+
+        :return str vt_orderid for the new OrderData
+        """
+        self.cancel_order(cancel_req)
+        return self.send_order(order_req)
+
+    def modify_order(self, req: ModifyRequest) -> bool:
+        """
+        Amend price and volume of an existing order.
+        Return False by default, which means modify is not supported and
+        the caller should cancel and send a new order instead.
+        Reimplement this function if amending order supported on server.
+        """
+        return False
+
     @abstractmethod
     def query_order(self, req: QueryRequest) -> None:
         """
@@ -247,6 +297,93 @@ class BaseGateway(ABC):
         """
         pass
 
+    def query_trades(
+            self,
+            req: TradeHistoryRequest,
+            callback: Callable[[List[TradeData]], None]
+    ) -> None:
+        """
+        Query recent trades of a symbol.
+        The callback is called with a list of TradeData from the gateway thread
+        once the response arrives, so this function never blocks.
+        Reimplement this function if trade history query supported on server.
+        """
+        self.write_log(f"Query Trades Not Supported: {self.gateway_name}")
+
+    def query_open_orders(self, callback: Callable[[List[OrderData]], None]) -> bool:
+        """
+        Query all open orders of account in a single request.
+        The callback is called with a list of OrderData from the gateway thread,
+        orders are not pushed by on_order.
+        Return False if not supported, then orders are queried one by one.
+        """
+        return False
+
+    def sync_open_orders(self, vt_orderids: Set[str], orders: List[OrderData]) -> Dict[str, int]:
+        """
+        Merge open orders queried from server into local orders.
+        Orders in vt_orderids, which were active when querying, but not open on server
+        any more are queried one by one.
+        Return counts of unknown, changed and missing orders.
+        """
+        counts = {"unknown": 0, "changed": 0, "missing": 0}
+        open_vt_orderids = set()
+
+        for order in orders:
+            open_vt_orderids.add(order.vt_orderid)
+            local_order = self.order_registry.get_order(order.vt_orderid)
+
+            if not local_order:
+                key = "unknown"
+            elif order.status != local_order.status or order.traded != local_order.traded:
+                key = "changed"
+            else:
+                continue
+
+            # Stale data is dropped by order sequencing.
+            self.on_order(order)
+            if self.order_registry.get_order(order.vt_orderid) is order:
+                counts[key] += 1
+
+        # Orders sent after querying are not in vt_orderids, and orders finished meanwhile are skipped.
+        for vt_orderid in vt_orderids - open_vt_orderids:
+            local_order = self.order_registry.get_active_order(vt_orderid)
+            if not local_order:
+                continue
+
+            counts["missing"] += 1
+            self.query_order(local_order.create_query_request())
+
+        return counts
+
+    def resync_orders(self) -> None:
+        """
+        Sync active orders with server after updates may be lost, e.g. websocket reconnected.
+        Fills missed are pushed from the increased traded volume of orders, so each of them
+        is seen once no matter it is also pushed by websocket or not.
+        """
+        vt_orderids = {
+            order.vt_orderid for order in self.order_registry.get_active_orders()
+            if order.gateway_name == self.gateway_name
+        }
+
+        callback = partial(self.on_resync_orders, vt_orderids)
+        if self.query_open_orders(callback):
+            return
+
+        for vt_orderid in vt_orderids:
+            order = self.order_registry.get_active_order(vt_orderid)
+            if order:
+                self.query_order(order.create_query_request())
+
+    def on_resync_orders(self, vt_orderids: Set[str], orders: List[OrderData]) -> None:
+        """"""
+        counts = self.sync_open_orders(vt_orderids, orders)
+        self.write_log(
+            f"Orders Resynced, Unknown: {counts['unknown']}, "
+            f"Changed: {counts['changed']}, Missing: {counts['missing']}"
+        )
+
     def send_orders(self, reqs: Sequence[OrderRequest]) -> List[str]:
         """
         Send a batch of orders to server.
@@ -0,0 +1,59 @@
+"""
+Order price and volume normalization of contracts.
+"""
+
+from decimal import Decimal
+from typing import List, Sequence, Tuple
+
+from .object import ContractData
+from .utility import PriceScale
+
+
+class ContractNormalizer(PriceScale):
+    """
+    Precision of a contract computed once when contract data is received,
+    used for rounding order prices and volumes and calculating grid ladders.
+    """
+
+    def __init__(self, contract: ContractData):
+        """"""
+        super().__init__(contract.price_tick, contract.min_volume)
+
+        self.vt_symbol: str = contract.vt_symbol
+        self.min_notional: Decimal = Decimal(str(contract.min_notional))
+        self.notional_value: float = float(self.min_notional)
+
+    def floor_price(self, price: float) -> float:
+        """
+        Floor price to price tick.
+        """
+        return float(self.price_tick * int(price / self.tick_value + 1e-9))
+
+    def check_notional(self, price: float, volume: float) -> bool:
+        """
+        Check if order value reaches min notional of contract.
+        """
+        return price * volume >= self.notional_value
+
+    def normalize(self, price: float, volume: float) -> Tuple[Decimal, Decimal]:
+        """
+        Round price to price tick and floor volume to min volume for order request.
+        """
+        return self.round_price(price), self.floor_volume(volume)
+
+    def normalize_many(self, prices: Sequence[float], volumes: Sequence[float]) -> List[Tuple[float, float]]:
+        """
+        Floor prices and volumes of a whole ladder, return list of (price, volume).
+        """
+        price_tick = self.price_tick
+        min_volume = self.min_volume
+        tick_value = self.tick_value
+        lot_value = self.lot_value
+
+        return [
+            (
+                float(price_tick * int(price / tick_value + 1e-9)),
+                float(min_volume * int(volume / lot_value + 1e-9))
+            )
+            for price, volume in zip(prices, volumes)
+        ]
@@ -6,11 +6,55 @@ from dataclasses import dataclass
 from datetime import datetime
 from logging import INFO
 from decimal import Decimal
+from sys import intern
+from typing import Callable, Tuple
 from .constant import Direction, Exchange, Offset, Status, Product, OrderType
 
 ACTIVE_STATUSES = set([Status.SUBMITTING, Status.NOTTRADED, Status.PARTTRADED])
 
 
+def slotted(*extra: str) -> Callable[[type], type]:
+    """
+    Recreate a dataclass with __slots__ of its own fields and the extra attributes
+    set in __post_init__. Works on python before 3.10, which has no dataclass(slots=True).
+
+    A cheap __copy__ is added, which copies slot values without pickle protocol.
+    """
+
+    def wrap(cls: type) -> type:
+        """"""
+        names: Tuple[str, ...] = tuple(cls.__dict__.get("__annotations__", {})) + extra
+
+        cls_dict = dict(cls.__dict__)
+        for name in names:
+            cls_dict.pop(name, None)  # defaults are saved in __init__ by dataclass
+        cls_dict.pop("__dict__", None)
+        cls_dict.pop("__weakref__", None)
+        cls_dict["__slots__"] = names
+
+        new_cls = type(cls)(cls.__name__, cls.__bases__, cls_dict)
+        new_cls.__qualname__ = cls.__qualname__
+
+        all_names = [
+            name for klass in reversed(new_cls.__mro__)
+            for name in klass.__dict__.get("__slots__", ())
+        ]
+
+        # Generated like dataclass __init__, much faster than a loop of setattr.
+        lines = ["def __copy__(self):", "    new = _new(type(self))"]
+        lines += [f"    new.{name} = self.{name}" for name in all_names]
+        lines.append("    return new")
+
+        namespace = {}
+        exec("\n".join(lines), {"_new": object.__new__}, namespace)
+        new_cls.__copy__ = namespace["__copy__"]
+
+        return new_cls
+
+    return wrap
+
+
+@slotted()
 @dataclass
 class BaseData:
     """
@@ -21,6 +65,7 @@ class BaseData:
     gateway_name: str
 
 
+@slotted("vt_symbol")
 @dataclass
 class TickData(BaseData):
     """
@@ -62,8 +107,102 @@ class TickData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = intern(f"{self.symbol}.{self.exchange.value}")
+
+class _DepthField:
+    """
+    Depth field of LazyTickData, decoded from raw level on first access.
+    The value is saved in instance dict, which is used directly afterwards.
+    """
+
+    def __init__(self, side: str, level: int, index: int):
+        """"""
+        self.side: str = side  # "_bids" or "_asks"
+        self.level: int = level
+        self.index: int = index  # 0 for price and 1 for volume
+        self.name: str = ""
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        """"""
+        self.name = name
+
+    def __get__(self, obj: "LazyTickData", owner: type = None) -> Decimal:
+        """"""
+        if obj is None:
+            return Decimal("0")
+
+        levels = obj.__dict__[self.side]
+        if self.level < len(levels):
+            value = Decimal(levels[self.level][self.index])
+        else:
+            value = Decimal("0")
+
+        obj.__dict__[self.name] = value
+        return value
+
+
+class LazyTickData(TickData):
+    """
+    Tick data which keeps raw depth levels [[price, volume], ...] of websocket data.
+    Decimal price and volume fields are only created when accessed, most strategies
+    only read bid_price_1 or ask_price_1.
+    """
+
+    bid_price_1 = _DepthField("_bids", 0, 0)
+    bid_price_2 = _DepthField("_bids", 1, 0)
+    bid_price_3 = _DepthField("_bids", 2, 0)
+    bid_price_4 = _DepthField("_bids", 3, 0)
+    bid_price_5 = _DepthField("_bids", 4, 0)
+
+    ask_price_1 = _DepthField("_asks", 0, 0)
+    ask_price_2 = _DepthField("_asks", 1, 0)
+    ask_price_3 = _DepthField("_asks", 2, 0)
+    ask_price_4 = _DepthField("_asks", 3, 0)
+    ask_price_5 = _DepthField("_asks", 4, 0)
+
+    bid_volume_1 = _DepthField("_bids", 0, 1)
+    bid_volume_2 = _DepthField("_bids", 1, 1)
+    bid_volume_3 = _DepthField("_bids", 2, 1)
+    bid_volume_4 = _DepthField("_bids", 3, 1)
+    bid_volume_5 = _DepthField("_bids", 4, 1)
+
+    ask_volume_1 = _DepthField("_asks", 0, 1)
+    ask_volume_2 = _DepthField("_asks", 1, 1)
+    ask_volume_3 = _DepthField("_asks", 2, 1)
+    ask_volume_4 = _DepthField("_asks", 3, 1)
+    ask_volume_5 = _DepthField("_asks", 4, 1)
+
+    def __init__(self, tick: TickData, bids: list, asks: list):
+        """
+        Create from tick with symbol info, and raw bid and ask levels.
+        """
+        self.gateway_name = tick.gateway_name
+        self.symbol = tick.symbol
+        self.exchange = tick.exchange
+        self.datetime = tick.datetime
+        self.name = tick.name
+        self.vt_symbol = tick.vt_symbol
+
+        self._bids = bids
+        self._asks = asks
+
+    def __copy__(self) -> "LazyTickData":
+        """
+        Copy without decoding depth fields, the raw levels are shared.
+        """
+        new = LazyTickData.__new__(LazyTickData)
+        new.gateway_name = self.gateway_name
+        new.symbol = self.symbol
+        new.exchange = self.exchange
+        new.datetime = self.datetime
+        new.name = self.name
+        new.vt_symbol = self.vt_symbol
+
+        new.__dict__.update(self.__dict__)
+        return new
 
+
+@slotted("vt_symbol", "vt_orderid")
 @dataclass
 class OrderData(BaseData):
     """
@@ -83,12 +222,13 @@ class OrderData(BaseData):
     traded: Decimal = Decimal("0")
     status: Status = Status.SUBMITTING
     datetime: datetime = None
+    update_time: datetime = None  # time of last update on server, for dropping stale updates
     reference: str = ""
     trade_data: "TradeData" = None
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = intern(f"{self.symbol}.{self.exchange.value}")
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
 
     def is_active(self) -> bool:
@@ -109,6 +249,20 @@ class OrderData(BaseData):
         )
         return req
 
+    def create_modify_request(self, price: Decimal, volume: Decimal) -> "ModifyRequest":
+        """
+        Create modify request object from order.
+        """
+        req = ModifyRequest(
+            orderid=self.orderid,
+            symbol=self.symbol,
+            exchange=self.exchange,
+            direction=self.direction,
+            price=price,
+            volume=volume
+        )
+        return req
+
     def create_query_request(self) -> "QueryRequest":
         """
         Create a query request object from order
@@ -119,6 +273,7 @@ class OrderData(BaseData):
         return req
 
 
+@slotted("vt_symbol", "vt_orderid", "vt_tradeid")
 @dataclass
 class TradeData(BaseData):
     """
@@ -139,7 +294,7 @@ class TradeData(BaseData):
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+        self.vt_symbol = intern(f"{self.symbol}.{self.exchange.value}")
         self.vt_orderid = f"{self.gateway_name}.{self.orderid}"
         self.vt_tradeid = f"{self.gateway_name}.{self.tradeid}"
 
@@ -209,6 +364,7 @@ class ContractData(BaseData):
     product: Product
     price_tick: Decimal
     min_volume: Decimal = Decimal("1")  # minimum trading volume of the contract
+    min_notional: Decimal = Decimal("0")  # minimum order value of the contract
 
     def __post_init__(self):
         """"""
@@ -223,6 +379,7 @@ class SubscribeRequest:
 
     symbol: str
     exchange: Exchange
+    depth: int = 5  # depth levels needed, only best bid and ask are pushed if 1
 
     def __post_init__(self):
         """"""
@@ -281,6 +438,24 @@ class CancelRequest:
         """"""
         self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
 
+@dataclass
+class ModifyRequest:
+    """
+    Request sending to specific gateway for amending price and volume of an existing order.
+    """
+
+    orderid: str
+    symbol: str
+    exchange: Exchange
+    direction: Direction
+    price: Decimal
+    volume: Decimal
+
+    def __post_init__(self):
+        """"""
+        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+
+
 @dataclass
 class QueryRequest:
     """
@@ -293,4 +468,18 @@ class QueryRequest:
 
     def __post_init__(self):
         """"""
-        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
\ No newline at end of file
+        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
+
+
+@dataclass
+class TradeHistoryRequest:
+    """
+    Request sending to specific gateway for querying recent trades of a symbol.
+    """
+    symbol: str
+    exchange: Exchange
+    limit: int = 10
+
+    def __post_init__(self):
+        """"""
+        self.vt_symbol = f"{self.symbol}.{self.exchange.value}"
@@ -0,0 +1,184 @@
+"""
+Local order book maintained from depth snapshot and diff depth stream.
+"""
+
+from bisect import bisect_left, insort
+from threading import Lock
+from typing import Dict, List, Tuple
+
+
+class PriceLadder:
+    """
+    Price levels of one side of order book.
+
+    Prices are kept in a sorted list and searched with bisect, so the best
+    levels are always at the front. Searching is O(log n), but inserting or
+    removing a level shifts the list and is O(n) in the number of levels.
+    The shift is a memmove, cheap for the few thousand levels of a snapshot.
+    Levels are not capped to the read depth, since a level beyond it becomes
+    the best one once the better levels are removed.
+    Raw price and volume strings are saved, and only converted when read,
+    see LazyTickData.
+    """
+
+    def __init__(self, descending: bool):
+        """"""
+        self.sign: int = -1 if descending else 1
+
+        self.keys: List[float] = []  # sorted, best price first
+        self.levels: Dict[float, Tuple[str, str]] = {}  # key: (price, volume)
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.keys)
+
+    def clear(self) -> None:
+        """"""
+        self.keys.clear()
+        self.levels.clear()
+
+    def update(self, price: str, volume: str) -> None:
+        """
+        Set volume of price level, and remove the level if volume is zero.
+        Updating an existing level is O(1), adding or removing one is O(n).
+        """
+        key = float(price) * self.sign
+
+        if not float(volume):
+            if self.levels.pop(key, None) is not None:
+                del self.keys[bisect_left(self.keys, key)]
+            return
+
+        if key not in self.levels:
+            insort(self.keys, key)
+        self.levels[key] = (price, volume)
+
+    def get_levels(self, n: int) -> List[Tuple[str, str]]:
+        """
+        Get the best n levels of [price, volume].
+        """
+        levels = self.levels
+        return [levels[key] for key in self.keys[:n]]
+
+
+class OrderBook:
+    """
+    Order book synced by Binance futures diff depth rules:
+        1. Buffer diff events until the snapshot arrives.
+        2. Drop buffered events with u < lastUpdateId of snapshot.
+        3. The first event applied should have U <= lastUpdateId <= u.
+        4. Each event after should have pu equal to u of the previous one,
+           otherwise the book is reset and should be synced from snapshot again.
+    """
+
+    def __init__(self, symbol: str):
+        """"""
+        self.symbol: str = symbol
+
+        self.bids: PriceLadder = PriceLadder(descending=True)
+        self.asks: PriceLadder = PriceLadder(descending=False)
+
+        self.last_update_id: int = 0
+        self.synced: bool = False
+        self.chained: bool = False  # whether an event is applied after snapshot
+        self.buffer: List[dict] = []
+
+        self.gap_count: int = 0
+
+        self.lock: Lock = Lock()
+
+    def reset(self) -> None:
+        """
+        Clear the book, diff events are buffered until next snapshot.
+        """
+        with self.lock:
+            self._reset()
+
+    def apply_snapshot(self, data: dict) -> bool:
+        """
+        Apply depth snapshot and the buffered diff events.
+        Return False if the buffered events can not be chained to snapshot.
+        """
+        with self.lock:
+            self.bids.clear()
+            self.asks.clear()
+
+            for price, volume in data["bids"]:
+                self.bids.update(price, volume)
+            for price, volume in data["asks"]:
+                self.asks.update(price, volume)
+
+            self.last_update_id = data["lastUpdateId"]
+
+            buffer = self.buffer
+            self.buffer = []
+            self.synced = True
+            self.chained = False
+
+            for event in buffer:
+                if not self._check(event):
+                    self._reset()
+                    return False
+                self._apply(event)
+
+            return True
+
+    def apply_diff(self, data: dict) -> bool:
+        """
+        Apply a diff depth event.
+        Return False if the book is not synced, the event is buffered and snapshot is needed.
+        """
+        with self.lock:
+            if not self.synced:
+                self.buffer.append(data)
+                return False
+
+            if not self._check(data):
+                self.gap_count += 1
+                self._reset()
+                self.buffer.append(data)
+                return False
+
+            self._apply(data)
+            return True
+
+    def get_depth(self, n: int) -> Tuple[List[Tuple[str, str]], List[Tuple[str, str]]]:
+        """
+        Get the best n bid and ask levels.
+        """
+        with self.lock:
+            return self.bids.get_levels(n), self.asks.get_levels(n)
+
+    def _check(self, data: dict) -> bool:
+        """
+        Check if the event can be chained to the book.
+        """
+        if self.chained:
+            return data["pu"] == self.last_update_id
+
+        # Events older than snapshot are skipped.
+        if data["u"] < self.last_update_id:
+            return True
+        return data["U"] <= self.last_update_id
+
+    def _apply(self, data: dict) -> None:
+        """"""
+        if data["u"] < self.last_update_id:
+            return
+
+        for price, volume in data["b"]:
+            self.bids.update(price, volume)
+        for price, volume in data["a"]:
+            self.asks.update(price, volume)
+
+        self.last_update_id = data["u"]
+        self.chained = True
+
+    def _reset(self) -> None:
+        """"""
+        self.bids.clear()
+        self.asks.clear()
+        self.last_update_id = 0
+        self.synced = False
+        self.chained = False
+        self.buffer = []
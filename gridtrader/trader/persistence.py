@@ -0,0 +1,264 @@
+"""
+Write-behind storage of strategy data.
+"""
+
+import json
+import re
+import sys
+from copy import copy
+from pathlib import Path
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+
+from .utility import load_json, save_json, get_folder_path
+
+
+class StrategyDataWriter:
+    """
+    Keeps the latest variables of every strategy in memory and persists them
+    on a background thread.
+
+    Calling update only hands the data over, so the event thread never waits for
+    disk io. On every interval the writer compares the data with the persisted
+    state and appends the changed variables as one small json line into a write
+    ahead log (wal) file per strategy. The cost of a trade is then the size of
+    the changed values, no matter how many strategies or grid levels exist.
+
+    The wal is compacted into the snapshot json file once compact_records records
+    are written, and when the writer is closed. On load, the snapshot is read and
+    the tail of every wal file is replayed on top of it.
+    """
+
+    def __init__(self, filename: str, interval: float = 1, compact_records: int = 1000):
+        """"""
+        self.filename: str = filename
+        self.interval: float = interval
+        self.compact_records: int = compact_records
+
+        # Next to the data file, which is in trader folder unless filename is absolute
+        path = Path(filename)
+        self.wal_folder: str = str(path.with_name(f"{path.stem}_wal"))
+
+        self.data: Dict[str, dict] = {}  # persisted state: snapshot + wal
+        self.pending: Dict[str, Optional[dict]] = {}  # None means removed
+        self.wal_records: int = 0  # records appended since last compaction
+        self.write_count: int = 0  # snapshot writes
+
+        self._lock: Lock = Lock()
+        self._flush_lock: Lock = Lock()
+        self._stop_event: Event = Event()
+        self._thread: Thread = None
+
+    def load(self) -> Dict[str, dict]:
+        """
+        Load strategy data from snapshot file and replay the wal files.
+        """
+        with self._flush_lock:
+            self.data = load_json(self.filename)
+
+            replayed = 0
+            for wal_path in self._get_wal_paths():
+                replayed += self._replay_wal(wal_path)
+
+            if replayed:
+                self._compact()
+
+            return {k: copy(v) for k, v in self.data.items()}
+
+    def start(self) -> None:
+        """
+        Start the background writer thread.
+        """
+        if self._thread:
+            return
+
+        self._stop_event.clear()
+        self._thread = Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def update(self, strategy_name: str, data: Dict[str, Any]) -> None:
+        """
+        Update the variables of a strategy, only the latest data within an interval is persisted.
+        """
+        # Copy container values, which may be changed by strategy while writing.
+        data = {
+            k: copy(v) if isinstance(v, (dict, list)) else v
+            for k, v in data.items()
+        }
+
+        with self._lock:
+            self.pending[strategy_name] = data
+
+    def remove(self, strategy_name: str) -> None:
+        """
+        Remove data of a strategy.
+        """
+        with self._lock:
+            self.pending[strategy_name] = None
+
+    def flush(self) -> None:
+        """
+        Append the changes since last flush into wal files.
+        """
+        with self._flush_lock:
+            with self._lock:
+                pending = self.pending
+                self.pending = {}
+
+            for strategy_name, data in pending.items():
+                record = self._make_record(strategy_name, data)
+                if not record:
+                    continue
+
+                self._append_wal(strategy_name, record)
+                self._apply_record(record)
+                self.wal_records += 1
+
+            if self.wal_records >= self.compact_records:
+                self._compact()
+
+    def compact(self) -> None:
+        """
+        Write the full snapshot file and clear the wal files.
+        """
+        with self._flush_lock:
+            self._compact()
+
+    def close(self) -> None:
+        """
+        Stop the writer thread, flush the remaining data and compact wal.
+        """
+        if self._thread:
+            self._stop_event.set()
+            self._thread.join()
+            self._thread = None
+
+        self.flush()
+        self.compact()
+
+    def _run(self) -> None:
+        """"""
+        while not self._stop_event.wait(self.interval):
+            try:
+                self.flush()
+            except Exception:
+                et, ev, tb = sys.exc_info()
+                sys.excepthook(et, ev, tb)
+
+    def _compact(self) -> None:
+        """"""
+        save_json(self.filename, self.data)
+        self.write_count += 1
+
+        for wal_path in self._get_wal_paths():
+            wal_path.unlink()
+        self.wal_records = 0
+
+    def _make_record(self, strategy_name: str, data: Optional[dict]) -> dict:
+        """
+        Create a wal record with the changed variables of a strategy.
+        Dict variables (like order maps) are recorded by changed and removed keys.
+        """
+        if data is None:
+            if strategy_name not in self.data:
+                return {}
+            return {"n": strategy_name, "x": 1}
+
+        old = self.data.get(strategy_name, {})
+        changed = {}
+        dict_changes = {}
+
+        for name, value in data.items():
+            if isinstance(value, dict):
+                value = {_to_json_key(k): v for k, v in value.items()}
+                old_value = old.get(name, None)
+
+                if isinstance(old_value, dict):
+                    set_items = {k: v for k, v in value.items() if k not in old_value or old_value[k] != v}
+                    removed_keys = [k for k in old_value if k not in value]
+                    if set_items or removed_keys:
+                        dict_changes[name] = {"s": set_items, "r": removed_keys}
+                    continue
+
+            if name not in old or old[name] != value:
+                changed[name] = value
+
+        removed = [name for name in old if name not in data]
+
+        if not changed and not dict_changes and not removed:
+            return {}
+
+        record = {"n": strategy_name}
+        if changed:
+            record["s"] = changed
+        if dict_changes:
+            record["d"] = dict_changes
+        if removed:
+            record["r"] = removed
+        return record
+
+    def _apply_record(self, record: dict) -> None:
+        """"""
+        strategy_name = record["n"]
+
+        if record.get("x", 0):
+            self.data.pop(strategy_name, None)
+            return
+
+        # Replace the strategy dict instead of changing it, the old one may be used by load.
+        data = copy(self.data.get(strategy_name, {}))
+
+        for name, value in record.get("s", {}).items():
+            data[name] = value
+
+        for name, change in record.get("d", {}).items():
+            value = copy(data.get(name, {}))
+            value.update(change["s"])
+            for k in change["r"]:
+                value.pop(k, None)
+            data[name] = value
+
+        for name in record.get("r", []):
+            data.pop(name, None)
+
+        self.data[strategy_name] = data
+
+    def _append_wal(self, strategy_name: str, record: dict) -> None:
+        """"""
+        line = json.dumps(record, ensure_ascii=False) + "\n"
+        with open(self._get_wal_path(strategy_name), mode="a", encoding="UTF-8") as f:
+            f.write(line)
+
+    def _replay_wal(self, wal_path: Path) -> int:
+        """
+        Apply records in a wal file, a broken tail line left by a crash is ignored.
+        """
+        count = 0
+        with open(wal_path, mode="r", encoding="UTF-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    break
+
+                self._apply_record(record)
+                count += 1
+        return count
+
+    def _get_wal_path(self, strategy_name: str) -> Path:
+        """"""
+        filename = re.sub(r"[^\w\-.]", "_", strategy_name) + ".wal"
+        return get_folder_path(self.wal_folder).joinpath(filename)
+
+    def _get_wal_paths(self) -> List[Path]:
+        """"""
+        return sorted(get_folder_path(self.wal_folder).glob("*.wal"))
+
+
+def _to_json_key(key: Any) -> str:
+    """
+    Convert dict key into the string saved by json, e.g. 96000.0 -> "96000.0".
+    """
+    if isinstance(key, str):
+        return key
+    return json.dumps(key)
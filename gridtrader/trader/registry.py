@@ -0,0 +1,341 @@
+"""
+Order registry shared by gateways and engines.
+"""
+
+import time
+from collections import defaultdict
+from datetime import datetime
+from decimal import Decimal
+from threading import RLock
+from typing import Any, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from .constant import Status
+from .object import OrderData
+
+
+# Orders only move forward in status rank, terminal status has the highest rank.
+STATUS_RANKS: Dict[Status, int] = {
+    Status.SUBMITTING: 0,
+    Status.NOTTRADED: 1,
+    Status.PARTTRADED: 2,
+    Status.ALLTRADED: 3,
+    Status.CANCELLED: 3,
+    Status.REJECTED: 3,
+}
+TERMINAL_RANK: int = 3
+
+
+class OrderSequence(NamedTuple):
+    """
+    Snapshot of the order state last accepted. Values are copied since gateways
+    may push the same order object again after changing it.
+
+    A local state is set by the gateway itself without confirmation from the
+    exchange, e.g. rejected when the send order request timed out.
+    """
+
+    traded: Decimal
+    rank: int
+    update_time: Optional[datetime]
+    price: Decimal
+    volume: Decimal
+    local: bool = False
+
+    @classmethod
+    def from_order(cls, order: OrderData, local: bool = False) -> "OrderSequence":
+        """"""
+        return cls(
+            order.traded,
+            STATUS_RANKS.get(order.status, 0),
+            order.update_time,
+            order.price,
+            order.volume,
+            local
+        )
+
+    def is_active(self) -> bool:
+        """"""
+        return self.rank < TERMINAL_RANK
+
+
+class OrderRegistry:
+    """
+    Tracks the lifecycle of all orders in one place.
+
+    Gateways update orders here before the order event is processed, OmsEngine
+    queries active orders from it and CtaEngine saves the owner strategy of
+    each order. An order is kept for grace_period seconds after it becomes
+    inactive, so late trade pushes can still be matched to its owner, and then
+    evicted by calling evict on timer. The last state of an evicted order is
+    kept for tombstone_period seconds more, so a late stale update is still
+    dropped instead of being taken as a new order.
+
+    Active orders are also indexed by vt_symbol, by reference and by vt_symbol
+    with price, so the queries cost is the size of result.
+
+    Updates of an order come from rest responses, websocket and queries, and
+    may arrive out of order. Each update is sequenced by traded volume, status
+    rank and server update time, older or duplicate updates are dropped and a
+    finished order is never made active again, unless it was only finished
+    locally by the gateway and the exchange reports another status.
+    """
+
+    def __init__(self, grace_period: float = 300, tombstone_period: float = 86400):
+        """"""
+        self.grace_period: float = grace_period
+        self.tombstone_period: float = tombstone_period
+
+        self.orders: Dict[str, OrderData] = {}
+        self.active_orders: Dict[str, OrderData] = {}
+        self.finished_times: Dict[str, float] = {}  # vt_orderid: finish time, in finishing order
+
+        self.owners: Dict[str, Any] = {}  # vt_orderid: owner
+        self.owner_orderids: Dict[str, Set[str]] = defaultdict(set)  # owner name: active vt_orderids
+        self.orderid_owner_names: Dict[str, str] = {}  # vt_orderid: owner name
+
+        # Indexes of active orders: key: {vt_orderid: order}
+        self.symbol_orders: Dict[str, Dict[str, OrderData]] = defaultdict(dict)
+        self.reference_orders: Dict[str, Dict[str, OrderData]] = defaultdict(dict)
+        self.price_orders: Dict[Tuple[str, float], Dict[str, OrderData]] = defaultdict(dict)
+        self.index_keys: Dict[str, Tuple[str, str, float]] = {}  # vt_orderid: keys of indexes
+
+        self.sequences: Dict[str, OrderSequence] = {}  # vt_orderid: last accepted state
+        self.tombstones: Dict[str, Tuple[OrderSequence, float]] = {}  # vt_orderid: (last state, evict time)
+
+        self.evicted_count: int = 0
+        self.stale_count: int = 0
+        self.duplicate_count: int = 0
+
+        self.lock: RLock = RLock()
+
+    def update_order(self, order: OrderData, local: bool = False) -> Tuple[bool, Optional[OrderSequence]]:
+        """
+        Update order data.
+        Return whether the update is accepted, and the state of the order before update.
+        """
+        vt_orderid = order.vt_orderid
+
+        with self.lock:
+            pre_sequence = self.sequences.get(vt_orderid, None)
+            if not pre_sequence and vt_orderid in self.tombstones:
+                pre_sequence = self.tombstones[vt_orderid][0]
+
+            sequence = OrderSequence.from_order(order, local)
+
+            if pre_sequence and not self.check_sequence(pre_sequence, sequence):
+                return False, pre_sequence
+
+            self.tombstones.pop(vt_orderid, None)
+            self.sequences[vt_orderid] = sequence
+            self.orders[vt_orderid] = order
+
+            # Orders pushed by websocket have no reference, use the one saved before.
+            old_keys = self.index_keys.pop(vt_orderid, None)
+            reference = order.reference
+            if old_keys:
+                self._remove_index(vt_orderid, old_keys)
+                reference = reference or old_keys[1]
+
+            if order.is_active():
+                self.active_orders[vt_orderid] = order
+
+                keys = (order.vt_symbol, reference, float(order.price))
+                self._add_index(order, keys)
+            else:
+                self.active_orders.pop(vt_orderid, None)
+
+                if vt_orderid not in self.finished_times:
+                    self.finished_times[vt_orderid] = time.monotonic()
+
+                owner_name = self.orderid_owner_names.get(vt_orderid, None)
+                if owner_name is not None:
+                    self.owner_orderids[owner_name].discard(vt_orderid)
+
+        return True, pre_sequence
+
+    def check_sequence(self, pre_sequence: OrderSequence, sequence: OrderSequence) -> bool:
+        """
+        Check if the new state of an order is newer than the last accepted one.
+        """
+        if sequence == pre_sequence:
+            self.duplicate_count += 1
+            return False
+
+        if sequence.traded != pre_sequence.traded:
+            newer = sequence.traded > pre_sequence.traded
+        elif pre_sequence.local and not sequence.local:
+            newer = sequence.rank != pre_sequence.rank  # exchange status overrides the local one
+        elif not pre_sequence.is_active():
+            newer = False
+        elif sequence.rank != pre_sequence.rank:
+            newer = sequence.rank > pre_sequence.rank
+        elif sequence.update_time and pre_sequence.update_time and sequence.update_time != pre_sequence.update_time:
+            newer = sequence.update_time > pre_sequence.update_time
+        else:
+            newer = True  # amended price or volume without update time
+
+        if not newer:
+            self.stale_count += 1
+        return newer
+
+    def get_order(self, vt_orderid: str) -> Optional[OrderData]:
+        """"""
+        return self.orders.get(vt_orderid, None)
+
+    def get_active_order(self, vt_orderid: str) -> Optional[OrderData]:
+        """"""
+        return self.active_orders.get(vt_orderid, None)
+
+    def get_active_orders(self) -> List[OrderData]:
+        """"""
+        with self.lock:
+            return list(self.active_orders.values())
+
+    def get_active_orders_by_symbol(self, vt_symbol: str) -> List[OrderData]:
+        """"""
+        with self.lock:
+            return list(self.symbol_orders.get(vt_symbol, {}).values())
+
+    def get_active_orders_by_reference(self, reference: str) -> List[OrderData]:
+        """"""
+        with self.lock:
+            return list(self.reference_orders.get(reference, {}).values())
+
+    def get_active_orders_by_price(self, vt_symbol: str, price: float) -> List[OrderData]:
+        """"""
+        with self.lock:
+            return list(self.price_orders.get((vt_symbol, float(price)), {}).values())
+
+    def get_active_orders_by_owner(self, owner_name: str) -> List[OrderData]:
+        """"""
+        with self.lock:
+            return [
+                self.active_orders[vt_orderid]
+                for vt_orderid in self.owner_orderids.get(owner_name, [])
+                if vt_orderid in self.active_orders
+            ]
+
+    def set_owner(self, vt_orderid: str, owner: Any, owner_name: str) -> None:
+        """
+        Save the owner of an order, like the strategy which sent it.
+        """
+        with self.lock:
+            self.owners[vt_orderid] = owner
+            self.orderid_owner_names[vt_orderid] = owner_name
+
+            order = self.orders.get(vt_orderid, None)
+            if not order or order.is_active():
+                self.owner_orderids[owner_name].add(vt_orderid)
+
+    def get_owner(self, vt_orderid: str) -> Any:
+        """"""
+        return self.owners.get(vt_orderid, None)
+
+    def get_owner_orderids(self, owner_name: str) -> List[str]:
+        """
+        Get vt_orderids of all active orders of an owner.
+        """
+        with self.lock:
+            return list(self.owner_orderids.get(owner_name, []))
+
+    def remove_owner(self, owner_name: str) -> None:
+        """
+        Remove the owner from all its orders.
+        """
+        with self.lock:
+            self.owner_orderids.pop(owner_name, None)
+
+            vt_orderids = [
+                vt_orderid for vt_orderid, name in self.orderid_owner_names.items()
+                if name == owner_name
+            ]
+            for vt_orderid in vt_orderids:
+                self.orderid_owner_names.pop(vt_orderid)
+                self.owners.pop(vt_orderid, None)
+
+    def _add_index(self, order: OrderData, keys: Tuple[str, str, float]) -> None:
+        """"""
+        vt_symbol, reference, price = keys
+        vt_orderid = order.vt_orderid
+
+        self.symbol_orders[vt_symbol][vt_orderid] = order
+        if reference:
+            self.reference_orders[reference][vt_orderid] = order
+        self.price_orders[(vt_symbol, price)][vt_orderid] = order
+
+        self.index_keys[vt_orderid] = keys
+
+    def _remove_index(self, vt_orderid: str, keys: Tuple[str, str, float]) -> None:
+        """"""
+        vt_symbol, reference, price = keys
+
+        _pop_index(self.symbol_orders, vt_symbol, vt_orderid)
+        if reference:
+            _pop_index(self.reference_orders, reference, vt_orderid)
+        _pop_index(self.price_orders, (vt_symbol, price), vt_orderid)
+
+    def evict(self) -> int:
+        """
+        Remove orders which became inactive longer than grace period ago,
+        and tombstones older than tombstone period.
+        """
+        now = time.monotonic()
+        deadline = now - self.grace_period
+        count = 0
+
+        with self.lock:
+            while self.finished_times:
+                vt_orderid, finished_time = next(iter(self.finished_times.items()))
+                if finished_time > deadline:
+                    break
+
+                self.finished_times.pop(vt_orderid)
+
+                # Order may be active again, e.g. a stale update pushed late.
+                if vt_orderid in self.active_orders:
+                    continue
+
+                self.orders.pop(vt_orderid, None)
+                self.owners.pop(vt_orderid, None)
+                self.orderid_owner_names.pop(vt_orderid, None)
+
+                sequence = self.sequences.pop(vt_orderid, None)
+                if sequence:
+                    self.tombstones[vt_orderid] = (sequence, now)
+                count += 1
+
+            self.evicted_count += count
+
+            tombstone_deadline = now - self.tombstone_period
+            while self.tombstones:
+                vt_orderid, (_, evict_time) = next(iter(self.tombstones.items()))
+                if evict_time > tombstone_deadline:
+                    break
+                self.tombstones.pop(vt_orderid)
+
+        return count
+
+    def get_counts(self) -> Dict[str, int]:
+        """
+        Get number of tracked orders by status.
+        """
+        counts = defaultdict(int)
+
+        with self.lock:
+            for order in self.orders.values():
+                counts[order.status.value] += 1
+
+        return dict(counts)
+
+
+def _pop_index(index: Dict[Any, Dict[str, OrderData]], key: Any, vt_orderid: str) -> None:
+    """
+    Remove order from index, and remove the key if no order left.
+    """
+    orders = index.get(key, None)
+    if orders is None:
+        return
+
+    orders.pop(vt_orderid, None)
+    if not orders:
+        index.pop(key)
@@ -13,6 +13,19 @@ SETTINGS: Dict[str, Any] = {
     "order_update_interval": 120,
     "position_update_interval": 120,
     "account_update_interval": 120,
+    "data.sync_interval": 1,
+    "data.compact_records": 1000,
+    "data.store": "json",
+    "trade_filter.size": 100000,
+    "trade_filter.ttl": 86400,
+    "order_registry.grace_period": 300,
+    "order_registry.tombstone_period": 86400,
+    "order.exact_rounding": False,
+    "order.self_trade_prevention": "EXPIRE_BOTH",
+    "websocket.decode_workers": 0,
+    "websocket.queue_size": 10000,
+    "websocket.standby": False,
+    "websocket.max_lag": 1000,
     "log.active": True,
     "log.level": INFO,
     "log.console": True,
@@ -20,6 +20,7 @@ class FutureGridLongShortStrategy(CtaTemplate):
 
     """
     author = "51bitquant"
+    depth = 1  # 只用到买一价, 订阅 bookTicker
 
     # parameters
     initial_volume = 0.0  # if greater than zero, means LONG, if less than zero: means SHORT.
@@ -1,12 +1,10 @@
-from decimal import Decimal, ROUND_DOWN
-from typing import Union, Optional
-
-import ccxt
+from typing import Union, Optional, List
 
+from gridtrader.trader.constant import Direction, Offset
 from gridtrader.trader.object import OrderData, TickData, TradeData, ContractData
 from gridtrader.trader.object import Status
-from gridtrader.trader.utility import GridPositionCalculator
-from gridtrader.tools.common.contract_handler import ContractHandler
+from gridtrader.trader.utility import GridPositionCalculator, encode_price_volume, decode_price_volume
+from gridtrader.trader.normalizer import ContractNormalizer
 from .template import CtaTemplate
 from ..engine import CtaEngine
 from ...event import EVENT_TIMER
@@ -20,6 +18,7 @@ class FutureGridStrategy(CtaTemplate):
     总金额保持不变，且满足最小下单数量。
     """
     author = "51bitquant"
+    depth = 1  # 只用到买一价, 订阅 bookTicker
 
     # 参数
     upper_price = 0.0  # 策略最高价
@@ -36,6 +35,7 @@ class FutureGridStrategy(CtaTemplate):
     step_price = 0.0  # 网格间距
     trade_times = 0  # 成交次数
     price_volume_dict = {}  # 保存每个价格对应的下单数量
+    grid_state = {}  # 网格的生成参数和压缩后的价格数量, 用于持久化
     start_price_triggered = False  # 启动价格是否已触发
     lower_grid_total_volume = 0.0  # 下方网格的总下单量
     upper_grid_total_volume = 0.0  # 上方网格的总下单量
@@ -43,40 +43,23 @@ class FutureGridStrategy(CtaTemplate):
     orders_dict = {}  # 存储所有订单的字典
 
     parameters = ["bottom_price", "upper_price",  "max_open_orders", "order_amount", "start_price", "direction_int","stop_loss_price"]
-    variables = ["avg_price", "step_price", "trade_times", "price_volume_dict", "start_price_triggered",
+    variables = ["avg_price", "step_price", "trade_times", "grid_state", "start_price_triggered",
                  "lower_grid_total_volume", "upper_grid_total_volume"]
 
     def __init__(self, cta_engine: CtaEngine, strategy_name, vt_symbol, setting):
         super().__init__(cta_engine, strategy_name, vt_symbol, setting)
         self.is_sell_outed = False
-        self.exchange = self.create_exchange()  # 创建 ccxt 交易所实例
         self.long_orders_dict = {}  # 多单挂单字典
         self.short_orders_dict = {}  # 空单挂单字典
         self.tick: Union[TickData, None] = None
         self.contract_data: Optional[ContractData] = None
         self.pos_calculator = GridPositionCalculator()
         self.timer_count = 0
-        self._ContractHandler = None
-        self.fake_active_orders_price_list = None
-
-    def create_exchange(self):
-        """创建 ccxt 交易所实例"""
-        # 获取历史订单
-        fbinance = ccxt.binance()
-        binance_key4 = 'qBFimviRucbMNt9bcPKWBIrhrAqJpcGlPjDMkiIFj04GzhT0YNsLq9A1XU9IFC2Y'
-        binance_secret4 = 'UvkbgNauNOGMwYxnGbz81hFYbhGaEdNdFfirwLUIE72McPhc4eJOkSelS65Stbpu'
-        fbinance.apiKey = binance_key4
-        fbinance.secret = binance_secret4
-        fbinance.enableRateLimit = True
-        fbinance.password = '5601564a'
-        fbinance.options['defaultType'] = 'future'
-        fbinance.options["warnOnFetchOpenOrdersWithoutSymbol"] = False
-        fbinance.name = 'future-binance'
-        fbinance.enableRateLimit = True
-
-        exchange = fbinance
-
-        return exchange
+        self.normalizer: Optional[ContractNormalizer] = None  # 合约精度, 启动时由引擎获取
+        self.tick_prices = {}  # 价格的 tick 数: 网格价格, 避免浮点价格查找不一致
+        self.stop_orderid = ""  # 交易所端止损单
+        self.stop_volume = 0.0  # 止损单对应的持仓数量
+        self.amending_orders = {}  # 改单中的订单 {'orderid': 新价格}, 收到新价格的订单推送后才更新挂单字典
 
     def calculate_grid_parameters(self):
         """
@@ -86,19 +69,13 @@ class FutureGridStrategy(CtaTemplate):
         if not self.order_amount:
             return
 
-        ###
-        fake_active_orders = self.cta_engine.main_engine.future_gateway.active_orders
-        self.fake_active_orders_price_list = [float(order.price) for order in fake_active_orders.values()]
-
-        self._ContractHandler = ContractHandler(self.contract_data.price_tick)
+        if not self.normalizer:
+            self.normalizer = ContractNormalizer(self.contract_data)
+        normalizer = self.normalizer
 
         # 获取最小下单数量
         min_volume = self.contract_data.min_volume
 
-        # 根据 min_volume 确定需要保留的小数位数
-        decimal_places = abs(Decimal(str(min_volume)).as_tuple().exponent)
-        quantize_str = f"0.{'0' * decimal_places}"  # 例如 min_volume=0.001 -> "0.000"
-
         # 计算价格范围
         price_range = self.upper_price - self.bottom_price
         if price_range <= 0:
@@ -116,7 +93,7 @@ class FutureGridStrategy(CtaTemplate):
         # 调整网格数量，确保每个网格的币数量满足最小下单数量
         while True:
             # 计算网格间距
-            self.step_price = self._ContractHandler.process_price(price_range / self.grid_number)
+            self.step_price = normalizer.floor_price(price_range / self.grid_number)
 
             # 计算下方网格和上方网格的数量
             lower_grid_number = self.grid_number // 2
@@ -130,50 +107,44 @@ class FutureGridStrategy(CtaTemplate):
                 lower_grid_amount = self.order_amount / (lower_grid_number * 1.1 + upper_grid_number)
                 upper_grid_amount = lower_grid_amount * 1.1
 
-            # 计算每个网格的币数量
-            self.price_volume_dict = {}
-            total_amount = 0
-            self.lower_grid_total_volume = 0.0  # 重置下方网格的总下单量
-            self.upper_grid_total_volume = 0.0  # 重置上方网格的总下单量
-            for i in range(self.grid_number):
-                price = self.bottom_price + i * self.step_price
-                if i < lower_grid_number:
-                    volume = lower_grid_amount / price  # 金额转换为币数量
-                    self.lower_grid_total_volume += volume  # 累加下方网格的总下单量
-                else:
-                    volume = upper_grid_amount / price  # 金额转换为币数量
-                    self.upper_grid_total_volume += volume  # 累加上方网格的总下单量
-
-                # 根据 min_volume 保留小数位数
-                volume = float(Decimal(volume).quantize(Decimal(quantize_str), rounding=ROUND_DOWN))
-
-                # 如果币数量小于最小下单数量，减少网格数量并重新计算
-                if volume < min_volume:
-                    self.grid_number -= 1
-                    if self.grid_number < 1:
-                        raise ValueError("无法满足最小下单数量要求，请调整参数。")
-                    break
-                else:
-                    price_dc = self._ContractHandler.process_price(price)
-                    # 将 Decimal 键转换为 float
-                    price_float = float(price_dc)
-                    self.price_volume_dict[price_float] = volume
-                    total_amount += volume * price
-            else:
-                # 所有网格的币数量都满足最小下单数量要求，退出循环
-                break
+            # 计算每个网格的价格和币数量, 按合约精度批量取整
+            prices = [self.bottom_price + i * self.step_price for i in range(self.grid_number)]
+            volumes = [
+                (lower_grid_amount if i < lower_grid_number else upper_grid_amount) / price  # 金额转换为币数量
+                for i, price in enumerate(prices)
+            ]
+            levels = normalizer.normalize_many(prices, volumes)
+
+            # 如果币数量小于最小下单数量或金额小于最小下单金额，减少网格数量并重新计算
+            if any(
+                    volume < min_volume or not normalizer.check_notional(price, volume)
+                    for price, volume in levels
+            ):
+                self.grid_number -= 1
+                if self.grid_number < 1:
+                    raise ValueError("无法满足最小下单数量要求，请调整参数。")
+                continue
+
+            # 所有网格的币数量都满足最小下单数量要求，退出循环
+            self.price_volume_dict = dict(levels)
+            self.lower_grid_total_volume = sum(volumes[:lower_grid_number])  # 下方网格的总下单量
+            self.upper_grid_total_volume = sum(volumes[lower_grid_number:])  # 上方网格的总下单量
+            total_amount = sum(price * volume for price, (_, volume) in zip(prices, levels))
+            break
 
         # 检查总金额是否超过设定值
         if total_amount > self.order_amount:
             scale_factor = self.order_amount / total_amount
             for price in self.price_volume_dict:
                 self.price_volume_dict[price] = float(
-                    Decimal(self.price_volume_dict[price] * scale_factor).quantize(Decimal(quantize_str),
-                                                                                   rounding=ROUND_DOWN))
+                    normalizer.floor_volume(self.price_volume_dict[price] * scale_factor))
             # 按比例调整下方和上方网格的总下单量
             self.lower_grid_total_volume *= scale_factor
             self.upper_grid_total_volume *= scale_factor
 
+        self.update_grid_state()
+        self.update_tick_prices()
+
         self.write_log(
             f"Calculated Parameters: Upper Price: {self.upper_price}, Bottom Price: {self.bottom_price}, "
             f"Grid Number: {self.grid_number}, Step Price: {self.step_price}, "
@@ -184,6 +155,68 @@ class FutureGridStrategy(CtaTemplate):
 
         # 计算价格变化率
         self.calculate_price_change_rate()
+
+    def get_grid_params(self) -> dict:
+        """网格的生成参数, 参数变化后保存的网格不再有效"""
+        return {
+            "bottom_price": self.bottom_price,
+            "upper_price": self.upper_price,
+            "order_amount": self.order_amount,
+            "direction_int": self.direction_int,
+            "grid_number": self.grid_number,
+            "step_price": self.step_price
+        }
+
+    def is_grid_restored(self) -> bool:
+        """恢复的网格是否由当前设置生成, 设置变化后需要重新计算网格"""
+        if not self.grid_state or not self.price_volume_dict:
+            return False
+
+        params = self.grid_state.get("params", {})
+        current_params = self.get_grid_params()
+        return all(
+            params.get(key, None) == current_params[key]
+            for key in ("bottom_price", "upper_price", "order_amount", "direction_int")
+        )
+
+    def update_grid_state(self):
+        """网格生成后更新持久化的网格状态, 只在网格变化时计算一次"""
+        self.grid_state = {
+            "params": self.get_grid_params(),
+            "grid": encode_price_volume(self.price_volume_dict)
+        }
+
+    def update_tick_prices(self):
+        """按价格的 tick 数索引网格价格"""
+        if not self.normalizer:
+            self.tick_prices = {}
+            return
+
+        self.tick_prices = {
+            self.normalizer.to_ticks(price): price for price in self.price_volume_dict
+        }
+
+    def load_variables(self, data: dict):
+        """恢复策略变量, 由 grid_state 重建 price_volume_dict, 兼容旧版本保存的 price_volume_dict"""
+        super().load_variables(data)
+
+        if self.grid_state:
+            params = self.grid_state.get("params", {})
+            self.grid_number = params.get("grid_number", self.grid_number)
+            try:
+                self.price_volume_dict = decode_price_volume(self.grid_state.get("grid", None))
+            except ValueError as e:
+                self.write_log(f"Grid State Invalid: {e}, Grid Will Be Recalculated On Start.")
+                self.grid_state = {}
+                self.price_volume_dict = {}
+        elif data.get("price_volume_dict", None):
+            # 旧版本数据: json 保存后价格键变成了字符串
+            self.price_volume_dict = {
+                float(price): volume for price, volume in data["price_volume_dict"].items()
+            }
+            self.update_grid_state()
+            self.write_log("Migrated Price Volume Dict To Grid State.")
+
     # def get_min_volume(self, vt_symbol):
     #     """获取最小下单数量"""
     #     symbol = vt_symbol.split(".")[0]
@@ -198,8 +231,15 @@ class FutureGridStrategy(CtaTemplate):
 
     def on_start(self):
         self.contract_data = self.cta_engine.main_engine.get_contract(self.vt_symbol)
+        self.normalizer = self.cta_engine.main_engine.get_normalizer(self.vt_symbol)
         """策略启动回调"""
-        self.calculate_grid_parameters()
+        if self.is_grid_restored():
+            # 使用恢复的网格, 避免重启后网格价格与已挂订单不一致
+            self.update_tick_prices()
+            self.calculate_price_change_rate()
+            self.write_log("Grid Restored From Saved State.")
+        else:
+            self.calculate_grid_parameters()
         # self.avoid_finished_orders()
         self.write_log(f"Calculated Parameters: Upper Price: {self.upper_price}, Bottom Price: {self.bottom_price}, "
                        f"Grid Number: {self.grid_number}, Step Price: {self.step_price}, "
@@ -227,6 +267,9 @@ class FutureGridStrategy(CtaTemplate):
         if self.timer_count >= 10:
             self.timer_count = 0
 
+            # 根据最新持仓维护止损单
+            self.update_stop_order()
+
             # 移除超出最大挂单数的订单
             if len(self.long_orders_dict.keys()) > self.max_open_orders:
                 cancel_order_id = min(self.long_orders_dict.keys(), key=lambda k: self.long_orders_dict[k])
@@ -243,11 +286,14 @@ class FutureGridStrategy(CtaTemplate):
         if tick and tick.bid_price_1 > 0 and self.contract_data:
             self.tick = tick
 
-            # 检查是否达到止损价格
-            if self.stop_loss_price > 0 and tick.bid_price_1 <= self.stop_loss_price and not self.is_sell_outed:
+            if self.is_sell_outed:
+                return
+
+            # 检查是否达到止损价格，平仓由交易所端止损单完成
+            if self.stop_loss_price > 0 and tick.bid_price_1 <= self.stop_loss_price:
                 self.write_log(f"触发止损，当前价格: {tick.bid_price_1}，止损价格: {self.stop_loss_price}")
                 self.on_stop()  # 触发停止功能
-                self.sell_market()  # 执行市价卖出
+                self.stop_loss()
                 return
 
             if self.upper_price - self.bottom_price <= 0:
@@ -298,12 +344,17 @@ class FutureGridStrategy(CtaTemplate):
 
     def on_order(self, order: OrderData):
         """订单状态回调"""
+        if order.vt_orderid == self.stop_orderid:
+            self.on_stop_order(order)
+            return
+
         if order.vt_orderid not in (list(self.short_orders_dict.keys()) + list(self.long_orders_dict.keys())):
             return
 
+        self.check_amended(order)
+
         self.pos_calculator.update_position(order)
         self.avg_price = self.pos_calculator.avg_price
-        _ContractHandler = ContractHandler(self.contract_data.price_tick)
 
         if order.status == Status.ALLTRADED:
             short_price = float(order.price) + float(self.step_price)
@@ -323,9 +374,7 @@ class FutureGridStrategy(CtaTemplate):
                         self.write_log(f" short_price 跳过 {short_price}。")
                         return
 
-                    orders_ids = self.short(short_price, volume)
-                    for orderid in orders_ids:
-                        self.short_orders_dict[orderid] = short_price  # 存储在总字典中
+                    self.place_short_order(short_price, volume)
 
                 ## 补充买单
                 if len(self.long_orders_dict.keys()) < self.max_open_orders:
@@ -354,9 +403,7 @@ class FutureGridStrategy(CtaTemplate):
                         self.write_log(f" long_price 跳过 {long_price}。")
                         return
 
-                    orders_ids = self.buy(long_price, volume)
-                    for orderid in orders_ids:
-                        self.long_orders_dict[orderid] = long_price  # 存储在总字典中
+                    self.place_long_order(long_price, volume)
 
                 ## 补充卖单
                 if len(self.short_orders_dict.keys()) < self.max_open_orders:
@@ -375,6 +422,8 @@ class FutureGridStrategy(CtaTemplate):
                             self.short_orders_dict[orderid] = short_price
 
         if not order.is_active():
+            self.amending_orders.pop(order.vt_orderid, None)
+
             if order.vt_orderid in self.long_orders_dict.keys():
                 del self.long_orders_dict[order.vt_orderid]
             elif order.vt_orderid in self.short_orders_dict.keys():
@@ -382,6 +431,58 @@ class FutureGridStrategy(CtaTemplate):
 
         self.put_event()
 
+    def place_long_order(self, price: float, volume: float):
+        """
+        挂多单。多单数量已满时，把最远（价格最低）的多单改价到该价格，
+        用一次改单代替撤单+新单，否则新下单。
+        """
+        orderids = [k for k in self.long_orders_dict.keys() if k not in self.amending_orders]
+        if len(self.long_orders_dict) >= self.max_open_orders > 0 and orderids:
+            farthest_id = min(orderids, key=lambda k: self.long_orders_dict[k])
+            if self.long_orders_dict[farthest_id] < price and self.modify_order(farthest_id, price, volume):
+                self.amending_orders[farthest_id] = price
+                return
+
+        orders_ids = self.buy(price, volume)
+        for orderid in orders_ids:
+            self.long_orders_dict[orderid] = price  # 存储在总字典中
+
+    def place_short_order(self, price: float, volume: float):
+        """
+        挂空单。空单数量已满时，把最远（价格最高）的空单改价到该价格，
+        用一次改单代替撤单+新单，否则新下单。
+        """
+        orderids = [k for k in self.short_orders_dict.keys() if k not in self.amending_orders]
+        if len(self.short_orders_dict) >= self.max_open_orders > 0 and orderids:
+            farthest_id = max(orderids, key=lambda k: self.short_orders_dict[k])
+            if self.short_orders_dict[farthest_id] > price and self.modify_order(farthest_id, price, volume):
+                self.amending_orders[farthest_id] = price
+                return
+
+        orders_ids = self.short(price, volume)
+        for orderid in orders_ids:
+            self.short_orders_dict[orderid] = price  # 存储在总字典中
+
+    def check_amended(self, order: OrderData):
+        """
+        改单请求只是提交成功，收到新价格的订单推送后才把新价格记入挂单字典。
+        """
+        price = self.amending_orders.get(order.vt_orderid, None)
+        if price is None or abs(float(order.price) - price) >= self.step_price / 2:
+            return
+
+        del self.amending_orders[order.vt_orderid]
+        if order.vt_orderid in self.long_orders_dict:
+            self.long_orders_dict[order.vt_orderid] = price
+        else:
+            self.short_orders_dict[order.vt_orderid] = price
+
+    def on_modify_failed(self, vt_orderid: str):
+        """改单失败回调，挂单字典中仍是原价格，只需取消改单标记"""
+        if self.amending_orders.pop(vt_orderid, None) is not None:
+            self.write_log(f"改单失败，订单仍在原价格: {vt_orderid}")
+            self.put_event()
+
     def on_trade(self, trade: TradeData):
         """成交回调"""
         self.put_event()
@@ -440,57 +541,95 @@ class FutureGridStrategy(CtaTemplate):
         return change_rate_dict
 
     def avoid_finished_orders(self):
-        symbol = self.vt_symbol.split(".")[0]
-        symbol = symbol.replace("USDT", "/USDT")
-        orders = self.exchange.fetch_my_trades(symbol=symbol, limit=10)
-
+        """通过网关异步查询最近成交，不阻塞事件线程"""
         self.set_avoid_finished_orders = set()
-        # 打印订单信息
-        for i, order in enumerate(orders):
+        self.query_trades(10, self.on_trade_history)
+
+    def on_trade_history(self, trades: List[TradeData]):
+        """最近成交查询回调"""
+        for i, trade in enumerate(trades):
             print(f"订单 {i + 1}:")
-            print(f"  时间: {self.exchange.iso8601(order['timestamp'])}")
-            print(f"  交易对: {order['symbol']}")
-            print(f"  类型: {order['side']}")  # 买入(buy)或卖出(sell)
-            print(f"  数量: {order['amount']}")
-            print(f"  成交价格: {order['price']}")
-            print(f"  成交金额: {order['cost']}")
-            print(f"  手续费: {order['fee']['cost']} {order['fee']['currency']}")
+            print(f"  时间: {trade.datetime}")
+            print(f"  交易对: {trade.symbol}")
+            print(f"  类型: {trade.direction.value}")
+            print(f"  数量: {trade.volume}")
+            print(f"  成交价格: {trade.price}")
+            print(f"  成交金额: {trade.price * trade.volume}")
             print("-" * 30)
 
-            self.set_avoid_finished_orders.add(order['price'])
+            self.set_avoid_finished_orders.add(float(trade.price))
 
     ## 使用 min() 找最接近的价格
     def getVolume(self, price):
-        closest_price = min(self.price_volume_dict.keys(), key=lambda x: abs(x - price))
+        # 先按 tick 数查找网格价格, 找不到再取最接近的价格
+        closest_price = None
+        if self.normalizer:
+            closest_price = self.tick_prices.get(self.normalizer.to_ticks(price), None)
+        if closest_price is None:
+            closest_price = min(self.price_volume_dict.keys(), key=lambda x: abs(x - price))
         volume = self.price_volume_dict.get(closest_price, None)
 
         return closest_price, volume
 
-    def sell_market(self):
-        """市价卖出功能"""
-        symbol2 = self.vt_symbol.split(".")[0]  # 获取交易对
-        symbol = symbol2.replace("USDT", "/USDT")
+    def update_stop_order(self):
+        """
+        使用本地持仓维护交易所端的 STOP_MARKET 止损单，持仓变化时撤销旧单并重新挂单。
+        """
+        if self.stop_loss_price <= 0 or self.is_sell_outed or not self.trading:
+            return
 
-        # 获取合约账户余额信息
-        balance = self.exchange.fetch_balance({"type": "future"})
-        btc_positions = balance.get('info', {}).get('positions', [])
+        # 止损单只保护多头持仓
+        volume = max(self.get_net_position(), 0.0)
+        if volume == self.stop_volume and (self.stop_orderid or not volume):
+            return
+
+        if self.stop_orderid:
+            self.cancel_order(self.stop_orderid)
+            self.stop_orderid = ""
 
-        # 过滤出目标交易对的持仓
-        btc_position = next((pos for pos in btc_positions if pos["symbol"] == symbol2), None)
+        self.stop_volume = volume
+        if volume > 0:
+            orders_ids = self.send_stop_order(Direction.SHORT, self.stop_loss_price, volume)
+            if orders_ids:
+                self.stop_orderid = orders_ids[0]
 
-        if not btc_position:
-            self.write_log(f"未持有 {symbol} 的仓位，无法执行市价卖出。")
+    def on_stop_order(self, order: OrderData):
+        """止损单状态回调"""
+        if order.is_active():
             return
 
-        position_amt = float(btc_position.get("positionAmt", 0))  # 获取仓位数量
+        self.stop_orderid = ""
+        self.stop_volume = 0.0
+
+        if order.status == Status.ALLTRADED:
+            self.write_log(f"止损单已成交，价格: {order.price}，数量: {order.volume}")
+            self.is_sell_outed = True
+
+        # 止损价已被穿过时交易所拒绝止损单(-2021)，重新挂单会一直被拒绝，直接市价平仓。
+        # 超时、限频等其他原因的拒绝只清空止损单，由 update_stop_order 重新挂单。
+        elif order.status == Status.REJECTED:
+            if self.tick and self.tick.bid_price_1 <= self.stop_loss_price:
+                self.write_log(f"止损单被拒绝，价格已穿过止损价格: {self.stop_loss_price}，改为市价平仓")
+                self.on_stop()
+                self.stop_loss()
+            else:
+                self.write_log(f"止损单被拒绝，止损价格: {self.stop_loss_price}，稍后重新挂单")
+
+        self.put_event()
+
+    def stop_loss(self):
+        """撤销网格挂单，如果交易所端止损单不存在则市价平仓"""
+        for vt_orderid in list(self.long_orders_dict.keys()) + list(self.short_orders_dict.keys()):
+            self.cancel_order(vt_orderid)
 
-        if position_amt == 0:
-            self.write_log(f"{symbol} 持仓数量为 0，无法执行市价卖出。")
+        self.is_sell_outed = True
+        if self.stop_orderid:
             return
 
-        self.write_log(f"持有 {position_amt} 个 {symbol}，准备市价卖出。")
+        volume = self.get_net_position()
+        if volume <= 0:
+            self.write_log(f"{self.vt_symbol} 无多头持仓，无需市价卖出。")
+            return
 
-        # 使用 ccxt 执行市价卖出
-        self.exchange.create_market_sell_order(symbol, abs(position_amt))
-        self.write_log(f"已市价卖出 {btc_position} 个 {symbol}。")
-        self.is_sell_outed = True
\ No newline at end of file
+        self.write_log(f"持有 {volume} 个 {self.vt_symbol}，未找到止损单，准备市价卖出。")
+        self.send_market_order(Direction.SHORT, Offset.CLOSE, volume)
@@ -24,6 +24,7 @@ class SpotGridStrategy(CtaTemplate):
 
     """
     author = "51bitquant"
+    depth = 1  # 只用到买一价, 订阅 bookTicker
 
     # parameters
     upper_price = 0.0  # The grid strategy high/upper price 执行策略的最高价.
@@ -32,6 +33,7 @@ class SpotGridStrategy(CtaTemplate):
     order_volume = 0.0  # order volume  每次下单的数量.
     invest_coin = "USDT"  # the coin you use to buy/trade.
     max_open_orders = 5  # max open price  一边订单的数量.
+    rolling_window = False  # only move the orders out of the max_open_orders window when price runs 滚动窗口改单.
 
     # the strategy will stop when the price break the upper/bottom price, if you set the close_position when stop True,
     # it will automatically close your position.
@@ -41,7 +43,8 @@ class SpotGridStrategy(CtaTemplate):
     step_price = 0.0  # price step between two grid 网格的间隔
     trade_times = 0  # trade times
 
-    parameters = ["upper_price", "bottom_price", "grid_number", "order_volume", "invest_coin", "max_open_orders"]
+    parameters = ["upper_price", "bottom_price", "grid_number", "order_volume", "invest_coin", "max_open_orders",
+                  "rolling_window"]
 
     variables = ["avg_price", "step_price", "trade_times"]
 
@@ -59,6 +62,8 @@ class SpotGridStrategy(CtaTemplate):
         self.count_timer = 0
         self.cancel_order_timer = 0
 
+        self.replacing_orderids = set()  # orders being cancel-replaced, waiting for the final status
+
     def on_init(self):
         """
         Callback when strategy is inited.
@@ -127,45 +132,49 @@ class SpotGridStrategy(CtaTemplate):
                 if cancel_order_id:
                     self.cancel_order(cancel_order_id)
 
+            if self.rolling_window:
+                self.requote_window()
+
         self.cancel_order_timer += 1
         if self.cancel_order_timer >= 120:
             self.cancel_order_timer = 0
 
-            if not self.tick:
-                return None
-
-            trade_balance: Optional[AccountData] = self.get_trade_coin_balance()
-            invest_balance: Optional[AccountData] = self.get_invest_coin_balance()
-
-            if trade_balance and trade_balance.available < self.order_volume and len(
-                    self.short_orders_dict.keys()) == 0 and len(self.long_orders_dict.keys()) > 0:
-                # no short orders and no balance for sending sell order, we will cancel all order if the price move against the long order's price too far.
-                # 没有卖单，只有买单的时候，检查买单的最新价格是不是偏离盘口价格太远，如果太远就撤单。
-                vt = list(self.long_orders_dict.keys())[0]
-                highest_price = self.long_orders_dict[vt]
-
-                for orderid in self.long_orders_dict.keys():
-                    order_price = self.long_orders_dict[orderid]
-                    if highest_price <= order_price:
-                        highest_price = order_price
-
-                if float(self.tick.bid_price_1) - highest_price > 2 * float(self.step_price):
-                    self.cancel_all()
-
-            if invest_balance and invest_balance.available < float(self.tick.bid_price_1) * self.order_volume and len(
-                    self.long_orders_dict.keys()) == 0 and len(self.short_orders_dict.keys()) > 0:
-                # no long orders and no balance for sending buy order, we will cancel all order if the price move against the short order's price too far.
-                # 买单位空，只有卖单的时候，也检查下卖单和盘口的价格是不是偏离太远了。
-                vt = list(self.short_orders_dict.keys())[0]
-                lowest_price = self.short_orders_dict[vt]
-
-                for orderid in self.short_orders_dict.keys():
-                    order_price = self.short_orders_dict[orderid]
-                    if lowest_price >= order_price:
-                        lowest_price = order_price
-
-                if lowest_price - float(self.tick.bid_price_1) > 2 * float(self.step_price):
-                    self.cancel_all()
+            if self.tick:
+                trade_balance: Optional[AccountData] = self.get_trade_coin_balance()
+                invest_balance: Optional[AccountData] = self.get_invest_coin_balance()
+
+                if trade_balance and trade_balance.available < self.order_volume and len(
+                        self.short_orders_dict.keys()) == 0 and len(self.long_orders_dict.keys()) > 0:
+                    # no short orders and no balance for sending sell order, we will cancel all order if the price move against the long order's price too far.
+                    # 没有卖单，只有买单的时候，检查买单的最新价格是不是偏离盘口价格太远，如果太远就撤单。
+                    vt = list(self.long_orders_dict.keys())[0]
+                    highest_price = self.long_orders_dict[vt]
+
+                    for orderid in self.long_orders_dict.keys():
+                        order_price = self.long_orders_dict[orderid]
+                        if highest_price <= order_price:
+                            highest_price = order_price
+
+                    # 滚动窗口模式下, 挂单已经由 requote_window 跟随价格移动
+                    if float(self.tick.bid_price_1) - highest_price > 2 * float(self.step_price) \
+                            and not self.rolling_window:
+                        self.recenter_long_orders()
+
+                if invest_balance and invest_balance.available < float(self.tick.bid_price_1) * self.order_volume and len(
+                        self.long_orders_dict.keys()) == 0 and len(self.short_orders_dict.keys()) > 0:
+                    # no long orders and no balance for sending buy order, we will cancel all order if the price move against the short order's price too far.
+                    # 买单位空，只有卖单的时候，也检查下卖单和盘口的价格是不是偏离太远了。
+                    vt = list(self.short_orders_dict.keys())[0]
+                    lowest_price = self.short_orders_dict[vt]
+
+                    for orderid in self.short_orders_dict.keys():
+                        order_price = self.short_orders_dict[orderid]
+                        if lowest_price >= order_price:
+                            lowest_price = order_price
+
+                    if lowest_price - float(self.tick.bid_price_1) > 2 * float(self.step_price) \
+                            and not self.rolling_window:
+                        self.recenter_short_orders()
 
         self.put_event()
 
@@ -245,11 +254,7 @@ class SpotGridStrategy(CtaTemplate):
                 short_price = float(order.price) + float(self.step_price)
 
                 if short_price <= self.upper_price:
-
-                    orders_ids = self.sell(short_price, self.order_volume)
-
-                    for orderid in orders_ids:
-                        self.short_orders_dict[orderid] = short_price
+                    self.place_short_order(short_price)
 
                 if len(self.long_orders_dict.keys()) < self.max_open_orders:
                     count = len(self.long_orders_dict.keys()) + 1
@@ -267,9 +272,7 @@ class SpotGridStrategy(CtaTemplate):
                 long_price = float(order.price) - float(self.step_price)
 
                 if long_price >= self.bottom_price:
-                    orders_ids = self.buy(long_price, self.order_volume)
-                    for orderid in orders_ids:
-                        self.long_orders_dict[orderid] = long_price
+                    self.place_long_order(long_price)
 
                 if len(self.short_orders_dict.keys()) < self.max_open_orders:
                     count = len(self.short_orders_dict.keys()) + 1
@@ -281,6 +284,8 @@ class SpotGridStrategy(CtaTemplate):
                             self.short_orders_dict[orderid] = short_price
 
         if not order.is_active():
+            self.replacing_orderids.discard(order.vt_orderid)
+
             if order.vt_orderid in self.long_orders_dict.keys():
                 del self.long_orders_dict[order.vt_orderid]
 
@@ -290,6 +295,149 @@ class SpotGridStrategy(CtaTemplate):
 
         self.put_event()
 
+    def place_long_order(self, price: float):
+        """
+        Send a buy order, if the long side is full, the lowest buy order is moved to price
+        by cancel-replace instead of cancelling it later on timer.
+        """
+        if len(self.long_orders_dict.keys()) >= self.max_open_orders > 0:
+            farthest_id = min(self.long_orders_dict.keys(), key=lambda k: self.long_orders_dict[k])
+            if self.long_orders_dict[farthest_id] < price:
+                self.replace_long_order(farthest_id, price)
+                return
+
+        orders_ids = self.buy(price, self.order_volume)
+        for orderid in orders_ids:
+            self.long_orders_dict[orderid] = price
+
+    def place_short_order(self, price: float):
+        """
+        Send a sell order, if the short side is full, the highest sell order is moved to price
+        by cancel-replace instead of cancelling it later on timer.
+        """
+        if len(self.short_orders_dict.keys()) >= self.max_open_orders > 0:
+            farthest_id = max(self.short_orders_dict.keys(), key=lambda k: self.short_orders_dict[k])
+            if self.short_orders_dict[farthest_id] > price:
+                self.replace_short_order(farthest_id, price)
+                return
+
+        orders_ids = self.sell(price, self.order_volume)
+        for orderid in orders_ids:
+            self.short_orders_dict[orderid] = price
+
+    def replace_long_order(self, vt_orderid: str, price: float):
+        """
+        Move a buy order to price. The original orderid is kept in the dict until its
+        cancelled/traded status arrives, so a fill that beats the cancel is still handled.
+        """
+        orders_ids = self.replace_order(vt_orderid, price, self.order_volume)
+        for orderid in orders_ids:
+            self.long_orders_dict[orderid] = price
+            self.replacing_orderids.add(vt_orderid)
+
+    def replace_short_order(self, vt_orderid: str, price: float):
+        """
+        Move a sell order to price, see replace_long_order.
+        """
+        orders_ids = self.replace_order(vt_orderid, price, self.order_volume)
+        for orderid in orders_ids:
+            self.short_orders_dict[orderid] = price
+            self.replacing_orderids.add(vt_orderid)
+
+    def get_level(self, price: float) -> int:
+        """
+        Return the grid level index of price.
+        """
+        return round((price - self.bottom_price) / self.step_price)
+
+    def get_level_price(self, level: int) -> float:
+        """
+        Return the price of grid level index.
+        """
+        return self.bottom_price + level * self.step_price
+
+    def requote_window(self):
+        """
+        Keep max_open_orders orders on each side around the market price. Only the orders
+        out of the window are moved into the missing levels, one cancel-replace per level
+        crossed, so the cost is proportional to the price movement instead of the grid width.
+        """
+        if not self.tick or not self.step_price:
+            return
+
+        mid_level = self.get_level(float(self.tick.bid_price_1))
+
+        # nearest level first
+        long_window = []
+        short_window = []
+        for i in range(self.max_open_orders):
+            long_level = mid_level - i - 1
+            if self.get_level_price(long_level) >= self.bottom_price:
+                long_window.append(long_level)
+
+            short_level = mid_level + i + 1
+            if self.get_level_price(short_level) <= self.upper_price:
+                short_window.append(short_level)
+
+        for orderid, level in self.get_window_moves(self.long_orders_dict, long_window, mid_level):
+            self.replace_long_order(orderid, self.get_level_price(level))
+
+        for orderid, level in self.get_window_moves(self.short_orders_dict, short_window, mid_level):
+            self.replace_short_order(orderid, self.get_level_price(level))
+
+    def get_window_moves(self, orders_dict: dict, window: list, mid_level: int) -> list:
+        """
+        Pair the orders out of the window (farthest first) with the missing levels of the window
+        (nearest first), return list of (vt_orderid, level).
+        """
+        quoted_levels = set()
+        stale_orders = []
+
+        for orderid, price in orders_dict.items():
+            if orderid in self.replacing_orderids:
+                continue
+
+            level = self.get_level(price)
+            if level in window and level not in quoted_levels:
+                quoted_levels.add(level)
+            else:
+                stale_orders.append((abs(level - mid_level), orderid))
+
+        if not stale_orders:
+            return []
+
+        stale_orders.sort(reverse=True)
+        missing_levels = [level for level in window if level not in quoted_levels]
+
+        return [(orderid, level) for (_, orderid), level in zip(stale_orders, missing_levels)]
+
+    def recenter_long_orders(self):
+        """
+        Move buy orders under the market price by cancel-replace, the farthest order
+        goes to the nearest grid price, so the book is never empty while recentering.
+        """
+        mid_count = round((float(self.tick.bid_price_1) - self.bottom_price) / self.step_price)
+        orderids = sorted(self.long_orders_dict.keys(), key=lambda k: self.long_orders_dict[k])
+
+        for i, orderid in enumerate(orderids):
+            price = self.bottom_price + (mid_count - i - 1) * self.step_price
+            if price < self.bottom_price:
+                break
+            self.replace_long_order(orderid, price)
+
+    def recenter_short_orders(self):
+        """
+        Move sell orders above the market price by cancel-replace, see recenter_long_orders.
+        """
+        mid_count = round((float(self.tick.bid_price_1) - self.bottom_price) / self.step_price)
+        orderids = sorted(self.short_orders_dict.keys(), key=lambda k: -self.short_orders_dict[k])
+
+        for i, orderid in enumerate(orderids):
+            price = self.bottom_price + (mid_count + i + 1) * self.step_price
+            if price > self.upper_price:
+                break
+            self.replace_short_order(orderid, price)
+
     def on_trade(self, trade: TradeData):
         """
         Callback of new trade data update.
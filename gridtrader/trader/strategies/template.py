@@ -1,7 +1,7 @@
 """"""
 from abc import ABC
 from copy import copy
-from typing import Any
+from typing import Any, Callable, List
 
 from gridtrader.trader.constant import Direction, Offset
 from gridtrader.trader.object import TickData, OrderData, TradeData
@@ -15,6 +15,8 @@ class CtaTemplate(ABC):
     parameters = []
     variables = []
 
+    depth = 5  # depth levels of tick data used by strategy, 1 for best bid and ask only
+
     def __init__(
             self,
             cta_engine: Any,
@@ -76,6 +78,15 @@ class CtaTemplate(ABC):
             strategy_variables[name] = getattr(self, name)
         return strategy_variables
 
+    def load_variables(self, data: dict):
+        """
+        Restore strategy variables from data saved by sync_data.
+        """
+        for name in self.variables:
+            value = data.get(name, None)
+            if value:
+                setattr(self, name, value)
+
     def get_data(self):
         """
         Get strategy data.
@@ -132,6 +143,13 @@ class CtaTemplate(ABC):
         """
         pass
 
+    @virtual
+    def on_modify_failed(self, vt_orderid: str):
+        """
+        Callback when amending price and volume of an order failed on server.
+        """
+        pass
+
 
     def buy(self, price: float, volume: float):
         """
@@ -169,6 +187,36 @@ class CtaTemplate(ABC):
         else:
             return []
 
+    def send_stop_order(self, direction: Direction, price: float, volume: float):
+        """
+        Send a reduce only stop market order which is triggered on server side.
+        """
+        if self.trading:
+            return self.cta_engine.send_stop_order(self, direction, price, volume)
+        else:
+            return []
+
+    def send_market_order(self, direction: Direction, offset: Offset, volume: float):
+        """
+        Send a market order.
+        """
+        if self.trading:
+            return self.cta_engine.send_market_order(self, direction, offset, volume)
+        else:
+            return []
+
+    def query_trades(self, limit: int, callback: Callable[[List[TradeData]], None]):
+        """
+        Query recent trades of trading contract, callback is called when data arrives.
+        """
+        self.cta_engine.query_trades(self, limit, callback)
+
+    def get_net_position(self) -> float:
+        """
+        Return the net position of trading contract from local cache.
+        """
+        return self.cta_engine.get_net_position(self)
+
     def cancel_order(self, vt_orderid: str):
         """
         Cancel an existing order.
@@ -176,6 +224,24 @@ class CtaTemplate(ABC):
         if self.trading:
             self.cta_engine.cancel_order(self, vt_orderid)
 
+    def replace_order(self, vt_orderid: str, price: float, volume: float):
+        """
+        Cancel an existing order and send a new one at price in a single request.
+        """
+        if self.trading:
+            return self.cta_engine.replace_order(self, vt_orderid, price, volume)
+        else:
+            return []
+
+    def modify_order(self, vt_orderid: str, price: float, volume: float) -> bool:
+        """
+        Amend price and volume of an existing order, return False if not supported.
+        """
+        if self.trading:
+            return self.cta_engine.modify_order(self, vt_orderid, price, volume)
+        else:
+            return False
+
     def cancel_all(self):
         """
         Cancel all orders sent by strategy.
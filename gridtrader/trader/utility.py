@@ -4,9 +4,13 @@ General utility functions.
 
 import json
 import logging
+import os
 import sys
+import time
+import zlib
+from collections import deque
 from pathlib import Path
-from typing import Callable, Dict, Tuple
+from typing import Callable, Deque, Dict, List, Set, Tuple
 from decimal import Decimal, ROUND_DOWN
 
 from .constant import Exchange
@@ -102,15 +106,19 @@ def load_json(filename: str) -> dict:
 def save_json(filename: str, data: dict) -> None:
     """
     Save data into json file in temp path.
+    Data is written into a temp file first and then renamed, so the file
+    is never left half written if the programme exits during saving.
     """
     filepath = get_file_path(filename)
-    with open(filepath, mode="w+", encoding="UTF-8") as f:
+    temp_filepath = filepath.with_name(filepath.name + ".tmp")
+    with open(temp_filepath, mode="w+", encoding="UTF-8") as f:
         json.dump(
             data,
             f,
             indent=4,
             ensure_ascii=False
         )
+    os.replace(temp_filepath, filepath)
 
 
 def round_to(value: float, target: Decimal) -> Decimal:
@@ -130,6 +138,132 @@ def floor_to(value: float, target: Decimal) -> Decimal:
 
     return result
 
+
+class PriceScale:
+    """
+    Fixed-point scale of a contract. Prices and volumes are integer counts of
+    price tick and min volume, and only converted to Decimal for order requests.
+    """
+
+    def __init__(self, price_tick: Decimal, min_volume: Decimal):
+        """"""
+        self.price_tick: Decimal = Decimal(str(price_tick))
+        self.min_volume: Decimal = Decimal(str(min_volume))
+
+        self.tick_value: float = float(self.price_tick)
+        self.lot_value: float = float(self.min_volume)
+
+    def to_ticks(self, price: float) -> int:
+        """
+        Round price to the nearest number of price ticks.
+        """
+        return int(round(price / self.tick_value))
+
+    def to_lots(self, volume: float) -> int:
+        """
+        Floor volume to number of min volume, with tolerance of float error.
+        """
+        return int(volume / self.lot_value + 1e-9)
+
+    def to_price(self, ticks: int) -> Decimal:
+        """"""
+        return self.price_tick * ticks
+
+    def to_volume(self, lots: int) -> Decimal:
+        """"""
+        return self.min_volume * lots
+
+    def round_price(self, price: float) -> Decimal:
+        """"""
+        return self.price_tick * int(round(price / self.tick_value))
+
+    def floor_volume(self, volume: float) -> Decimal:
+        """"""
+        return self.min_volume * int(volume / self.lot_value + 1e-9)
+
+
+def _get_decimals(values: List[float]) -> int:
+    """
+    Get max number of decimal places of float values.
+    """
+    decimals = 0
+    for value in values:
+        exponent = Decimal(repr(value)).as_tuple().exponent
+        decimals = max(decimals, -exponent)
+    return decimals
+
+
+def _delta_encode(values: List[float], decimals: int) -> List[int]:
+    """"""
+    result = []
+    last = 0
+    for value in values:
+        n = int(Decimal(repr(value)).scaleb(decimals))
+        result.append(n - last)
+        last = n
+    return result
+
+
+def _delta_decode(deltas: List[int], decimals: int) -> List[float]:
+    """"""
+    result = []
+    n = 0
+    for delta in deltas:
+        n += delta
+        result.append(float(Decimal(n).scaleb(-decimals)))
+    return result
+
+
+def encode_price_volume(price_volume: Dict[float, float]) -> dict:
+    """
+    Encode grid price volume dict into delta encoded integer arrays with a crc32 checksum.
+    Prices of a grid have same step, so the price array is mostly the same small number.
+    """
+    prices = sorted(price_volume)
+    volumes = [price_volume[price] for price in prices]
+
+    price_decimals = _get_decimals(prices)
+    volume_decimals = _get_decimals(volumes)
+
+    body = [
+        price_decimals,
+        volume_decimals,
+        _delta_encode(prices, price_decimals),
+        _delta_encode(volumes, volume_decimals)
+    ]
+    crc = zlib.crc32(json.dumps(body).encode())
+
+    return {
+        "price_decimals": body[0],
+        "volume_decimals": body[1],
+        "prices": body[2],
+        "volumes": body[3],
+        "crc": crc
+    }
+
+
+def decode_price_volume(data: dict) -> Dict[float, float]:
+    """
+    Decode price volume dict encoded by encode_price_volume, raise ValueError if data is broken.
+    """
+    try:
+        body = [
+            data["price_decimals"],
+            data["volume_decimals"],
+            data["prices"],
+            data["volumes"]
+        ]
+    except (KeyError, TypeError):
+        raise ValueError("Invalid price volume data")
+
+    if zlib.crc32(json.dumps(body).encode()) != data.get("crc", None):
+        raise ValueError("Price volume data checksum mismatch")
+
+    prices = _delta_decode(body[2], body[0])
+    volumes = _delta_decode(body[3], body[1])
+    return dict(zip(prices, volumes))
+
+
 def virtual(func: Callable) -> Callable:
     """
     mark a function as "virtual", which means that this function can be override.
@@ -214,4 +348,56 @@ class GridPositionCalculator(object):
                     self.avg_price = (abs(previous_pos) * previous_avg + volume * price) / abs(self.pos)
 
                 elif previous_pos > 0 > self.pos:
-                    self.avg_price = price
\ No newline at end of file
+                    self.avg_price = price
+
+
+class TradeIdFilter:
+    """
+    Bounded filter of duplicate trade ids.
+
+    Trade ids are kept in a set for lookup and in a deque by arrival order,
+    the oldest ids are dropped when size is exceeded or after ttl seconds.
+    """
+
+    def __init__(self, size: int = 100000, ttl: float = 86400):
+        """"""
+        self.size: int = size
+        self.ttl: float = ttl
+
+        self.ids: Set[str] = set()
+        self.queue: Deque[Tuple[float, str]] = deque()
+
+        self.hits: int = 0  # duplicate trades filtered
+        self.misses: int = 0  # new trades
+
+    def __len__(self) -> int:
+        """"""
+        return len(self.ids)
+
+    def is_duplicate(self, tradeid: str) -> bool:
+        """
+        Check if trade id is seen before, new trade id is recorded.
+        """
+        now = time.monotonic()
+        self._expire(now)
+
+        if tradeid in self.ids:
+            self.hits += 1
+            return True
+
+        self.misses += 1
+        self.ids.add(tradeid)
+        self.queue.append((now, tradeid))
+
+        if len(self.queue) > self.size:
+            _, old_tradeid = self.queue.popleft()
+            self.ids.discard(old_tradeid)
+
+        return False
+
+    def _expire(self, now: float) -> None:
+        """"""
+        queue = self.queue
+        while queue and now - queue[0][0] > self.ttl:
+            _, old_tradeid = queue.popleft()
+            self.ids.discard(old_tradeid)
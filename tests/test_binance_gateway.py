@@ -0,0 +1,149 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock
+
+from gridtrader.gateway.binance.binance_gateway import BinanceRestApi
+from gridtrader.trader.constant import Direction, Exchange, OrderType, Status
+from gridtrader.trader.object import CancelRequest, OrderData, OrderRequest
+
+
+class TestCancelReplace(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.gateway = Mock()
+        self.gateway.gateway_name = "Spot"
+
+        self.pushed = []
+        self.gateway.on_order = Mock(side_effect=lambda order, local=False: self.pushed.append((order.orderid, order.status)))
+
+        self.pre_order = OrderData(
+            symbol="btcusdt",
+            exchange=Exchange.BINANCE,
+            orderid="x-1",
+            type=OrderType.LIMIT,
+            direction=Direction.LONG,
+            price=Decimal("90000"),
+            volume=Decimal("0.001"),
+            status=Status.NOTTRADED,
+            gateway_name="Spot"
+        )
+        self.gateway.active_orders = {self.pre_order.vt_orderid: self.pre_order}
+
+        self.rest_api = BinanceRestApi(self.gateway)
+        self.rest_api.query_order = Mock()
+
+        self.cancel_req = CancelRequest(orderid="x-1", symbol="btcusdt", exchange=Exchange.BINANCE)
+        self.order = OrderData(
+            symbol="btcusdt",
+            exchange=Exchange.BINANCE,
+            orderid="x-2",
+            type=OrderType.LIMIT,
+            direction=Direction.LONG,
+            price=Decimal("90100"),
+            volume=Decimal("0.001"),
+            status=Status.SUBMITTING,
+            gateway_name="Spot"
+        )
+
+    def replace_failed(self, status_code: int, data: dict):
+        """模拟 cancelReplace 失败的返回"""
+        request = Mock()
+        request.extra = (self.cancel_req, self.order)
+        request.response.json = Mock(return_value={
+            "code": -2021 if data["cancelResult"] == "SUCCESS" else -2022,
+            "msg": "Order cancel-replace failed.",
+            "data": data
+        })
+        self.rest_api.on_replace_order_failed(status_code, request)
+
+    def test_replace_success(self):
+        """测试撤单和新单都成功"""
+        request = Mock()
+        request.extra = (self.cancel_req, self.order)
+        self.rest_api.on_replace_order({"cancelResult": "SUCCESS", "newOrderResult": "SUCCESS"}, request)
+
+        self.assertEqual(self.pushed, [("x-1", Status.CANCELLED), ("x-2", Status.NOTTRADED)])
+        self.rest_api.query_order.assert_not_called()
+
+    def test_new_order_failed(self):
+        """测试撤单成功但新单失败"""
+        self.replace_failed(409, {
+            "cancelResult": "SUCCESS",
+            "newOrderResult": "FAILURE",
+            "cancelResponse": {"clientOrderId": "x-1", "status": "CANCELED"},
+            "newOrderResponse": {"code": -2010, "msg": "Order would immediately match and take."}
+        })
+
+        self.assertEqual(self.pushed, [("x-1", Status.CANCELLED), ("x-2", Status.REJECTED)])
+        self.rest_api.query_order.assert_not_called()
+
+    def test_cancel_failed(self):
+        """测试撤单失败但新单成功, 原订单从服务器查询同步"""
+        self.replace_failed(409, {
+            "cancelResult": "FAILURE",
+            "newOrderResult": "SUCCESS",
+            "cancelResponse": {"code": -2011, "msg": "Unknown order sent."},
+            "newOrderResponse": {"clientOrderId": "x-2", "status": "NEW"}
+        })
+
+        self.assertEqual(self.pushed, [("x-2", Status.NOTTRADED)])
+        self.assertEqual(self.rest_api.query_order.call_args.args[0].orderid, "x-1")
+
+    def test_both_failed(self):
+        """测试撤单和新单都失败"""
+        self.replace_failed(400, {
+            "cancelResult": "FAILURE",
+            "newOrderResult": "FAILURE",
+            "cancelResponse": {"code": -2011, "msg": "Unknown order sent."},
+            "newOrderResponse": {"code": -1013, "msg": "Filter failure: PRICE_FILTER"}
+        })
+
+        self.assertEqual(self.pushed, [("x-2", Status.REJECTED)])
+        self.assertEqual(self.rest_api.query_order.call_args.args[0].orderid, "x-1")
+
+    def test_new_order_not_attempted(self):
+        """测试撤单失败时不提交新单 (STOP_ON_FAILURE)"""
+        self.replace_failed(400, {
+            "cancelResult": "FAILURE",
+            "newOrderResult": "NOT_ATTEMPTED",
+            "cancelResponse": {"code": -2011, "msg": "Unknown order sent."},
+            "newOrderResponse": None
+        })
+
+        self.assertEqual(self.pushed, [("x-2", Status.REJECTED)])
+        self.rest_api.query_order.assert_called_once()
+
+    def test_self_trade_prevention(self):
+        """测试下单和改单使用相同的自成交保护设置"""
+        self.rest_api.add_request = Mock()
+        self.rest_api.self_trade_prevention = "EXPIRE_TAKER"
+        order_req = OrderRequest(
+            symbol="btcusdt",
+            exchange=Exchange.BINANCE,
+            direction=Direction.LONG,
+            type=OrderType.LIMIT,
+            volume=Decimal("0.001"),
+            price=Decimal("90100")
+        )
+
+        self.rest_api.send_order(order_req)
+        self.rest_api.replace_order(self.cancel_req, order_req)
+
+        self.assertEqual(self.rest_api.add_request.call_count, 2)
+        for call in self.rest_api.add_request.call_args_list:
+            self.assertEqual(call.kwargs["params"]["selfTradePreventionMode"], "EXPIRE_TAKER")
+
+    def test_replace_error(self):
+        """测试请求异常时新单拒绝, 原订单从服务器查询同步"""
+        request = Mock()
+        request.extra = (self.cancel_req, self.order)
+        self.rest_api.on_error = Mock()
+        self.rest_api.on_replace_order_error(ConnectionError, ConnectionError(), None, request)
+
+        self.assertEqual(self.pushed, [("x-2", Status.REJECTED)])
+        self.rest_api.query_order.assert_called_once()
+        self.rest_api.on_error.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
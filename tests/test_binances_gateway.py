@@ -0,0 +1,90 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock
+
+from gridtrader.gateway.binances.binances_gateway import (
+    BinancesDataWebsocketApi,
+    BinancesRestApi,
+    BinancesTradeWebsocketApi
+)
+from gridtrader.trader.constant import Direction, Exchange
+from gridtrader.trader.object import ModifyRequest
+
+
+class TestFilterFrame(unittest.TestCase):
+    def test_trade_events(self):
+        """测试只解析账户和订单推送"""
+        trade_ws_api = BinancesTradeWebsocketApi(Mock())
+
+        self.assertEqual(
+            trade_ws_api.filter_frame(b'{"e":"ORDER_TRADE_UPDATE","E":1729300000125,"o":{}}'),
+            ("ORDER_TRADE_UPDATE", True)
+        )
+        self.assertEqual(
+            trade_ws_api.filter_frame(b'{"e":"MARGIN_CALL","E":1729300000125,"p":[]}'),
+            ("MARGIN_CALL", False)
+        )
+        self.assertEqual(trade_ws_api.filter_frame(b'{"E":1729300000125}'), ("", True))
+
+    def test_data_streams(self):
+        """测试按 stream 计数并丢弃未订阅的合约"""
+        market_ws_api = BinancesDataWebsocketApi(Mock())
+        market_ws_api.ticks["btcusdt"] = Mock()
+
+        self.assertEqual(
+            market_ws_api.filter_frame(b'{"stream":"btcusdt@depth@100ms","data":{}}'),
+            ("btcusdt@depth@100ms", True)
+        )
+        self.assertEqual(
+            market_ws_api.filter_frame(b'{"stream":"ethusdt@bookTicker","data":{}}'),
+            ("ethusdt@bookTicker", False)
+        )
+
+
+    def test_peek_event_time(self):
+        """测试不解析 json 读取事件时间"""
+        market_ws_api = BinancesDataWebsocketApi(Mock())
+
+        self.assertEqual(
+            market_ws_api.peek_event_time(b'{"stream":"btcusdt@bookTicker","data":{"e":"bookTicker","u":1,"E":1729300000124}}'),
+            1729300000124
+        )
+        self.assertEqual(market_ws_api.peek_event_time(b'{"result":null,"id":1}'), 0)
+
+
+class TestModifyOrder(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.gateway = Mock()
+        self.gateway.gateway_name = "Futures"
+
+        self.rest_api = BinancesRestApi(self.gateway)
+        self.rest_api.add_request = Mock()
+        self.rest_api.query_order = Mock()
+        self.rest_api.on_error = Mock()
+
+        self.req = ModifyRequest(
+            orderid="x-1",
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            direction=Direction.LONG,
+            price=Decimal("90000"),
+            volume=Decimal("0.001")
+        )
+
+    def test_modify_order_error(self):
+        """测试改单请求异常时推送改单失败并查询订单"""
+        self.rest_api.modify_order(self.req)
+        on_error = self.rest_api.add_request.call_args.kwargs["on_error"]
+
+        request = Mock()
+        request.extra = self.req
+        on_error(ConnectionError, ConnectionError(), None, request)
+
+        self.gateway.on_modify_failed.assert_called_once_with(self.req)
+        self.assertEqual(self.rest_api.query_order.call_args.args[0].orderid, "x-1")
+        self.rest_api.on_error.assert_not_called()
+
+
+if __name__ == '__main__':
+    unittest.main()
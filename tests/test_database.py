@@ -0,0 +1,96 @@
+import os
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+from decimal import Decimal
+from unittest.mock import Mock
+
+from gridtrader.trader.constant import Direction, Exchange
+from gridtrader.trader.database import SqliteStore
+from gridtrader.trader.object import TradeData
+
+
+class TestSqliteStore(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, "test.db")
+        self.store = SqliteStore(self.filename, interval=60)
+
+    def tearDown(self):
+        """关闭数据库并删除测试文件"""
+        self.store.close()
+        self.folder.cleanup()
+
+    def test_load_data_with_setting(self):
+        """测试只加载有配置的策略数据"""
+        self.store.save_setting("BTC", {"class_name": "FutureGridStrategy"})
+        self.store.update("BTC", {"pos": 1.5, "price_volume_dict": {100.0: 0.01}})
+        self.store.update("ETH", {"pos": 2})
+        self.store.close()
+
+        self.store = SqliteStore(self.filename, interval=60)
+        self.assertEqual(self.store.load_settings(), {"BTC": {"class_name": "FutureGridStrategy"}})
+        self.assertEqual(self.store.load(), {"BTC": {"pos": 1.5, "price_volume_dict": {"100.0": 0.01}}})
+
+    def test_load_trades_by_time(self):
+        """测试按策略和时间查询成交"""
+        now = datetime.now()
+        for i in range(3):
+            trade = TradeData(
+                gateway_name="BINANCES",
+                symbol="BTCUSDT",
+                exchange=Exchange.BINANCE,
+                orderid=str(i),
+                tradeid=str(i),
+                direction=Direction.LONG,
+                price=Decimal("100.5"),
+                volume=Decimal("0.01"),
+                datetime=now + timedelta(minutes=i)
+            )
+            self.store.save_trade("BTC", trade)
+            self.store.save_trade("BTC", trade)
+
+        trades = self.store.load_trades("BTC", start=now + timedelta(seconds=30))
+        self.assertEqual([t.tradeid for t in trades], ["1", "2"])
+        self.assertEqual(trades[0].price, Decimal("100.5"))
+        self.assertEqual(self.store.load_trades("ETH"), [])
+
+
+    def test_flush_failed(self):
+        """测试写入失败时保留本批数据, 下次写入时重试"""
+        trade = TradeData(
+            gateway_name="BINANCES",
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid="1",
+            tradeid="1",
+            direction=Direction.LONG,
+            price=Decimal("100.5"),
+            volume=Decimal("0.01"),
+            datetime=datetime.now()
+        )
+        self.store.save_setting("BTC", {"class_name": "FutureGridStrategy"})
+        self.store.save_trade("BTC", trade)
+        self.store.update("BTC", {"pos": 1})
+
+        connection = self.store.connection
+        self.store.connection = Mock(wraps=connection)
+        self.store.connection.__enter__ = Mock(side_effect=connection.__enter__)
+        self.store.connection.__exit__ = Mock(side_effect=connection.__exit__)
+        self.store.connection.execute = Mock(side_effect=sqlite3.OperationalError("database is locked"))
+
+        with self.assertRaises(sqlite3.OperationalError):
+            self.store.flush()
+
+        # 失败期间更新的数据覆盖失败批次中的旧数据
+        self.store.update("BTC", {"pos": 2})
+        self.store.connection = connection
+
+        self.assertEqual([t.tradeid for t in self.store.load_trades("BTC")], ["1"])
+        self.assertEqual(self.store.load(), {"BTC": {"pos": 2}})
+
+
+if __name__ == '__main__':
+    unittest.main()
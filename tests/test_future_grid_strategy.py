@@ -1,8 +1,9 @@
 import unittest
 from unittest.mock import Mock, patch
+from datetime import datetime
 from decimal import Decimal
 
-from gridtrader.trader.constant import Product, Exchange
+from gridtrader.trader.constant import Product, Exchange, Direction, Offset
 from gridtrader.trader.strategies.future_grid_strategy import FutureGridStrategy
 from gridtrader.trader.object import TickData, OrderData, ContractData, Status
 from gridtrader.trader.utility import GridPositionCalculator
@@ -150,5 +151,197 @@ class TestFutureGridStrategy(unittest.TestCase):
         self.strategy.long_orders_dict[test_order_id] = test_price
         self.assertIsInstance(self.strategy.long_orders_dict[test_order_id], float)
 
+    def test_load_variables(self):
+        """测试旧版本 price_volume_dict 的迁移和 grid_state 的恢复"""
+        self.strategy.load_variables({
+            "trade_times": 3,
+            "price_volume_dict": {"40000.0": 0.003, "40120.5": 0.002}
+        })
+        self.assertEqual(self.strategy.price_volume_dict, {40000.0: 0.003, 40120.5: 0.002})
+        grid_state = self.strategy.get_variables()["grid_state"]
+
+        strategy = FutureGridStrategy(self.cta_engine, "test_strategy", "BTC-USDT.BINANCE", {})
+        strategy.load_variables({"trade_times": 3, "grid_state": grid_state})
+        self.assertEqual(strategy.price_volume_dict, {40000.0: 0.003, 40120.5: 0.002})
+        self.assertEqual(strategy.trade_times, 3)
+
+        # 校验失败时丢弃保存的网格
+        grid_state["grid"]["prices"][1] += 1
+        strategy = FutureGridStrategy(self.cta_engine, "test_strategy", "BTC-USDT.BINANCE", {})
+        strategy.load_variables({"grid_state": grid_state})
+        self.assertEqual(strategy.price_volume_dict, {})
+
+    def test_restore_on_start(self):
+        """测试恢复的网格与设置一致时启动不重新计算, 设置变化后重新计算"""
+        self.strategy.price_volume_dict = {40000.0: 0.003, 40120.5: 0.002}
+        self.strategy.step_price = 120.5
+        self.strategy.update_grid_state()
+        data = self.strategy.get_variables()
+
+        strategy = FutureGridStrategy(self.cta_engine, "test_strategy", "BTC-USDT.BINANCE", self.strategy.get_parameters())
+        strategy.load_variables(data)
+        strategy.calculate_grid_parameters = Mock()
+        strategy.on_start()
+        strategy.calculate_grid_parameters.assert_not_called()
+        self.assertEqual(strategy.price_volume_dict, {40000.0: 0.003, 40120.5: 0.002})
+        self.assertEqual(strategy.step_price, 120.5)
+
+        setting = self.strategy.get_parameters()
+        setting["upper_price"] = 60000.0
+        strategy = FutureGridStrategy(self.cta_engine, "test_strategy", "BTC-USDT.BINANCE", setting)
+        strategy.load_variables(data)
+        strategy.calculate_grid_parameters = Mock()
+        strategy.on_start()
+        strategy.calculate_grid_parameters.assert_called_once()
+
+
+class TestAmendGridOrder(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.cta_engine = Mock()
+        self.cta_engine.modify_order = Mock(return_value=True)
+
+        self.strategy = FutureGridStrategy(
+            cta_engine=self.cta_engine,
+            strategy_name="test_strategy",
+            vt_symbol="BTCUSDT.BINANCE",
+            setting={"max_open_orders": 2}
+        )
+        self.strategy.trading = True
+        self.strategy.step_price = 10.0
+        self.strategy.buy = Mock(return_value=["Futures.new"])
+        self.strategy.long_orders_dict = {"Futures.1": 100.0, "Futures.2": 90.0}
+
+    def create_order(self, orderid: str, price: float) -> OrderData:
+        """创建订单推送"""
+        return OrderData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid=orderid,
+            price=Decimal(str(price)),
+            volume=Decimal("1"),
+            status=Status.NOTTRADED,
+            gateway_name="Futures"
+        )
+
+    def test_amend_when_full(self):
+        """测试多单已满时改价最远的订单, 收到新价格推送后才更新挂单字典"""
+        self.strategy.place_long_order(110.0, 1)
+
+        self.cta_engine.modify_order.assert_called_once_with(self.strategy, "Futures.2", 110.0, 1)
+        self.strategy.buy.assert_not_called()
+        self.assertEqual(self.strategy.long_orders_dict["Futures.2"], 90.0)
+
+        # 改单中的订单不会被再次选中
+        self.strategy.place_long_order(105.0, 1)
+        self.cta_engine.modify_order.assert_called_with(self.strategy, "Futures.1", 105.0, 1)
+
+        self.strategy.on_order(self.create_order("2", 90.0))
+        self.assertEqual(self.strategy.long_orders_dict["Futures.2"], 90.0)
+
+        self.strategy.on_order(self.create_order("2", 110.0))
+        self.assertEqual(self.strategy.long_orders_dict["Futures.2"], 110.0)
+        self.assertNotIn("Futures.2", self.strategy.amending_orders)
+
+    def test_amend_failed(self):
+        """测试改单失败后保留原价格, 订单可以再次改价"""
+        self.strategy.place_long_order(110.0, 1)
+        self.strategy.on_modify_failed("Futures.2")
+
+        self.assertEqual(self.strategy.long_orders_dict["Futures.2"], 90.0)
+        self.assertEqual(self.strategy.amending_orders, {})
+
+        self.strategy.place_long_order(110.0, 1)
+        self.assertEqual(self.cta_engine.modify_order.call_count, 2)
+        self.assertEqual(self.cta_engine.modify_order.call_args.args[1], "Futures.2")
+
+
+class TestStopOrder(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.cta_engine = Mock()
+        self.cta_engine.get_net_position = Mock(return_value=0.01)
+        self.cta_engine.send_stop_order = Mock(side_effect=[["Futures.stop_1"], ["Futures.stop_2"]])
+
+        self.strategy = FutureGridStrategy(
+            cta_engine=self.cta_engine,
+            strategy_name="test_strategy",
+            vt_symbol="BTCUSDT.BINANCE",
+            setting={"stop_loss_price": 90000.0}
+        )
+        self.strategy.trading = True
+
+    def create_stop_order(self, orderid: str, status: Status) -> OrderData:
+        """创建止损单推送"""
+        return OrderData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid=orderid,
+            price=Decimal("90000"),
+            volume=Decimal("0.01"),
+            status=status,
+            gateway_name="Futures"
+        )
+
+    def test_update_stop_order(self):
+        """测试持仓变化时撤销旧止损单并重新挂单"""
+        self.strategy.update_stop_order()
+        self.strategy.update_stop_order()
+        self.cta_engine.send_stop_order.assert_called_once_with(self.strategy, Direction.SHORT, 90000.0, 0.01)
+
+        self.cta_engine.get_net_position.return_value = 0.02
+        self.strategy.update_stop_order()
+
+        self.cta_engine.cancel_order.assert_called_once_with(self.strategy, "Futures.stop_1")
+        self.cta_engine.send_stop_order.assert_called_with(self.strategy, Direction.SHORT, 90000.0, 0.02)
+        self.assertEqual(self.strategy.stop_orderid, "Futures.stop_2")
+
+    def test_stop_order_traded(self):
+        """测试止损单成交后不再挂止损单"""
+        self.strategy.update_stop_order()
+        self.strategy.on_order(self.create_stop_order("stop_1", Status.ALLTRADED))
+
+        self.assertTrue(self.strategy.is_sell_outed)
+        self.assertEqual(self.strategy.stop_orderid, "")
+
+        self.strategy.update_stop_order()
+        self.assertEqual(self.cta_engine.send_stop_order.call_count, 1)
+
+    def set_price(self, price: float):
+        """设置最新价格"""
+        self.strategy.tick = TickData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            datetime=datetime.now(),
+            gateway_name="Futures",
+            bid_price_1=price
+        )
+
+    def test_stop_order_rejected(self):
+        """测试价格已穿过止损价时止损单被拒绝, 市价平仓且不再重复挂止损单"""
+        self.set_price(89900.0)
+        self.strategy.update_stop_order()
+        self.strategy.on_order(self.create_stop_order("stop_1", Status.REJECTED))
+
+        self.assertTrue(self.strategy.is_sell_outed)
+        self.cta_engine.send_market_order.assert_called_once_with(self.strategy, Direction.SHORT, Offset.CLOSE, 0.01)
+
+        self.strategy.update_stop_order()
+        self.assertEqual(self.cta_engine.send_stop_order.call_count, 1)
+
+    def test_stop_order_failed(self):
+        """测试超时或限频导致止损单被拒绝时不平仓, 重新挂止损单"""
+        self.set_price(95000.0)
+        self.strategy.update_stop_order()
+        self.strategy.on_order(self.create_stop_order("stop_1", Status.REJECTED))
+
+        self.assertFalse(self.strategy.is_sell_outed)
+        self.cta_engine.send_market_order.assert_not_called()
+        self.assertEqual(self.strategy.stop_orderid, "")
+
+        self.strategy.update_stop_order()
+        self.assertEqual(self.cta_engine.send_stop_order.call_count, 2)
+        self.assertEqual(self.strategy.stop_orderid, "Futures.stop_2")
+
 if __name__ == '__main__':
     unittest.main() 
\ No newline at end of file
@@ -0,0 +1,35 @@
+import unittest
+from decimal import Decimal
+
+from gridtrader.trader.constant import Exchange, Product
+from gridtrader.trader.normalizer import ContractNormalizer
+from gridtrader.trader.object import ContractData
+
+
+class TestContractNormalizer(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        contract = ContractData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            name="BTC/USDT",
+            product=Product.FUTURES,
+            price_tick=Decimal("0.10"),
+            min_volume=Decimal("0.001"),
+            min_notional=Decimal("100"),
+            gateway_name="Futures"
+        )
+        self.normalizer = ContractNormalizer(contract)
+
+    def test_normalize_many(self):
+        """测试网格价格和数量批量取整"""
+        levels = self.normalizer.normalize_many([90000.37, 0.3], [0.00219, 0.3])
+        self.assertEqual(levels, [(90000.3, 0.002), (0.3, 0.3)])
+
+        self.assertEqual(self.normalizer.normalize(90000.37, 0.00219), (Decimal("90000.40"), Decimal("0.002")))
+        self.assertTrue(self.normalizer.check_notional(90000.3, 0.002))
+        self.assertFalse(self.normalizer.check_notional(90000.3, 0.001))
+
+
+if __name__ == '__main__':
+    unittest.main()
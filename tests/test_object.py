@@ -0,0 +1,51 @@
+import unittest
+from copy import copy
+from datetime import datetime
+from decimal import Decimal
+
+from gridtrader.trader.constant import Exchange
+from gridtrader.trader.object import TickData, LazyTickData, OrderData
+
+
+class TestLazyTickData(unittest.TestCase):
+    def test_decode_on_access(self):
+        """测试深度字段在读取时解析"""
+        tick = TickData(
+            symbol="btcusdt",
+            exchange=Exchange.BINANCE,
+            datetime=datetime.now(),
+            gateway_name="Futures"
+        )
+        lazy_tick = LazyTickData(tick, [["100.1", "2"]], [["100.2", "3"], ["100.3", "1"]])
+
+        self.assertNotIn("bid_price_1", lazy_tick.__dict__)
+        self.assertEqual(lazy_tick.bid_price_1, Decimal("100.1"))
+        self.assertIn("bid_price_1", lazy_tick.__dict__)
+
+        self.assertEqual(lazy_tick.ask_volume_2, Decimal("1"))
+        self.assertEqual(lazy_tick.bid_price_2, Decimal("0"))
+        self.assertEqual(copy(lazy_tick).ask_price_1, Decimal("100.2"))
+        self.assertEqual(lazy_tick.vt_symbol, "btcusdt.BINANCE")
+
+
+class TestSlottedData(unittest.TestCase):
+    def test_copy(self):
+        """测试无 __dict__ 的订单数据复制"""
+        order = OrderData(
+            symbol="btcusdt",
+            exchange=Exchange.BINANCE,
+            orderid="1",
+            price=Decimal("100.1"),
+            gateway_name="Futures"
+        )
+        self.assertFalse(hasattr(order, "__dict__"))
+
+        new_order = copy(order)
+        new_order.price = Decimal("100.2")
+        self.assertEqual(order.price, Decimal("100.1"))
+        self.assertEqual(new_order.vt_orderid, "Futures.1")
+        self.assertIs(new_order.vt_symbol, order.vt_symbol)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,84 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import Mock
+
+from gridtrader.trader.constant import Exchange, Status
+from gridtrader.trader.engine import OmsEngine
+from gridtrader.trader.gateway import BaseGateway
+from gridtrader.trader.object import OrderData
+from gridtrader.trader.registry import OrderRegistry
+
+
+class FakeGateway(BaseGateway):
+    """只实现抽象方法的测试网关"""
+    connect = close = subscribe = send_order = cancel_order = Mock()
+    query_order = query_account = query_position = Mock()
+
+
+class TestOmsEngine(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.main_engine = Mock()
+        self.main_engine.order_registry = OrderRegistry()
+        self.oms_engine = OmsEngine(self.main_engine, Mock())
+
+        self.gateway = FakeGateway(Mock(), "BINANCES")
+        self.gateway.set_order_registry(self.main_engine.order_registry)
+        self.gateway.query_open_orders = Mock(return_value=True)
+        self.gateway.query_order = Mock()
+        self.main_engine.get_gateway = Mock(return_value=self.gateway)
+
+    def create_order(self, orderid: str, status: Status, traded: str = "0") -> OrderData:
+        """创建测试订单"""
+        return OrderData(
+            gateway_name="BINANCES",
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid=orderid,
+            traded=Decimal(traded),
+            status=status
+        )
+
+    def test_reconcile_orders(self):
+        """测试批量查询挂单后只单独查询消失的订单"""
+        for orderid in ["1", "2", "3"]:
+            self.gateway.on_order(self.create_order(orderid, Status.NOTTRADED))
+
+        self.oms_engine.reconcile_orders()
+        self.assertEqual(self.gateway.query_open_orders.call_count, 1)
+        callback = self.gateway.query_open_orders.call_args[0][0]
+
+        callback([
+            self.create_order("1", Status.NOTTRADED),
+            self.create_order("2", Status.PARTTRADED, "0.5"),
+            self.create_order("4", Status.NOTTRADED),
+        ])
+
+        self.assertEqual(self.gateway.query_order.call_count, 1)
+        self.assertEqual(self.gateway.query_order.call_args[0][0].orderid, "3")
+        self.assertEqual(self.main_engine.order_registry.get_order("BINANCES.2").traded, Decimal("0.5"))
+        self.assertEqual(
+            self.oms_engine.get_order_drift(),
+            {"reconcile": 1, "unknown": 1, "changed": 1, "missing": 1}
+        )
+
+    def test_trade_data_pushed_once(self):
+        """测试同一笔成交随新的订单状态再次推送时不重复计算"""
+        self.gateway.on_trade = Mock()
+        self.gateway.on_order(self.create_order("1", Status.NOTTRADED))
+
+        order = self.create_order("1", Status.PARTTRADED, "0.5")
+        order.trade_data = Mock()
+        self.gateway.on_order(order)
+        self.assertEqual(self.gateway.on_trade.call_count, 1)
+
+        # 撤单推送带着上一笔成交的数据, 成交量没有增加
+        cancelled = self.create_order("1", Status.CANCELLED, "0.5")
+        cancelled.trade_data = order.trade_data
+        self.gateway.on_order(cancelled)
+        self.assertEqual(self.gateway.on_trade.call_count, 1)
+        self.assertEqual(self.main_engine.order_registry.get_order("BINANCES.1").status, Status.CANCELLED)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,48 @@
+import unittest
+
+from gridtrader.trader.orderbook import OrderBook
+
+
+def depth_update(first_id, last_id, pre_id, bids=None, asks=None):
+    return {"U": first_id, "u": last_id, "pu": pre_id, "b": bids or [], "a": asks or []}
+
+
+class TestOrderBook(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.book = OrderBook("btcusdt")
+        self.snapshot = {
+            "lastUpdateId": 100,
+            "bids": [["99.0", "1"], ["100.0", "2"]],
+            "asks": [["101.0", "3"], ["102.0", "4"]],
+        }
+
+    def test_sync_with_buffered_events(self):
+        """测试快照到达前缓存增量，并按序号合并"""
+        self.assertFalse(self.book.apply_diff(depth_update(90, 95, 89, bids=[["98.0", "1"]])))
+        self.assertFalse(self.book.apply_diff(depth_update(96, 105, 95, bids=[["100.5", "1"]])))
+        self.assertTrue(self.book.apply_snapshot(self.snapshot))
+
+        self.assertTrue(self.book.apply_diff(depth_update(106, 110, 105, bids=[["100.0", "0"]], asks=[["100.8", "5"]])))
+        bids, asks = self.book.get_depth(2)
+        self.assertEqual(bids, [("100.5", "1"), ("99.0", "1")])
+        self.assertEqual(asks, [("100.8", "5"), ("101.0", "3")])
+        self.assertEqual(self.book.last_update_id, 110)
+
+    def test_resync_on_gap(self):
+        """测试序号不连续时重置订单簿"""
+        self.book.apply_snapshot(self.snapshot)
+        self.assertTrue(self.book.apply_diff(depth_update(99, 101, 98)))
+
+        self.assertFalse(self.book.apply_diff(depth_update(105, 106, 104)))
+        self.assertFalse(self.book.synced)
+        self.assertEqual(self.book.gap_count, 1)
+        self.assertEqual(self.book.get_depth(5), ([], []))
+
+        # 快照早于缓存的第一条增量，需要重新获取
+        self.assertFalse(self.book.apply_snapshot(self.snapshot))
+        self.assertFalse(self.book.synced)
+
+
+if __name__ == '__main__':
+    unittest.main()
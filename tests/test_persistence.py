@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from gridtrader.trader.persistence import StrategyDataWriter
+from gridtrader.trader.utility import get_file_path, get_folder_path, load_json
+
+
+class TestStrategyDataWriter(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.folder = tempfile.TemporaryDirectory()
+        self.filename = os.path.join(self.folder.name, "test_strategy_data_writer.json")
+        self.writer = StrategyDataWriter(self.filename, interval=60)
+        self.writer.load()
+
+    def tearDown(self):
+        """关闭并删除测试文件"""
+        self.writer.close()
+        self.folder.cleanup()
+
+    def test_update_is_coalesced(self):
+        """测试多次更新只写一条日志"""
+        for i in range(100):
+            self.writer.update("BTC", {"pos": i, "trade_times": i})
+
+        self.writer.flush()
+        self.writer.flush()
+        self.assertEqual(self.writer.wal_records, 1)
+        self.assertEqual(self.writer.write_count, 0)
+
+        self.writer.compact()
+        self.assertEqual(load_json(self.filename)["BTC"]["pos"], 99)
+
+    def test_update_copies_containers(self):
+        """测试写入的是更新时的快照"""
+        price_volume_dict = {100.0: 0.01}
+        self.writer.update("BTC", {"price_volume_dict": price_volume_dict})
+        price_volume_dict[101.0] = 0.02
+
+        self.writer.flush()
+        self.writer.compact()
+        self.assertEqual(load_json(self.filename)["BTC"]["price_volume_dict"], {"100.0": 0.01})
+
+    def test_wal_records_delta(self):
+        """测试日志只记录变化的变量"""
+        self.writer.update("BTC", {"pos": 1, "price_volume_dict": {100.0: 0.01, 101.0: 0.02}})
+        self.writer.flush()
+        self.writer.update("BTC", {"pos": 2, "price_volume_dict": {100.0: 0.01, 102.0: 0.03}})
+        record = self.writer._make_record("BTC", self.writer.pending["BTC"])
+
+        self.assertEqual(record["s"], {"pos": 2})
+        self.assertEqual(record["d"]["price_volume_dict"], {"s": {"102.0": 0.03}, "r": ["101.0"]})
+
+    def test_replay_wal(self):
+        """测试重启后用快照加日志恢复数据"""
+        self.writer.update("BTC", {"pos": 1, "price_volume_dict": {100.0: 0.01}})
+        self.writer.flush()
+        self.writer.compact()
+        self.writer.update("BTC", {"pos": 2, "price_volume_dict": {101.0: 0.02}})
+        self.writer.update("ETH", {"pos": 3})
+        self.writer.flush()
+
+        # 模拟崩溃: 不关闭直接重新加载
+        writer = StrategyDataWriter(self.filename, interval=60)
+        data = writer.load()
+
+        self.assertEqual(data["BTC"], {"pos": 2, "price_volume_dict": {"101.0": 0.02}})
+        self.assertEqual(data["ETH"], {"pos": 3})
+        self.assertEqual(list(get_folder_path(writer.wal_folder).glob("*.wal")), [])
+
+    def test_close_flushes(self):
+        """测试关闭时写入剩余数据"""
+        self.writer.start()
+        self.writer.update("ETH", {"pos": 1.5})
+        self.writer.close()
+
+        self.assertEqual(load_json(self.filename), {"ETH": {"pos": 1.5}})
+        self.assertFalse(get_file_path(self.filename + ".tmp").exists())
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,128 @@
+import unittest
+from copy import copy
+from decimal import Decimal
+from unittest.mock import patch
+
+from gridtrader.trader.constant import Exchange, Status
+from gridtrader.trader.object import OrderData
+from gridtrader.trader.registry import OrderRegistry
+
+
+class TestOrderRegistry(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.registry = OrderRegistry(grace_period=60)
+
+    def create_order(self, orderid: str, status: Status) -> OrderData:
+        """创建测试订单"""
+        return OrderData(
+            gateway_name="BINANCES",
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid=orderid,
+            status=status
+        )
+
+    def test_owner_orderids(self):
+        """测试策略的活动订单随订单状态更新"""
+        self.registry.update_order(self.create_order("1", Status.NOTTRADED))
+        self.registry.set_owner("BINANCES.1", "strategy", "BTC")
+        self.registry.set_owner("BINANCES.2", "strategy", "BTC")
+        self.assertEqual(sorted(self.registry.get_owner_orderids("BTC")), ["BINANCES.1", "BINANCES.2"])
+
+        self.registry.update_order(self.create_order("1", Status.ALLTRADED))
+        self.assertEqual(self.registry.get_owner_orderids("BTC"), ["BINANCES.2"])
+        self.assertEqual(self.registry.get_owner("BINANCES.1"), "strategy")
+        self.assertEqual(self.registry.get_counts(), {Status.ALLTRADED.value: 1})
+
+    def test_evict_after_grace_period(self):
+        """测试结束的订单在宽限期后被清除"""
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=0):
+            self.registry.update_order(self.create_order("1", Status.CANCELLED))
+            self.registry.set_owner("BINANCES.1", "strategy", "BTC")
+            self.registry.update_order(self.create_order("2", Status.NOTTRADED))
+
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=30):
+            self.assertEqual(self.registry.evict(), 0)
+
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=61):
+            self.assertEqual(self.registry.evict(), 1)
+
+        self.assertIsNone(self.registry.get_order("BINANCES.1"))
+        self.assertIsNone(self.registry.get_owner("BINANCES.1"))
+        self.assertEqual(len(self.registry.get_active_orders()), 1)
+
+    def test_tombstone_after_evict(self):
+        """测试清除后迟到的旧推送不会被当作新订单"""
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=0):
+            self.registry.update_order(self.create_order("1", Status.NOTTRADED))
+            self.registry.update_order(self.create_order("1", Status.CANCELLED))
+
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=61):
+            self.assertEqual(self.registry.evict(), 1)
+
+        self.assertFalse(self.registry.update_order(self.create_order("1", Status.NOTTRADED))[0])
+        self.assertIsNone(self.registry.get_order("BINANCES.1"))
+
+        # 超过保留期后不再记录
+        with patch("gridtrader.trader.registry.time.monotonic", return_value=61 + 86400):
+            self.registry.evict()
+        self.assertEqual(self.registry.tombstones, {})
+
+    def test_indexes(self):
+        """测试按品种, 备注和价格查询活动订单"""
+        order = self.create_order("1", Status.NOTTRADED)
+        order.price = 100.5
+        order.reference = "BTC"
+        self.registry.update_order(order)
+
+        # 推送的订单没有备注, 沿用之前的备注
+        order = self.create_order("1", Status.PARTTRADED)
+        order.price = 100.5
+        self.registry.update_order(order)
+
+        self.assertEqual(self.registry.get_active_orders_by_symbol("BTCUSDT.BINANCE"), [order])
+        self.assertEqual(self.registry.get_active_orders_by_reference("BTC"), [order])
+        self.assertEqual(self.registry.get_active_orders_by_price("BTCUSDT.BINANCE", 100.5), [order])
+
+        self.registry.update_order(self.create_order("1", Status.ALLTRADED))
+        self.assertEqual(self.registry.get_active_orders_by_symbol("BTCUSDT.BINANCE"), [])
+        self.assertEqual(self.registry.price_orders, {})
+
+    def test_drop_stale_update(self):
+        """测试迟到的查询结果不会让已成交订单恢复"""
+        order = self.create_order("1", Status.SUBMITTING)
+        self.assertTrue(self.registry.update_order(order)[0])
+
+        # 网关修改同一个订单对象后再次推送
+        order.status = Status.NOTTRADED
+        self.assertTrue(self.registry.update_order(order)[0])
+
+        filled = self.create_order("1", Status.ALLTRADED)
+        filled.traded = Decimal("1")
+        accepted, pre_sequence = self.registry.update_order(filled)
+        self.assertTrue(accepted)
+        self.assertTrue(pre_sequence.is_active())
+
+        self.assertFalse(self.registry.update_order(self.create_order("1", Status.NOTTRADED))[0])
+        self.assertFalse(self.registry.update_order(copy(filled))[0])
+        self.assertEqual(self.registry.get_order("BINANCES.1"), filled)
+        self.assertEqual((self.registry.stale_count, self.registry.duplicate_count), (1, 1))
+
+    def test_local_rejected(self):
+        """测试网关本地设置的拒单状态会被交易所的推送覆盖"""
+        self.registry.update_order(self.create_order("1", Status.SUBMITTING))
+        self.assertTrue(self.registry.update_order(self.create_order("1", Status.REJECTED), local=True)[0])
+        self.assertEqual(self.registry.get_active_orders(), [])
+
+        # 请求超时但订单实际已经提交
+        self.assertTrue(self.registry.update_order(self.create_order("1", Status.NOTTRADED))[0])
+        self.assertEqual(len(self.registry.get_active_orders()), 1)
+
+        # 交易所确认的最终状态不再被恢复
+        self.assertTrue(self.registry.update_order(self.create_order("1", Status.CANCELLED))[0])
+        self.assertFalse(self.registry.update_order(self.create_order("1", Status.NOTTRADED))[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,150 @@
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from itertools import count
+from unittest.mock import Mock
+
+from gridtrader.trader.constant import Direction, Exchange
+from gridtrader.trader.strategies.spot_grid_strategy import SpotGridStrategy
+from gridtrader.trader.object import OrderData, Status, TickData
+
+
+class SpotGridTestCase(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.cta_engine = Mock()
+        orderids = count(1)
+        self.cta_engine.replace_order = Mock(side_effect=lambda *args: [f"new_{next(orderids)}"])
+
+        self.strategy = SpotGridStrategy(
+            cta_engine=self.cta_engine,
+            strategy_name="test_strategy",
+            vt_symbol="BTCUSDT.BINANCE",
+            setting={
+                "upper_price": 200.0,
+                "bottom_price": 100.0,
+                "grid_number": 100,
+                "order_volume": 1.0,
+                "max_open_orders": 3,
+                "rolling_window": True
+            }
+        )
+        self.strategy.trading = True
+        self.strategy.step_price = 1.0
+
+        # 价格在 150 时的满窗口挂单
+        self.strategy.long_orders_dict = {"long_149": 149.0, "long_148": 148.0, "long_147": 147.0}
+        self.strategy.short_orders_dict = {"short_151": 151.0, "short_152": 152.0, "short_153": 153.0}
+
+    def set_price(self, price: float):
+        """设置最新价格"""
+        self.strategy.tick = TickData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            datetime=datetime.now(),
+            gateway_name="Spot",
+            bid_price_1=price
+        )
+
+    def get_replaced(self) -> list:
+        """返回改单的 (原订单号, 新价格)"""
+        return [(c.args[1], c.args[2]) for c in self.cta_engine.replace_order.call_args_list]
+
+
+class TestRollingWindow(SpotGridTestCase):
+    def test_full_window(self):
+        """测试窗口已满时不改单"""
+        self.set_price(150.0)
+        self.strategy.requote_window()
+
+        self.assertEqual(self.get_replaced(), [])
+
+    def test_move_up(self):
+        """测试价格上涨一格, 最远的买单移到最近的买价, 最近的卖单移到窗口外侧"""
+        self.set_price(151.0)
+        self.strategy.requote_window()
+
+        self.assertEqual(self.get_replaced(), [("long_147", 150.0), ("short_151", 154.0)])
+        self.assertEqual(self.strategy.replacing_orderids, {"long_147", "short_151"})
+
+        # 改单中的订单在最终状态前不会再次移动
+        self.cta_engine.replace_order.reset_mock()
+        self.strategy.requote_window()
+        self.assertEqual(self.get_replaced(), [])
+
+    def test_move_down(self):
+        """测试价格下跌一格"""
+        self.set_price(149.0)
+        self.strategy.requote_window()
+
+        self.assertEqual(self.get_replaced(), [("long_149", 146.0), ("short_153", 150.0)])
+
+    def test_jump_levels(self):
+        """测试价格一次跳过多格, 最远的订单配对最近的空缺价位"""
+        # 网格序号从 bottom_price 起算, 价格 153 为第 53 格
+        moves = self.strategy.get_window_moves(self.strategy.long_orders_dict, [52, 51, 50], 53)
+        self.assertEqual(moves, [("long_147", 52), ("long_148", 51), ("long_149", 50)])
+
+        moves = self.strategy.get_window_moves(self.strategy.short_orders_dict, [54, 55, 56], 53)
+        self.assertEqual(moves, [("short_151", 54), ("short_152", 55), ("short_153", 56)])
+
+        # 跳两格时仍在窗口内的订单不动
+        moves = self.strategy.get_window_moves(self.strategy.long_orders_dict, [51, 50, 49], 52)
+        self.assertEqual(moves, [("long_147", 51), ("long_148", 50)])
+
+        self.set_price(153.0)
+        self.strategy.requote_window()
+        self.assertEqual(len(self.get_replaced()), 6)
+
+
+class TestReplaceOrder(SpotGridTestCase):
+    def create_order(self, vt_orderid: str, price: float, status: Status) -> OrderData:
+        """创建订单推送"""
+        gateway_name, orderid = vt_orderid.split(".")
+        return OrderData(
+            symbol="BTCUSDT",
+            exchange=Exchange.BINANCE,
+            orderid=orderid,
+            direction=Direction.LONG,
+            price=Decimal(str(price)),
+            volume=Decimal("1"),
+            status=status,
+            gateway_name=gateway_name
+        )
+
+    def test_replace_when_full(self):
+        """测试买单已满时改单最远的买单, 原订单在最终状态前保留"""
+        self.strategy.long_orders_dict = {"Spot.1": 149.0, "Spot.2": 148.0, "Spot.3": 147.0}
+        self.strategy.place_long_order(150.0)
+
+        self.assertEqual(self.get_replaced(), [("Spot.3", 150.0)])
+        self.assertEqual(self.strategy.long_orders_dict["Spot.3"], 147.0)
+        self.assertEqual(self.strategy.long_orders_dict["new_1"], 150.0)
+
+        self.strategy.on_order(self.create_order("Spot.3", 147.0, Status.CANCELLED))
+        self.assertNotIn("Spot.3", self.strategy.long_orders_dict)
+        self.assertEqual(self.strategy.replacing_orderids, set())
+
+    def test_replace_rejected(self):
+        """测试改单的新订单被拒绝时从挂单字典移除"""
+        self.strategy.place_short_order(150.0)
+        self.assertEqual(self.get_replaced(), [("short_153", 150.0)])
+
+        self.strategy.short_orders_dict["Spot.4"] = self.strategy.short_orders_dict.pop("new_1")
+        self.strategy.on_order(self.create_order("Spot.4", 150.0, Status.REJECTED))
+        self.assertNotIn("Spot.4", self.strategy.short_orders_dict)
+
+    def test_recenter(self):
+        """测试价格远离后最远的订单移到最近的网格价格"""
+        self.set_price(160.0)
+        self.strategy.recenter_long_orders()
+        self.assertEqual(self.get_replaced(), [("long_147", 159.0), ("long_148", 158.0), ("long_149", 157.0)])
+
+        self.cta_engine.replace_order.reset_mock()
+        self.set_price(140.0)
+        self.strategy.recenter_short_orders()
+        self.assertEqual(self.get_replaced(), [("short_153", 141.0), ("short_152", 142.0), ("short_151", 143.0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,49 @@
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+
+from gridtrader.trader.utility import PriceScale, TradeIdFilter
+
+
+class TestTradeIdFilter(unittest.TestCase):
+    def test_size_limit(self):
+        """测试超过容量后丢弃最早的成交号"""
+        trade_filter = TradeIdFilter(size=2)
+
+        self.assertFalse(trade_filter.is_duplicate("1"))
+        self.assertTrue(trade_filter.is_duplicate("1"))
+        self.assertFalse(trade_filter.is_duplicate("2"))
+        self.assertFalse(trade_filter.is_duplicate("3"))
+
+        self.assertEqual(len(trade_filter), 2)
+        self.assertFalse(trade_filter.is_duplicate("1"))
+        self.assertEqual((trade_filter.hits, trade_filter.misses), (1, 4))
+
+    def test_ttl(self):
+        """测试过期的成交号被清除"""
+        trade_filter = TradeIdFilter(ttl=60)
+
+        with patch("gridtrader.trader.utility.time.monotonic", return_value=0):
+            trade_filter.is_duplicate("1")
+        with patch("gridtrader.trader.utility.time.monotonic", return_value=30):
+            self.assertTrue(trade_filter.is_duplicate("1"))
+        with patch("gridtrader.trader.utility.time.monotonic", return_value=61):
+            self.assertFalse(trade_filter.is_duplicate("1"))
+
+
+class TestPriceScale(unittest.TestCase):
+    def test_round_to_ticks_and_lots(self):
+        """测试价格按 tick 取整, 数量按最小下单量向下取整"""
+        scale = PriceScale(Decimal("0.10"), Decimal("0.001"))
+
+        self.assertEqual(scale.to_ticks(96012.37), 960124)
+        self.assertEqual(scale.round_price(96012.37), Decimal("96012.40"))
+
+        # 0.3 / 0.1 的浮点结果小于 3
+        self.assertEqual(PriceScale(Decimal("1"), Decimal("0.1")).to_lots(0.3), 3)
+        self.assertEqual(scale.floor_volume(0.0129), Decimal("0.012"))
+        self.assertEqual(scale.to_volume(scale.to_lots(0.5)), Decimal("0.5"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import time
+import unittest
+from queue import Queue
+from threading import Thread, current_thread
+from unittest.mock import Mock
+
+from gridtrader.api.codec import dumps, loads
+from gridtrader.api.websocket import WebsocketClient
+
+
+class TestDecodePipeline(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.client = WebsocketClient()
+        self.client.get_event_time = lambda packet: packet["E"]
+        self.client.on_packet = Mock()
+
+    def test_receive_lag(self):
+        """测试按交易所事件时间记录接收延迟"""
+        self.client._process_frame("btcusdt@bookTicker", 1000.0, b'{"E": 999900}')
+
+        self.client.on_packet.assert_called_once_with({"E": 999900})
+        self.assertAlmostEqual(self.client.lag_stats["btcusdt@bookTicker"]["receive_lag"], 100)
+
+    def test_no_lag_without_standby(self):
+        """测试没有备用连接时接收线程不解析事件时间"""
+        self.client.peek_event_time = Mock(return_value=0)
+        self.client._on_frame = Mock()
+        self.client._ws = Mock()
+
+        def recv(ws):
+            self.client._active = False
+            return b'{"E": 1}'
+
+        self.client._recv = recv
+        self.client._active = True
+        self.client._run()
+
+        self.client._on_frame.assert_called_once()
+        self.client.peek_event_time.assert_not_called()
+
+    def test_drop_oldest_frame(self):
+        """测试队列满时丢弃最早的帧"""
+        self.client._decode_queues = [Queue(maxsize=1)]
+        self.client._put_frame("btcusdt@bookTicker", 1000.0, b'{"E": 1}')
+        self.client._put_frame("btcusdt@bookTicker", 1000.1, b'{"E": 2}')
+
+        self.assertEqual(self.client.overflow_count, 1)
+        self.assertEqual(self.client._decode_queues[0].get_nowait()[2], b'{"E": 2}')
+
+    def test_decode_workers(self):
+        """测试同一个 key 的帧由同一个解码线程按顺序处理"""
+        packets = []
+        self.client.filter_frame = lambda frame: (frame[:1].decode(), True)
+        self.client.unpack_data = lambda frame: frame.decode()
+        self.client.get_event_time = lambda packet: 0
+        self.client.on_packet = lambda packet: packets.append((packet[0], packet[1:], current_thread().name))
+        self.client._active = True
+        self.client._decode_queues = [Queue(), Queue()]
+
+        for i in range(100):
+            for key in "abc":
+                self.client._handle_frame(f"{key}{i:03d}".encode(), 1000.0)
+
+        threads = [Thread(target=self.client._run_decode, args=(q,)) for q in self.client._decode_queues]
+        for thread in threads:
+            thread.start()
+        while any(q.qsize() for q in self.client._decode_queues):
+            time.sleep(0.01)
+        self.client._active = False
+        for thread in threads:
+            thread.join()
+
+        for key in "abc":
+            received = [p for p in packets if p[0] == key]
+            self.assertEqual([p[1] for p in received], [f"{i:03d}" for i in range(100)])
+            self.assertEqual(len({p[2] for p in received}), 1)
+
+        self.assertEqual(self.client.get_frame_counts()["a"], {"processed": 100, "dropped": 0})
+
+
+class TestStandby(unittest.TestCase):
+    def setUp(self):
+        """测试前的设置"""
+        self.client = WebsocketClient()
+        self.client.init("wss://localhost", standby=True)
+        self.client.get_update_id = lambda packet: packet["u"]
+        self.client.on_packet = Mock()
+        self.client._active = True
+
+        self.client._ws = Mock()
+        self.client.standby._ws = Mock()
+
+    def test_switch_on_connection_lost(self):
+        """测试主连接断开时切换到备用连接, 并按更新编号去重"""
+        self.client._on_frame(b'{"u": 2}', 1000.0)
+        self.client._disconnect()
+        self.assertTrue(self.client.use_standby)
+
+        self.client._on_frame(b'{"u": 3}', 1000.1)  # 已断开的主连接
+        self.client.standby._on_frame(b'{"u": 1}', 1000.1)
+        self.client.standby._on_frame(b'{"u": 2}', 1000.1)
+        self.client.standby._on_frame(b'{"u": 3}', 1000.2)
+
+        self.assertEqual([c.args[0] for c in self.client.on_packet.call_args_list], [{"u": 2}, {"u": 3}])
+        self.assertEqual(self.client.duplicate_count, 2)
+
+    def test_switch_on_lag(self):
+        """测试按两个连接的延迟切换, 交易所整体延迟时不切换"""
+        self.client.max_lag = 100
+        self.client.peek_event_time = lambda frame: loads(frame)["E"]
+
+        def receive(connection, recv_time: float, lag: float):
+            frame = dumps({"E": recv_time * 1000 - lag, "u": 0}).encode()
+            connection._update_lag(frame, recv_time)
+            connection._on_frame(frame, recv_time)
+
+        # 两个连接都有 50ms 延迟
+        receive(self.client.standby, 1000.0, 50)
+        receive(self.client, 1000.0, 50)
+
+        # 两个连接同时变慢
+        for i in range(50):
+            receive(self.client.standby, 1000.1, 500)
+            receive(self.client, 1000.1, 500)
+        self.assertFalse(self.client.use_standby)
+
+        # 只有主连接变慢
+        for i in range(50):
+            receive(self.client.standby, 1000.2, 50)
+            receive(self.client, 1000.2, 500)
+        self.assertTrue(self.client.use_standby)
+        self.assertEqual(self.client.switch_count, 1)
+
+    def test_switch_back_on_connected(self):
+        """测试备用连接断开后主连接重连成功时切换回主连接"""
+        self.client._disconnect()
+        self.client.standby._disconnect()
+        self.assertTrue(self.client.use_standby)
+
+        self.client._create_connection = Mock(return_value=Mock())
+        self.client._ensure_connection()
+        self.assertFalse(self.client.use_standby)
+
+    def test_reconnect_backoff(self):
+        """测试重连等待时间按指数增长且有上限"""
+        self.client.reconnect_delay = 0.01
+        self.client.max_reconnect_delay = 0.02
+        self.client._reconnect_count = 100
+
+        start = time.time()
+        self.client._wait_reconnect()
+        self.assertLess(time.time() - start, 0.1)
+        self.assertEqual(self.client._reconnect_count, 101)
+
+
+if __name__ == '__main__':
+    unittest.main()